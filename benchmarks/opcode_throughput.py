@@ -0,0 +1,86 @@
+"""
+Per-opcode throughput of the Spend interpreter.
+
+Every opcode runs as a one-chunk locking script against a prepared stack, so the numbers measure dispatch plus the
+handler itself. Run with:
+
+    PYTHONPATH=src python benchmarks/opcode_throughput.py [iterations]
+"""
+import sys
+import time
+
+from rxdpy.script.script import Script
+from rxdpy.script.spend import Spend
+
+# opcode (or push) and the stack it runs against
+CASES = [
+    ("OP_0", []),
+    ("0102030405", []),
+    ("OP_16", []),
+    ("OP_NOP", []),
+    ("OP_VERIFY", [b"\x01"]),
+    ("OP_DUP", [b"\x01"]),
+    ("OP_DROP", [b"\x01"]),
+    ("OP_SWAP", [b"\x01", b"\x02"]),
+    ("OP_ROT", [b"\x01", b"\x02", b"\x03"]),
+    ("OP_PICK", [b"\x01", b"\x02", b"\x01"]),
+    ("OP_ROLL", [b"\x01", b"\x02", b"\x01"]),
+    ("OP_TOALTSTACK", [b"\x01"]),
+    ("OP_CAT", [b"\x01" * 32, b"\x02" * 32]),
+    ("OP_SPLIT", [b"\x01" * 32, b"\x10"]),
+    ("OP_NUM2BIN", [b"\x01", b"\x08"]),
+    ("OP_BIN2NUM", [b"\x01\x00\x00\x00"]),
+    ("OP_SIZE", [b"\x01" * 32]),
+    ("OP_AND", [b"\x0f" * 32, b"\xf0" * 32]),
+    ("OP_EQUAL", [b"\x01" * 32, b"\x01" * 32]),
+    ("OP_EQUALVERIFY", [b"\x01" * 32, b"\x01" * 32]),
+    ("OP_1ADD", [b"\x01"]),
+    ("OP_ADD", [b"\x01", b"\x02"]),
+    ("OP_MUL", [b"\x01", b"\x02"]),
+    ("OP_NUMEQUALVERIFY", [b"\x01", b"\x01"]),
+    ("OP_WITHIN", [b"\x02", b"\x01", b"\x03"]),
+    ("OP_SHA256", [b"\x01" * 32]),
+    ("OP_HASH160", [b"\x01" * 33]),
+    ("OP_HASH256", [b"\x01" * 32]),
+]
+
+
+def measure(asm: str, stack: list, iterations: int) -> float:
+    """
+    :returns: executed opcodes per second
+    """
+    spend = Spend(
+        {
+            "sourceTXID": "00" * 32,
+            "sourceOutputIndex": 0,
+            "sourceSatoshis": 0,
+            "lockingScript": Script.from_asm(asm),
+            "transactionVersion": 1,
+            "otherInputs": [],
+            "outputs": [],
+            "inputIndex": 0,
+            "unlockingScript": Script(),
+            "inputSequence": 0xFFFFFFFF,
+            "lockTime": 0,
+        }
+    )
+    spend.context = "LockingScript"
+    step = spend.step
+    start = time.perf_counter()
+    for _ in range(iterations):
+        spend.stack = stack[:]
+        spend.program_counter = 0
+        step()
+    return iterations / (time.perf_counter() - start)
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'opcode':<20}{'ops/s':>14}")
+    for asm, stack in CASES:
+        name = asm if asm.startswith("OP_") else f"PUSH{len(bytes.fromhex(asm))}"
+        print(f"{name:<20}{measure(asm, stack, iterations):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+P2PKH spends validated per second, through the fast path and through the generic interpreter.
+
+The signature cache is disabled so that every validation verifies its signature, the "deferred" rows defer the
+signature checks and therefore measure the script work alone. Run with:
+
+    PYTHONPATH=src python benchmarks/p2pkh_validation.py [inputs]
+"""
+import sys
+import time
+
+from rxdpy.keys import PrivateKey, SIGNATURE_CACHE
+from rxdpy.script import spend as spend_module
+from rxdpy.script.spend import Spend
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_input import TransactionInput
+from rxdpy.transaction.transaction_introspection import TransactionIntrospectionContext
+from rxdpy.transaction.transaction_output import TransactionOutput
+from rxdpy.transaction.transaction_verifier import input_spend
+
+
+def p2pkh_transaction(inputs_count: int) -> Transaction:
+    private_key = PrivateKey(0xC0FFEE)
+    address = private_key.address()
+    inputs = []
+    for i in range(inputs_count):
+        source_tx = Transaction([], [TransactionOutput(P2PKH().lock(address), 1000 + i)], locktime=i)
+        inputs.append(
+            TransactionInput(
+                source_transaction=source_tx,
+                source_output_index=0,
+                unlocking_script_template=P2PKH().unlock(private_key),
+            )
+        )
+    tx = Transaction(inputs, [TransactionOutput(P2PKH().lock(address), change=True)])
+    tx.fee(10)
+    return tx.sign()
+
+
+def measure(tx: Transaction, fast_path: bool, deferred: bool) -> float:
+    """
+    :returns: validated inputs per second
+    """
+    spend_module.P2PKH_FAST_PATH = fast_path
+    preimage_context = tx.preimage_context()
+    introspection_context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    spends = [
+        input_spend(tx, i, preimage_context, introspection_context, [] if deferred else None)
+        for i in range(len(tx.inputs))
+    ]
+    start = time.perf_counter()
+    for spend in spends:
+        spend.validate()
+    return len(spends) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    inputs_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    tx = p2pkh_transaction(inputs_count)
+    # build the sighash digests once, both paths share them
+    tx.preimage_context().precompute()
+    SIGNATURE_CACHE.resize(0)
+    print(f"{'path':<24}{'inputs/s':>14}")
+    for deferred in (False, True):
+        for fast_path in (False, True):
+            name = ("fast path" if fast_path else "interpreter") + (" deferred" if deferred else "")
+            print(f"{name:<24}{measure(tx, fast_path, deferred):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
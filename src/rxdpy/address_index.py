@@ -0,0 +1,223 @@
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .base58 import base58check_encode
+from .constants import Network, NETWORK_ADDRESS_PREFIX_DICT, OpCode, PUBLIC_KEY_HASH_BYTE_LENGTH
+from .hash import sha256
+from .keys import PublicKey
+from .script.script import Script
+from .utils import decode_address
+
+# OP_DUP OP_HASH160 <20 bytes> OP_EQUALVERIFY OP_CHECKSIG
+_P2PKH_PREFIX = OpCode.OP_DUP + OpCode.OP_HASH160 + bytes([PUBLIC_KEY_HASH_BYTE_LENGTH])
+_P2PKH_SUFFIX = OpCode.OP_EQUALVERIFY + OpCode.OP_CHECKSIG
+_P2PKH_LENGTH = len(_P2PKH_PREFIX) + PUBLIC_KEY_HASH_BYTE_LENGTH + len(_P2PKH_SUFFIX)
+
+
+def p2pkh_locking_script(public_key_hash: bytes) -> bytes:
+    """
+    :returns: serialized P2PKH locking script, the same as P2PKH().lock(public_key_hash)
+    """
+    return _P2PKH_PREFIX + public_key_hash + _P2PKH_SUFFIX
+
+
+def electrumx_scripthash(locking_script: Union[bytes, Script]) -> str:
+    """
+    :returns: ElectrumX script hash of the locking script, its sha256 in reversed byte order as hex
+    """
+    if isinstance(locking_script, Script):
+        locking_script = locking_script.serialize()
+    return sha256(locking_script)[::-1].hex()
+
+
+class AddressEntry:
+    """
+    One P2PKH address of an AddressIndex, in every form it is looked up by.
+    path is whatever the index was given along with the key, e.g. its derivation path.
+    """
+
+    __slots__ = ("hash160", "address", "locking_script", "scripthash", "path")
+
+    def __init__(self, hash160: bytes, address: str, locking_script: bytes, scripthash: str, path: Optional[str]):
+        self.hash160 = hash160
+        self.address = address
+        # serialized, Script(entry.locking_script) when the object is needed
+        self.locking_script = locking_script
+        self.scripthash = scripthash
+        self.path = path
+
+    def __eq__(self, o: object) -> bool:
+        if isinstance(o, AddressEntry):
+            return self.hash160 == o.hash160 and self.address == o.address and self.path == o.path
+        return super().__eq__(o)  # pragma: no cover
+
+    def __hash__(self) -> int:
+        return hash(self.hash160)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<AddressEntry address={self.address} path={self.path}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class AddressIndex:
+    """
+    In-memory index of P2PKH addresses of one network, looked up in constant time by address, public key hash,
+    locking script or ElectrumX script hash.
+
+    Entries are built in batches, from public keys, extended keys, public key hashes or addresses, so that addresses
+    are encoded and locking scripts hashed in one pass. save() and load() keep the index in an SQLite file, loading
+    it back does not encode or hash anything again.
+
+    Example:
+        index = AddressIndex()
+        index.add_xkeys(bip32_derive_xkeys_from_xkey(xpub, 0, 1000), paths=[f"0/{i}" for i in range(1000)])
+        entry = index.by_scripthash(scripthash)
+    """
+
+    def __init__(self, network: Network = Network.MAINNET):
+        self.network = network
+        self._prefix: bytes = NETWORK_ADDRESS_PREFIX_DICT[network]
+        self._by_hash160: Dict[bytes, AddressEntry] = {}
+        self._by_address: Dict[str, AddressEntry] = {}
+        self._by_scripthash: Dict[str, AddressEntry] = {}
+
+    def _add(self, entries: Iterable[AddressEntry]) -> List[AddressEntry]:
+        added = []
+        for entry in entries:
+            existing = self._by_hash160.get(entry.hash160)
+            if existing is not None:
+                # already indexed, keep the first path it was given
+                added.append(existing)
+                continue
+            self._by_hash160[entry.hash160] = entry
+            self._by_address[entry.address] = entry
+            self._by_scripthash[entry.scripthash] = entry
+            added.append(entry)
+        return added
+
+    def add_hash160s(
+        self, public_key_hashes: Iterable[bytes], paths: Optional[Iterable[Optional[str]]] = None
+    ) -> List[AddressEntry]:
+        """
+        :param paths: optional path of each public key hash, kept in its entry
+        :returns: the entries of the public key hashes, in order
+        """
+        public_key_hashes = [bytes(h) for h in public_key_hashes]
+        for h in public_key_hashes:
+            if len(h) != PUBLIC_KEY_HASH_BYTE_LENGTH:
+                raise ValueError(f"invalid public key hash {h.hex()}")
+        paths = list(paths) if paths is not None else [None] * len(public_key_hashes)
+        if len(paths) != len(public_key_hashes):
+            raise ValueError("expected one path per public key hash")
+
+        addresses = [base58check_encode(self._prefix + h) for h in public_key_hashes]
+        entries = []
+        for h, address, path in zip(public_key_hashes, addresses, paths):
+            locking_script = p2pkh_locking_script(h)
+            entries.append(AddressEntry(h, address, locking_script, electrumx_scripthash(locking_script), path))
+        return self._add(entries)
+
+    def add_public_keys(
+        self,
+        public_keys: Iterable[Union[PublicKey, bytes, str]],
+        paths: Optional[Iterable[Optional[str]]] = None,
+        compressed: Optional[bool] = None,
+    ) -> List[AddressEntry]:
+        """
+        :param public_keys: PublicKey objects or serialized public keys
+        :param compressed: format the public key hashes are computed from, by default the format of each key
+        """
+        keys = [key if isinstance(key, PublicKey) else PublicKey.intern(key) for key in public_keys]
+        return self.add_hash160s([key.hash160(compressed) for key in keys], paths)
+
+    def add_xkeys(self, xkeys: Iterable, paths: Optional[Iterable[Optional[str]]] = None) -> List[AddressEntry]:
+        """
+        :param xkeys: Xpub or Xprv, the address of each one is indexed
+        """
+        return self.add_public_keys([xkey.public_key() for xkey in xkeys], paths)
+
+    def add_addresses(
+        self, addresses: Iterable[str], paths: Optional[Iterable[Optional[str]]] = None
+    ) -> List[AddressEntry]:
+        decoded = [decode_address(address) for address in addresses]
+        for public_key_hash, network in decoded:
+            if network != self.network:
+                raise ValueError(f"expected {self.network.value} addresses only")
+        return self.add_hash160s([public_key_hash for public_key_hash, _ in decoded], paths)
+
+    def by_address(self, address: str) -> Optional[AddressEntry]:
+        return self._by_address.get(address)
+
+    def by_hash160(self, public_key_hash: bytes) -> Optional[AddressEntry]:
+        return self._by_hash160.get(bytes(public_key_hash))
+
+    def by_locking_script(self, locking_script: Union[bytes, Script]) -> Optional[AddressEntry]:
+        if isinstance(locking_script, Script):
+            locking_script = locking_script.serialize()
+        if (
+            len(locking_script) != _P2PKH_LENGTH
+            or locking_script[: len(_P2PKH_PREFIX)] != _P2PKH_PREFIX
+            or locking_script[-len(_P2PKH_SUFFIX) :] != _P2PKH_SUFFIX
+        ):
+            return None
+        return self._by_hash160.get(bytes(locking_script[len(_P2PKH_PREFIX) : -len(_P2PKH_SUFFIX)]))
+
+    def by_scripthash(self, scripthash: str) -> Optional[AddressEntry]:
+        return self._by_scripthash.get(scripthash)
+
+    def scripthashes(self) -> List[str]:
+        return list(self._by_scripthash)
+
+    def save(self, path: str) -> None:
+        """
+        writes the entries to an SQLite file, replacing the ones it already holds for the network
+        """
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS address_index ("
+                "network TEXT NOT NULL, hash160 BLOB NOT NULL, address TEXT NOT NULL, scripthash TEXT NOT NULL, "
+                "path TEXT, PRIMARY KEY (network, hash160))"
+            )
+            connection.execute("DELETE FROM address_index WHERE network = ?", (self.network.value,))
+            connection.executemany(
+                "INSERT INTO address_index VALUES (?, ?, ?, ?, ?)",
+                (
+                    (self.network.value, entry.hash160, entry.address, entry.scripthash, entry.path)
+                    for entry in self._by_hash160.values()
+                ),
+            )
+        connection.close()
+
+    @classmethod
+    def load(cls, path: str, network: Network = Network.MAINNET) -> "AddressIndex":
+        index = cls(network)
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute(
+                "SELECT hash160, address, scripthash, path FROM address_index WHERE network = ? ORDER BY rowid",
+                (network.value,),
+            )
+            index._add(
+                AddressEntry(h, address, p2pkh_locking_script(h), scripthash, entry_path)
+                for h, address, scripthash, entry_path in rows
+            )
+        finally:
+            connection.close()
+        return index
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._by_address
+
+    def __iter__(self) -> Iterator[AddressEntry]:
+        return iter(self._by_hash160.values())
+
+    def __len__(self) -> int:
+        return len(self._by_hash160)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<AddressIndex network={self.network.value} size={len(self)}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
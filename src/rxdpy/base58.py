@@ -2,25 +2,37 @@ from .hash import hash256
 
 BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 
+# value of each ASCII character, 0xff for the ones outside of the alphabet
+_INVALID_DIGIT = b"\xff"
+_DECODE_TABLE = bytes(BASE58_ALPHABET.find(chr(i)) & 0xFF for i in range(256))
+# the 58 * 58 two-digit strings, indexed by their value
+_PAIR = 58 * 58
+_PAIRS = [high + low for high in BASE58_ALPHABET for low in BASE58_ALPHABET]
+# 58 ** 10 is below 2 ** 63, chunks of 10 digits are cheap small integers
+_CHUNK_DIGITS = 10
+_CHUNK = 58**_CHUNK_DIGITS
+
 
 def _checksum(payload: bytes) -> bytes:
     return hash256(payload)[:4]
 
 
 def b58_encode(payload: bytes) -> str:
-    pad = 0
-    for byte in payload:
-        if byte == 0:
-            pad += 1
-        else:
-            break
-    prefix = "1" * pad
-    num = int.from_bytes(payload, "big")
-    result = ""
-    while num > 0:
-        num, remaining = divmod(num, 58)
-        result = BASE58_ALPHABET[remaining] + result
-    return prefix + result
+    stripped = payload.lstrip(b"\x00")
+    pad = len(payload) - len(stripped)
+    num = int.from_bytes(stripped, "big")
+    # least significant digit pairs first, the big number is only divided once per chunk of 10 digits
+    pairs = []
+    while num >= _CHUNK:
+        num, chunk = divmod(num, _CHUNK)
+        for _ in range(_CHUNK_DIGITS // 2):
+            chunk, pair = divmod(chunk, _PAIR)
+            pairs.append(_PAIRS[pair])
+    while num:
+        num, pair = divmod(num, _PAIR)
+        pairs.append(_PAIRS[pair])
+    pairs.reverse()
+    return "1" * pad + "".join(pairs).lstrip("1")
 
 
 def base58check_encode(payload: bytes) -> str:
@@ -49,22 +61,27 @@ def from_base58check(encoded: str, prefix_len: int = 1) -> (bytes, bytes):
 
 
 def b58_decode(encoded: str) -> bytes:
-    pad = 0
-    for char in encoded:
-        if char == "1":
-            pad += 1
-        else:
-            break
-    prefix = b"\x00" * pad
-    num = 0
     try:
-        for char in encoded:
-            num *= 58
-            num += BASE58_ALPHABET.index(char)
-    except Exception:
+        digits = encoded.encode("ascii").translate(_DECODE_TABLE)
+    except (AttributeError, UnicodeEncodeError):
         raise ValueError(f"invalid base58 encoded {encoded}")
+    if _INVALID_DIGIT in digits:
+        raise ValueError(f"invalid base58 encoded {encoded}")
+    stripped = digits.lstrip(b"\x00")
+    pad = len(digits) - len(stripped)
+    # small numbers of up to 10 digits are folded into the big number one chunk at a time
+    num = 0
+    head = len(stripped) % _CHUNK_DIGITS
+    if head:
+        for digit in stripped[:head]:
+            num = num * 58 + digit
+    for i in range(head, len(stripped), _CHUNK_DIGITS):
+        chunk = 0
+        for digit in stripped[i : i + _CHUNK_DIGITS]:
+            chunk = chunk * 58 + digit
+        num = num * _CHUNK + chunk
     # if num is 0 then (0).to_bytes will return b''
-    return prefix + num.to_bytes((num.bit_length() + 7) // 8, "big")
+    return b"\x00" * pad + num.to_bytes((num.bit_length() + 7) // 8, "big")
 
 
 def base58check_decode(encoded: str) -> bytes:
@@ -0,0 +1,272 @@
+import io
+import mmap
+import os
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+from .hash import hash256, hash512_256
+from .transaction.lazy_transaction import LazyTransaction
+from .transaction.transaction import Transaction
+from .utils import MemoryReader, Writer
+
+BlockSource = Union[bytes, bytearray, memoryview, mmap.mmap, str, os.PathLike, BinaryIO]
+
+
+class BlockHeader:
+    """
+    The 80 bytes block header. Radiant hashes it with SHA512/256d instead of SHA256d.
+    """
+
+    SIZE = 80
+
+    def __init__(
+        self,
+        version: int,
+        prev_block_hash: bytes,
+        merkle_root: bytes,
+        time: int,
+        bits: int,
+        nonce: int,
+    ):
+        """
+        :param prev_block_hash: hash of the previous block in internal byte order
+        :param merkle_root: merkle root of the block transactions in internal byte order
+        """
+        self.version = version
+        self.prev_block_hash = prev_block_hash
+        self.merkle_root = merkle_root
+        self.time = time
+        self.bits = bits
+        self.nonce = nonce
+
+    @classmethod
+    def from_reader(cls, reader: MemoryReader) -> "BlockHeader":
+        raw = reader.read(cls.SIZE)
+        if raw is None or len(raw) < cls.SIZE:
+            raise ValueError("truncated block header")
+        return cls.from_bytes(raw)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "BlockHeader":
+        if len(raw) != cls.SIZE:
+            raise ValueError(f"block header must be {cls.SIZE} bytes, got {len(raw)}")
+        return cls(
+            version=int.from_bytes(raw[0:4], "little"),
+            prev_block_hash=bytes(raw[4:36]),
+            merkle_root=bytes(raw[36:68]),
+            time=int.from_bytes(raw[68:72], "little"),
+            bits=int.from_bytes(raw[72:76], "little"),
+            nonce=int.from_bytes(raw[76:80], "little"),
+        )
+
+    @classmethod
+    def from_hex(cls, hex_str: str) -> "BlockHeader":
+        return cls.from_bytes(bytes.fromhex(hex_str))
+
+    def serialize(self) -> bytes:
+        writer = Writer()
+        writer.write_uint32_le(self.version)
+        writer.write(self.prev_block_hash)
+        writer.write(self.merkle_root)
+        writer.write_uint32_le(self.time)
+        writer.write_uint32_le(self.bits)
+        writer.write_uint32_le(self.nonce)
+        return writer.to_bytes()
+
+    def hex(self) -> str:
+        return self.serialize().hex()
+
+    def hash(self) -> bytes:
+        return hash512_256(self.serialize())
+
+    def block_hash(self) -> str:
+        return self.hash()[::-1].hex()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<BlockHeader hash={self.block_hash()} merkle_root={self.merkle_root[::-1].hex()}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class MerkleRootBuilder:
+    """
+    Computes a merkle root from transaction hashes fed one at a time.
+
+    Only one pending node per tree level is kept, so memory stays O(log n) whatever the number of transactions.
+    Odd nodes are paired with themselves, as in the reference node implementation.
+
+    Example:
+        builder = MerkleRootBuilder()
+        for tx in block.transactions():
+            builder.add(tx.hash())
+        root = builder.root()
+    """
+
+    def __init__(self):
+        self._levels: List[Optional[bytes]] = []
+        self.count: int = 0
+
+    def add(self, tx_hash: bytes) -> None:
+        """
+        :param tx_hash: transaction hash in internal byte order, i.e. the reversed txid
+        """
+        self.count += 1
+        node = tx_hash
+        height = 0
+        while height < len(self._levels) and self._levels[height] is not None:
+            node = hash256(self._levels[height] + node)
+            self._levels[height] = None
+            height += 1
+        if height == len(self._levels):
+            self._levels.append(node)
+        else:
+            self._levels[height] = node
+
+    def root(self) -> bytes:
+        """
+        :returns: the merkle root in internal byte order
+        """
+        if not self.count:
+            raise ValueError("merkle root of an empty transaction list")
+        top = len(self._levels) - 1
+        carry: Optional[bytes] = None
+        for height, pending in enumerate(self._levels):
+            if carry is None:
+                if pending is None:
+                    continue
+                if height == top:
+                    return pending
+                # lone node at the end of this level, paired with itself
+                carry = hash256(pending + pending)
+            elif pending is None:
+                carry = hash256(carry + carry)
+            else:
+                carry = hash256(pending + carry)
+        return carry
+
+
+class Block:
+    """
+    Streaming view over a serialized block.
+
+    Only the header and the transaction count are parsed upfront. transactions() walks the block one transaction
+    at a time over a zero-copy reader, so a block read from a file is memory-mapped and never loaded as a whole.
+
+    Example:
+        with Block("block.bin") as block:
+            for tx in block.transactions():
+                print(tx.txid())
+            assert block.verify_merkle_root()
+    """
+
+    def __init__(self, source: BlockSource):
+        """
+        :param source: serialized block as bytes-like object or mmap, path to a block file, or binary file object
+        """
+        self._mmap: Optional[mmap.mmap] = None
+        self._file: Optional[BinaryIO] = None
+        self._view = memoryview(b"")
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                self._file = open(source, "rb")
+                source = self._file
+            if hasattr(source, "read"):
+                source = self._map_file(source)
+            self._view = memoryview(source).cast("B")
+
+            reader = MemoryReader(self._view)
+            self.header: BlockHeader = BlockHeader.from_reader(reader)
+            tx_count = reader.read_var_int_num()
+            if tx_count is None:
+                raise ValueError("truncated block")
+        except BaseException:
+            # nobody gets a block to close, release the file and its mapping here
+            self.close()
+            raise
+        self.tx_count: int = tx_count
+        self._transactions_offset = reader.tell()
+
+    def _map_file(self, file: BinaryIO) -> Union[mmap.mmap, bytes]:
+        try:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # not backed by a regular file (e.g. BytesIO or a pipe), or an empty one
+            return file.read()
+
+    def transactions(self, lazy: bool = True) -> Iterator[Union[LazyTransaction, Transaction]]:
+        """
+        Yields the block transactions in order.
+        :param lazy: yield LazyTransaction views over the block bytes instead of fully parsed Transaction objects
+        """
+        reader = MemoryReader(self._view, self._transactions_offset)
+        parse = LazyTransaction.from_reader if lazy else Transaction.from_reader
+        for i in range(self.tx_count):
+            tx = parse(reader)
+            if tx is None:
+                raise ValueError(f"malformed transaction {i} in block")
+            yield tx
+
+    def __iter__(self) -> Iterator[LazyTransaction]:
+        return self.transactions()
+
+    def __len__(self) -> int:
+        return self.tx_count
+
+    def hashes(self) -> Iterator[bytes]:
+        """
+        Yields the transaction hashes in internal byte order, one transaction at a time
+        """
+        for tx in self.transactions():
+            yield tx.hash()
+
+    def txids(self) -> Iterator[str]:
+        for tx_hash in self.hashes():
+            yield tx_hash[::-1].hex()
+
+    def compute_merkle_root(self) -> bytes:
+        """
+        :returns: the merkle root of the block transactions in internal byte order
+        """
+        builder = MerkleRootBuilder()
+        for tx_hash in self.hashes():
+            builder.add(tx_hash)
+        return builder.root()
+
+    def verify_merkle_root(self) -> bool:
+        """
+        :returns: whether the transactions hash to the merkle root committed in the header
+        """
+        return self.compute_merkle_root() == self.header.merkle_root
+
+    def block_hash(self) -> str:
+        return self.header.block_hash()
+
+    def close(self) -> None:
+        """
+        Releases the underlying file. Transactions yielded so far are views over the mapped file, the mapping is only
+        released once they are gone.
+        """
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views over the mapping are still alive, it is unmapped when the last one is collected
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Block":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<Block hash={self.block_hash()} transactions={self.tx_count}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+
+class CacheStats:
+    """
+    Hit and miss counters of a cache
+    """
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def hit(self) -> None:
+        self.hits += 1
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<CacheStats hits={self.hits} misses={self.misses}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class LRUCache:
+    """
+    Thread-safe mapping keeping at most maxsize entries, the least recently used one is evicted first.
+    A maxsize of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.stats.miss()
+                return default
+            self._data.move_to_end(key)
+            self.stats.hit()
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.stats.reset()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<LRUCache size={len(self._data)} maxsize={self.maxsize} {self.stats}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class SignatureCache:
+    """
+    Bounded set of the (digest, public key, signature) triples already found valid, the equivalent of a node's
+    sigcache. Only valid signatures are remembered, so invalid ones cannot push the valid ones out.
+
+    Example:
+        if not cache.contains(digest, public_key, signature):
+            ...
+            cache.add(digest, public_key, signature)
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries = LRUCache(maxsize)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._entries.stats
+
+    @property
+    def maxsize(self) -> int:
+        return self._entries.maxsize
+
+    @staticmethod
+    def _key(digest: bytes, public_key: bytes, signature: bytes) -> Tuple[bytes, bytes, bytes]:
+        return bytes(digest), bytes(public_key), bytes(signature)
+
+    def contains(self, digest: bytes, public_key: bytes, signature: bytes) -> bool:
+        return self._entries.get(self._key(digest, public_key, signature), False)
+
+    def add(self, digest: bytes, public_key: bytes, signature: bytes) -> None:
+        self._entries.put(self._key(digest, public_key, signature), True)
+
+    def resize(self, maxsize: int) -> None:
+        self._entries.resize(maxsize)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<SignatureCache size={len(self)} maxsize={self.maxsize} {self.stats}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
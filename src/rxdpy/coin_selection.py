@@ -0,0 +1,406 @@
+import bisect
+import itertools
+import math
+import random
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Union
+
+from .constants import COIN_SELECTION_TIME_LIMIT_MS, TRANSACTION_FEE_RATE
+from .fee_models import SatoshisPerKilobyte
+from .script.unlocking_template import UnlockingScriptTemplate
+from .transaction.transaction_input import TransactionInput
+from .transaction.transaction_output import TransactionOutput
+from .utils import unsigned_to_varint
+
+# unlocking script of a P2PKH input with a compressed public key
+P2PKH_UNLOCKING_BYTE_LENGTH = 107
+P2PKH_LOCKING_BYTE_LENGTH = 25
+# txid, output index and sequence of an input
+INPUT_FIXED_BYTE_LENGTH = 40
+# change below this is left to the miners
+MIN_CHANGE = 1
+# random subsets tried by knapsack(), and the most coins it draws them from
+KNAPSACK_ITERATIONS = 1000
+KNAPSACK_MAX_CANDIDATES = 1000
+# branch and bound checks the time every this many steps
+_CLOCK_INTERVAL = 1024
+
+# any object with a satoshis attribute, e.g. rxdpy.network.Utxo
+Coin = Any
+
+
+class InsufficientFunds(ValueError):
+    def __init__(self, available: int, required: int):
+        super().__init__(f"Insufficient funds: {available} satoshis available, at least {required} required")
+        self.available = available
+        self.required = required
+
+
+class CoinPool:
+    """
+    Coins sorted by satoshis, so that selection reads the candidates of a target through bisection rather than
+    sorting the whole set again. Adding or removing a coin keeps the order.
+
+    Example:
+        pool = CoinPool(cache.utxos())
+        selection = CoinSelector(outputs).select(pool)
+        pool.remove_all(selection.coins)
+    """
+
+    def __init__(self, coins: Iterable[Coin] = ()):
+        coins = sorted(coins, key=lambda coin: coin.satoshis)
+        self._coins: List[Coin] = coins
+        self._values: List[int] = [coin.satoshis for coin in coins]
+        self.total: int = sum(self._values)
+        self._prefix_sums: Optional[List[int]] = None
+
+    def add(self, coin: Coin) -> None:
+        i = bisect.bisect_right(self._values, coin.satoshis)
+        self._values.insert(i, coin.satoshis)
+        self._coins.insert(i, coin)
+        self.total += coin.satoshis
+        self._prefix_sums = None
+
+    def remove(self, coin: Coin) -> None:
+        i = bisect.bisect_left(self._values, coin.satoshis)
+        while i < len(self._values) and self._values[i] == coin.satoshis:
+            if self._coins[i] is coin or self._coins[i] == coin:
+                del self._values[i]
+                del self._coins[i]
+                self.total -= coin.satoshis
+                self._prefix_sums = None
+                return
+            i += 1
+        raise KeyError(f"coin not in pool: {coin}")
+
+    def remove_all(self, coins: Iterable[Coin]) -> None:
+        for coin in coins:
+            self.remove(coin)
+
+    def index(self, satoshis: int) -> int:
+        """
+        :returns: number of coins worth less than satoshis
+        """
+        return bisect.bisect_left(self._values, satoshis)
+
+    def sum(self, i: int, j: int) -> int:
+        """
+        :returns: satoshis of the coins from index i to j excluded, in constant time
+        """
+        if self._prefix_sums is None:
+            self._prefix_sums = list(itertools.accumulate(self._values, initial=0))
+        return self._prefix_sums[j] - self._prefix_sums[i]
+
+    def __getitem__(self, i: int) -> Coin:
+        return self._coins[i]
+
+    def __iter__(self):
+        return iter(self._coins)
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+
+class Selection:
+    """
+    Coins selected to fund outputs, the fee they pay and the change left, 0 when no change output is needed.
+    """
+
+    def __init__(self, coins: List[Coin], fee: int, change: int, byte_length: int, strategy: str):
+        self.coins = coins
+        self.fee = fee
+        self.change = change
+        # estimated size of the transaction, change output included when there is change
+        self.byte_length = byte_length
+        self.strategy = strategy
+
+    @property
+    def total(self) -> int:
+        return sum(coin.satoshis for coin in self.coins)
+
+    def inputs(self, unlocking_script_template: Optional[UnlockingScriptTemplate] = None) -> List[TransactionInput]:
+        """
+        :returns: an input spending each coin, coins must offer to_input() like rxdpy.network.Utxo
+        """
+        return [coin.to_input(unlocking_script_template) for coin in self.coins]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<Selection {self.strategy} coins={len(self.coins)} fee={self.fee} change={self.change}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class CoinSelector:
+    """
+    Chooses the coins funding a set of outputs, paying the fee the transaction will need under a sat/kB rate.
+
+    Every coin is weighed by its effective value, its satoshis minus the fee of the input spending it. Three
+    strategies are offered:
+
+    - branch_and_bound() searches for coins matching the outputs and fee closely enough that no change output is
+      worth creating
+    - knapsack() draws random subsets of the coins smaller than the target and keeps the one closest above it,
+      compared with the single smallest coin covering the target
+    - largest_first() adds the largest coins until the target is covered
+
+    select() tries them in this order. The searches stop after time_limit_ms whatever they found, so that selection
+    over a large pool stays within a few milliseconds.
+
+    Example:
+        selector = CoinSelector([TransactionOutput(P2PKH().lock(address), 5000)], SatoshisPerKilobyte(1000))
+        selection = selector.select(cache.utxos())
+        tx = Transaction(selection.inputs(P2PKH().unlock(private_key)), outputs + change_outputs)
+    """
+
+    def __init__(
+        self,
+        outputs: Sequence[TransactionOutput],
+        fee_model: Union[SatoshisPerKilobyte, int, None] = None,
+        unlocking_byte_length: Union[int, UnlockingScriptTemplate] = P2PKH_UNLOCKING_BYTE_LENGTH,
+        change_locking_byte_length: int = P2PKH_LOCKING_BYTE_LENGTH,
+        min_change: int = MIN_CHANGE,
+        time_limit_ms: int = COIN_SELECTION_TIME_LIMIT_MS,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        :param outputs: the outputs to fund, change outputs left out
+        :param fee_model: SatoshisPerKilobyte or its rate, defaults to TRANSACTION_FEE_RATE
+        :param unlocking_byte_length: estimated unlocking script length of every input, or the template spending them
+        :param change_locking_byte_length: locking script length of the change output
+        """
+        if fee_model is None:
+            fee_model = SatoshisPerKilobyte(TRANSACTION_FEE_RATE)
+        self.rate: int = fee_model.value if isinstance(fee_model, SatoshisPerKilobyte) else int(fee_model)
+        if not isinstance(unlocking_byte_length, int):
+            unlocking_byte_length = unlocking_byte_length.estimated_unlocking_byte_length()
+        self.target: int = sum(output.satoshis for output in outputs)
+        self.min_change = min_change
+        self.time_limit_ms = time_limit_ms
+        self.rng = rng or random.Random()
+        self._outputs_count = len(outputs)
+        self._outputs_byte_length = sum(len(output.serialize()) for output in outputs)
+        self.input_byte_length = (
+            INPUT_FIXED_BYTE_LENGTH + len(unsigned_to_varint(unlocking_byte_length)) + unlocking_byte_length
+        )
+        self.change_byte_length = 8 + len(unsigned_to_varint(change_locking_byte_length)) + change_locking_byte_length
+
+        # search arithmetic is in thousandths of a satoshi, so that sizes times the sat/kB rate stay exact
+        self._input_fee = self.input_byte_length * self.rate
+        self._target = self.target * 1000 + self._byte_length(0, False) * self.rate
+        self._change_fee = self.change_byte_length * self.rate
+        # change cheaper than creating and later spending it is better left as fee
+        self._cost_of_change = self._change_fee + self._input_fee
+
+    def _byte_length(self, inputs_count: int, change: bool) -> int:
+        outputs_count = self._outputs_count + (1 if change else 0)
+        return (
+            8  # version and lock time
+            + len(unsigned_to_varint(inputs_count))
+            + inputs_count * self.input_byte_length
+            + len(unsigned_to_varint(outputs_count))
+            + self._outputs_byte_length
+            + (self.change_byte_length if change else 0)
+        )
+
+    def _fee(self, byte_length: int) -> int:
+        return math.ceil(byte_length * self.rate / 1000)
+
+    def _effective(self, satoshis: int) -> int:
+        return satoshis * 1000 - self._input_fee
+
+    def _finish(self, coins: List[Coin], strategy: str, change: bool = True) -> Optional[Selection]:
+        """
+        :returns: the selection of coins with its exact fee and change, None if they do not cover the outputs
+        """
+        total = sum(coin.satoshis for coin in coins)
+        byte_length = self._byte_length(len(coins), False)
+        fee = self._fee(byte_length)
+        if total < self.target + fee:
+            return None
+        if change:
+            byte_length_with_change = self._byte_length(len(coins), True)
+            fee_with_change = self._fee(byte_length_with_change)
+            amount = total - self.target - fee_with_change
+            if amount >= self.min_change and amount * 1000 >= self._cost_of_change:
+                return Selection(coins, fee_with_change, amount, byte_length_with_change, strategy)
+        return Selection(coins, total - self.target, 0, byte_length, strategy)
+
+    def _pool(self, coins: Union[CoinPool, Iterable[Coin]]) -> CoinPool:
+        return coins if isinstance(coins, CoinPool) else CoinPool(coins)
+
+    def _useful(self, pool: CoinPool) -> int:
+        """
+        :returns: index of the smallest coin worth more than the fee of spending it
+        """
+        return pool.index(self._input_fee // 1000 + 1)
+
+    def _deadline(self) -> float:
+        return time.perf_counter() + self.time_limit_ms / 1000
+
+    def branch_and_bound(self, coins: Union[CoinPool, Iterable[Coin]]) -> Optional[Selection]:
+        """
+        :returns: coins covering the target with less excess than the cost of change, None if none was found in time
+        """
+        pool = self._pool(coins)
+        upper = self._target + self._cost_of_change
+        fee = self._input_fee
+        values = pool._values
+        # candidates are the coins worth spending and not above the upper bound alone, explored largest first:
+        # position k of the search is values[end - 1 - k]
+        start, end = self._useful(pool), pool.index((upper + fee) // 1000 + 1)
+        count = end - start
+
+        def effective(k: int) -> int:
+            return values[end - 1 - k] * 1000 - fee
+
+        def effective_sum(a: int, b: int) -> int:
+            # positions [a, b)
+            return pool.sum(end - b, end - a) * 1000 - (b - a) * fee
+
+        available = effective_sum(0, count)
+        if available < self._target:
+            return None
+
+        deadline = self._deadline()
+        value = 0
+        depth = 0
+        # positions of the coins included in the current branch
+        included: List[int] = []
+        best: Optional[List[int]] = None
+        best_excess = upper
+        steps = 0
+        while True:
+            steps += 1
+            if steps % _CLOCK_INTERVAL == 0 and time.perf_counter() > deadline:
+                break
+            backtrack = False
+            if value + available < self._target:
+                backtrack = True
+            elif value >= self._target:
+                if best is None or value - self._target < best_excess:
+                    best, best_excess = list(included), value - self._target
+                    if best_excess == 0:
+                        break
+                backtrack = True
+            else:
+                # coins that would overshoot the upper bound are excluded at once
+                limit = (upper - value + fee) // 1000
+                fitting = max(depth, end - bisect.bisect_right(values, limit, start, end))
+                if fitting > depth:
+                    available -= effective_sum(depth, fitting)
+                    depth = fitting
+                    continue
+                available -= effective(depth)
+                if depth and (not included or included[-1] != depth - 1) and effective(depth) == effective(depth - 1):
+                    # the same value was just excluded, including this one would repeat that branch
+                    pass
+                else:
+                    included.append(depth)
+                    value += effective(depth)
+                depth += 1
+
+            if backtrack:
+                if not included:
+                    break
+                # exclude the last included coin, the ones after it are available again
+                last = included.pop()
+                value -= effective(last)
+                available += effective_sum(last + 1, depth)
+                depth = last + 1
+
+        if best is None:
+            return None
+        return self._finish([pool[end - 1 - k] for k in best], "branch_and_bound", change=False)
+
+    def knapsack(self, coins: Union[CoinPool, Iterable[Coin]]) -> Optional[Selection]:
+        """
+        :returns: coins covering the target and a change output, None if the smaller coins could not be combined
+        """
+        pool = self._pool(coins)
+        target = self._target + self._change_fee + self.min_change * 1000
+        start = self._useful(pool)
+        # the smallest coin covering the target alone
+        larger_index = max(start, pool.index(-(-(target + self._input_fee) // 1000)))
+        larger = pool[larger_index] if larger_index < len(pool) else None
+        # the largest of the coins below it, sum() of a slice being far cheaper than a pass over a large pool
+        first = max(start, larger_index - KNAPSACK_MAX_CANDIDATES)
+        values = [self._effective(satoshis) for satoshis in reversed(pool._values[first:larger_index])]
+        candidates = [pool[larger_index - 1 - i] for i in range(len(values))]
+        total = sum(values)
+
+        best: Optional[List[bool]] = None
+        best_value = 0
+        if total >= target:
+            best = [True] * len(values)
+            best_value = total
+            deadline = self._deadline()
+            for _ in range(KNAPSACK_ITERATIONS):
+                if best_value == target or time.perf_counter() > deadline:
+                    break
+                included = [False] * len(values)
+                value = 0
+                reached = False
+                for second_pass in (False, True):
+                    if reached:
+                        break
+                    for i, v in enumerate(values):
+                        # random subsets first, then the coins left out completing them
+                        if (not included[i]) if second_pass else self.rng.random() < 0.5:
+                            value += v
+                            included[i] = True
+                            if value >= target:
+                                reached = True
+                                if value < best_value:
+                                    best, best_value = list(included), value
+                                value -= v
+                                included[i] = False
+
+        if larger is not None and (best is None or self._effective(larger.satoshis) <= best_value):
+            return self._finish([larger], "knapsack")
+        if best is None:
+            return None
+        return self._finish([coin for coin, included in zip(candidates, best) if included], "knapsack")
+
+    def largest_first(self, coins: Union[CoinPool, Iterable[Coin]]) -> Optional[Selection]:
+        """
+        :returns: the fewest largest coins covering the target, None if all of them do not
+        """
+        pool = self._pool(coins)
+        start = self._useful(pool)
+        picked = []
+        value = 0
+        for i in range(len(pool) - 1, start - 1, -1):
+            picked.append(pool[i])
+            value += self._effective(pool._values[i])
+            if value >= self._target:
+                selection = self._finish(picked, "largest_first")
+                if selection is not None:
+                    return selection
+        return None
+
+    def select(self, coins: Union[CoinPool, Iterable[Coin]], strategy: Optional[str] = None) -> Selection:
+        """
+        :param strategy: "branch_and_bound", "knapsack" or "largest_first", by default each one in turn
+        :raises InsufficientFunds: when the coins do not cover the outputs and their fee
+        """
+        pool = self._pool(coins)
+        strategies = [strategy] if strategy else ["branch_and_bound", "knapsack", "largest_first"]
+        for name in strategies:
+            selection = getattr(self, name)(pool)
+            if selection is not None:
+                return selection
+        raise InsufficientFunds(pool.total, self.target + self._fee(self._byte_length(1, False)))
+
+
+def select_coins(
+    coins: Union[CoinPool, Iterable[Coin]],
+    outputs: Sequence[TransactionOutput],
+    fee_model: Union[SatoshisPerKilobyte, int, None] = None,
+    unlocking_byte_length: Union[int, UnlockingScriptTemplate] = P2PKH_UNLOCKING_BYTE_LENGTH,
+    strategy: Optional[str] = None,
+) -> Selection:
+    """
+    Selects the coins funding outputs, see CoinSelector.
+    """
+    return CoinSelector(outputs, fee_model, unlocking_byte_length).select(coins, strategy)
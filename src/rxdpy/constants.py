@@ -13,7 +13,14 @@ BIP39_ENTROPY_BIT_LENGTH: int = int(os.getenv("RXD_PY_SDK_BIP39_ENTROPY_BIT_LENG
 BIP44_DERIVATION_PATH = os.getenv("RXD_PY_SDK_BIP44_DERIVATION_PATH") or "m/44'/0'/0'"
 
 HTTP_REQUEST_TIMEOUT: int = int(os.getenv("RXD_PY_SDK_HTTP_REQUEST_TIMEOUT") or 30)
+ELECTRUMX_URL = os.getenv("RXD_PY_SDK_ELECTRUMX_URL") or "wss://electrumx.radiant4people.com:50022/"
 THREAD_POOL_MAX_EXECUTORS: int = int(os.getenv("RXD_PY_SDK_THREAD_POOL_MAX_EXECUTORS") or 10)
+PROCESS_POOL_MAX_EXECUTORS: int = int(os.getenv("RXD_PY_SDK_PROCESS_POOL_MAX_EXECUTORS") or os.cpu_count() or 1)
+COMPILED_SCRIPT_CACHE_SIZE: int = int(os.getenv("RXD_PY_SDK_COMPILED_SCRIPT_CACHE_SIZE") or 1024)
+SIGNATURE_CACHE_SIZE: int = int(os.getenv("RXD_PY_SDK_SIGNATURE_CACHE_SIZE") or 50000)
+PUBLIC_KEY_CACHE_SIZE: int = int(os.getenv("RXD_PY_SDK_PUBLIC_KEY_CACHE_SIZE") or 4096)
+HD_CHILD_CACHE_SIZE: int = int(os.getenv("RXD_PY_SDK_HD_CHILD_CACHE_SIZE") or 256)
+COIN_SELECTION_TIME_LIMIT_MS: int = int(os.getenv("RXD_PY_SDK_COIN_SELECTION_TIME_LIMIT_MS") or 3)
 
 
 class Network(str, Enum):
@@ -24,8 +24,17 @@ def ripemd160_sha256(payload: bytes) -> bytes:
     return ripemd160(sha256(payload))
 
 
+def sha512_256(payload: bytes) -> bytes:
+    return hashlib.new("sha512_256", payload).digest()
+
+
+def double_sha512_256(payload: bytes) -> bytes:
+    return sha512_256(sha512_256(payload))
+
+
 hash256 = double_sha256
 hash160 = ripemd160_sha256
+hash512_256 = double_sha512_256
 
 
 def hmac_sha256(key: bytes, message: bytes) -> bytes:
@@ -9,6 +9,8 @@ from .bip32 import (
     bip32_derive_xprvs_from_mnemonic,
     bip32_derive_xkeys_from_xkey,
 )
+from .derive_range import DerivedKeys, derive_range
+from .discovery import HistoryBackend, LocalHistory, GapLimitScanner
 from .bip39 import WordList, mnemonic_from_entropy, seed_from_mnemonic, validate_mnemonic
 from .bip44 import (
     derive_xkeys_from_xkey,
@@ -1,18 +1,21 @@
 import hmac
+from abc import ABC, abstractmethod
 from hashlib import sha512
-from typing import Union, List
+from typing import Union, List, Optional
 
 from .bip39 import seed_from_mnemonic
+from .derivation_cache import DerivationCache
 from ..base58 import base58check_decode, base58check_encode
-from ..constants import BIP32_SEED_BYTE_LENGTH
+from ..cache import LRUCache
+from ..constants import BIP32_SEED_BYTE_LENGTH, HD_CHILD_CACHE_SIZE
 from ..constants import NETWORK_XPUB_PREFIX_DICT, NETWORK_XPRV_PREFIX_DICT
 from ..constants import Network, XKEY_BYTE_LENGTH, XKEY_PREFIX_LIST, PUBLIC_KEY_COMPRESSED_PREFIX_LIST
 from ..constants import XPUB_PREFIX_NETWORK_DICT, XPRV_PREFIX_NETWORK_DICT, BIP32_DERIVATION_PATH
-from ..curve import curve, curve_add, curve_multiply
+from ..curve import curve
 from ..keys import PublicKey, PrivateKey
 
 
-class Xkey:
+class Xkey(ABC):
     """
     [  : 4] prefix
     [ 4: 5] depth
@@ -20,8 +23,15 @@ class Xkey:
     [ 9:13] child index
     [13:45] chain code
     [45:78] key (private/public)
+
+    Every extended key keeps the children it derived last, so that walking a path again from the same parent,
+    as ckd() does from the root, only derives the steps it has not seen. Set derivation_cache to also keep hardened
+    derivations in a file.
     """
 
+    # optional persistent cache of hardened derivations, shared by all extended private keys
+    derivation_cache: Optional[DerivationCache] = None
+
     def __init__(self, xkey: Union[str, bytes]):
         if isinstance(xkey, str):
             self.payload: bytes = base58check_decode(xkey)
@@ -38,6 +48,39 @@ class Xkey:
         self.chain_code: bytes = self.payload[13:45]
         self.key_bytes: bytes = self.payload[45:]
         assert self.prefix in XKEY_PREFIX_LIST, "invalid extended key prefix"
+        self._children = LRUCache(HD_CHILD_CACHE_SIZE)
+
+    def ckd(self, index: Union[int, str, bytes]) -> "Xkey":
+        """
+        :returns: the child extended key at index, from the children derived last when it is one of them
+        """
+        if isinstance(index, int):
+            index = index.to_bytes(4, "big")
+        elif isinstance(index, str):
+            index = bytes.fromhex(index)
+        assert len(index) == 4, "index should be a 4 bytes integer"
+
+        child = self._children.get(index)
+        if child is None:
+            child = self._ckd(index)
+            self._children.put(index, child)
+        return child
+
+    @abstractmethod
+    def _ckd(self, index: bytes) -> "Xkey":
+        """
+        :returns: the child extended key at the 4 bytes index, derived without looking at the cache
+        """
+
+    @abstractmethod
+    def public_key(self) -> PublicKey:
+        pass
+
+    def identifier_fingerprint(self) -> bytes:
+        """
+        :returns: fingerprint of this key, the parent fingerprint of its children
+        """
+        return self.public_key().hash160()[:4]
 
     def __eq__(self, o: object) -> bool:
         if isinstance(o, Xkey):
@@ -57,14 +100,9 @@ class Xpub(Xkey):
         self.network: Network = XPUB_PREFIX_NETWORK_DICT.get(self.prefix)
         assert self.network, "unknown xpub prefix"
         assert self.payload[45:46] in PUBLIC_KEY_COMPRESSED_PREFIX_LIST, "invalid public key in xpub"
-        self.key: PublicKey = PublicKey(self.key_bytes)
+        self.key: PublicKey = PublicKey.intern(self.key_bytes)
 
-    def ckd(self, index: Union[int, str, bytes]) -> "Xpub":
-        if isinstance(index, int):
-            index = index.to_bytes(4, "big")
-        elif isinstance(index, str):
-            index = bytes.fromhex(index)
-        assert len(index) == 4, "index should be a 4 bytes integer"
+    def _ckd(self, index: bytes) -> "Xpub":
         assert index[0] < 0x80, (
             "can't make hardened derivation from xpub. "
             "If you use hardened key, please set xpub with path from xpriv first. Example:\n"
@@ -75,12 +113,12 @@ class Xpub(Xkey):
 
         payload: bytes = self.prefix
         payload += (self.depth + 1).to_bytes(1, "big")
-        payload += self.key.hash160()[:4]
+        payload += self.identifier_fingerprint()
         payload += index
 
         h: bytes = hmac.new(self.chain_code, self.key.serialize() + index, sha512).digest()
-        offset: int = int.from_bytes(h[:32], "big")
-        child: PublicKey = PublicKey(curve_add(self.key.point(), curve_multiply(offset, curve.g)))
+        # point(key) + offset * G, in coincurve rather than in Python integers
+        child: PublicKey = PublicKey(self.key.key.add(h[:32]))
 
         payload += h[32:]
         payload += child.serialize()
@@ -102,7 +140,7 @@ class Xpub(Xkey):
         payload += xprv.fingerprint
         payload += xprv.index.to_bytes(4, "big")
         payload += xprv.chain_code
-        payload += xprv.key.public_key().serialize()
+        payload += xprv.public_key().serialize()
         return Xpub(payload)
 
 
@@ -113,20 +151,22 @@ class Xprv(Xkey):
         assert self.network, "unknown xprv prefix"
         assert self.payload[45] == 0, "invalid private key in xprv"
         self.key: PrivateKey = PrivateKey(self.key_bytes[1:], network=self.network)
+        self._public_key: Optional[PublicKey] = None
 
-    def ckd(self, index: Union[int, str, bytes]) -> "Xprv":
-        if isinstance(index, int):
-            index = index.to_bytes(4, "big")
-        elif isinstance(index, str):
-            index = bytes.fromhex(index)
-        assert len(index) == 4, "index should be a 4 bytes integer"
+    def _ckd(self, index: bytes) -> "Xprv":
+        hardened = index[0] >= 0x80
+        cache = Xkey.derivation_cache
+        if hardened and cache is not None:
+            payload = cache.get(self.payload, int.from_bytes(index, "big"))
+            if payload is not None:
+                return Xprv(payload)
 
         payload: bytes = self.prefix
         payload += (self.depth + 1).to_bytes(1, "big")
-        payload += self.key.public_key().hash160()[:4]
+        payload += self.identifier_fingerprint()
         payload += index
 
-        message: bytes = (self.key.public_key().serialize() if index[0] < 0x80 else self.key_bytes) + index
+        message: bytes = (self.key_bytes if hardened else self.public_key().serialize()) + index
         h: bytes = hmac.new(self.chain_code, message, sha512).digest()
         offset: int = int.from_bytes(h[:32], "big")
         child: PrivateKey = PrivateKey((self.key.int() + offset) % curve.n)
@@ -134,6 +174,8 @@ class Xprv(Xkey):
         payload += h[32:]
         payload += b"\x00" + child.serialize()
 
+        if hardened and cache is not None:
+            cache.put(self.payload, int.from_bytes(index, "big"), payload)
         return Xprv(payload)
 
     def xpub(self) -> Xpub:
@@ -143,10 +185,13 @@ class Xprv(Xkey):
         return self.key
 
     def public_key(self) -> PublicKey:
-        return self.key.public_key()
+        # the key pair is computed once, coincurve already holds the public key
+        if self._public_key is None:
+            self._public_key = PublicKey(self.key.key.public_key)
+        return self._public_key
 
     def address(self) -> str:
-        return self.key.address()
+        return self.public_key().address(network=self.network)
 
     @classmethod
     def from_seed(cls, seed: Union[str, bytes], network: Network = Network.MAINNET):
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+from typing import Optional
+
+from ..hash import sha256
+
+
+class DerivationCache:
+    """
+    Extended keys obtained by hardened derivation, kept in an SQLite file so that the account-level nodes of a
+    wallet are not derived again after a restart. Non-hardened children are cheap to derive from them and far too
+    many to store, they are only cached in memory.
+
+    The file holds extended private keys, protect it like the seed itself.
+
+    Example:
+        Xkey.derivation_cache = DerivationCache("derivations.sqlite")
+        account_xprv = ckd(master_xprv, "m/44'/0'/0'")
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS derivation ("
+                "parent BLOB NOT NULL, child_index INTEGER NOT NULL, child BLOB NOT NULL, "
+                "PRIMARY KEY (parent, child_index))"
+            )
+
+    def get(self, parent: bytes, index: int) -> Optional[bytes]:
+        """
+        :param parent: payload of the parent extended key
+        :returns: payload of its child at index, None when it was never stored
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT child FROM derivation WHERE parent = ? AND child_index = ?", (sha256(parent), index)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, parent: bytes, index: int, child: bytes) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO derivation VALUES (?, ?, ?)", (sha256(parent), index, child)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM derivation").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "DerivationCache":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,138 @@
+import hmac
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+
+from coincurve import PrivateKey as CcPrivateKey, PublicKey as CcPublicKey
+
+from .bip32 import Xprv, Xpub, step_to_index
+from ..constants import PROCESS_POOL_MAX_EXECUTORS
+from ..curve import curve
+from ..hash import hash160
+
+PUBLIC_KEY_LENGTH = 33
+HASH160_LENGTH = 20
+# indexes derived by one task of the process pool
+DERIVE_RANGE_CHUNK_SIZE = 10000
+
+# (parent public key, parent chain code, parent private key or None, start, end)
+_Chunk = Tuple[bytes, bytes, Optional[bytes], int, int]
+
+
+def _derive_chunk(job: _Chunk) -> Tuple[bytes, bytes]:
+    """
+    :returns: the concatenated compressed public keys and hash160s of the children in [start, end)
+    """
+    public_key, chain_code, private_key, start, end = job
+    parent_public_key = CcPublicKey(public_key)
+    parent_secret = int.from_bytes(private_key, "big") if private_key is not None else None
+    public_keys = bytearray()
+    hash160s = bytearray()
+    for i in range(start, end):
+        index = i.to_bytes(4, "big")
+        if i >= 0x80000000:
+            h = hmac.digest(chain_code, b"\x00" + private_key + index, "sha512")
+            secret = (parent_secret + int.from_bytes(h[:32], "big")) % curve.n
+            child = CcPrivateKey.from_int(secret).public_key.format()
+        else:
+            h = hmac.digest(chain_code, public_key + index, "sha512")
+            child = parent_public_key.add(h[:32]).format()
+        public_keys += child
+        hash160s += hash160(child)
+    return bytes(public_keys), bytes(hash160s)
+
+
+class DerivedKeys:
+    """
+    Public keys and hash160s of a range of children, as two flat byte strings rather than one object per child.
+
+    Example:
+        keys = derive_range(account_xpub, 0, 100000, change=0)
+        pkh = keys.hash160(42)  # hash160 of the child at index 42
+    """
+
+    def __init__(self, start: int, public_keys: bytes, hash160s: bytes):
+        self.start = start
+        # compressed public keys, 33 bytes each
+        self.public_keys = public_keys
+        # 20 bytes each
+        self.hash160s = hash160s
+
+    def public_key(self, index: int) -> bytes:
+        """
+        :returns: the compressed public key of the child at index
+        """
+        offset = self._position(index) * PUBLIC_KEY_LENGTH
+        return self.public_keys[offset : offset + PUBLIC_KEY_LENGTH]
+
+    def hash160(self, index: int) -> bytes:
+        offset = self._position(index) * HASH160_LENGTH
+        return self.hash160s[offset : offset + HASH160_LENGTH]
+
+    def _position(self, index: int) -> int:
+        position = index - self.start
+        if not 0 <= position < len(self):
+            raise IndexError(f"index {index} out of range [{self.start}, {self.start + len(self)})")
+        return position
+
+    def iter_public_keys(self) -> Iterator[bytes]:
+        for offset in range(0, len(self.public_keys), PUBLIC_KEY_LENGTH):
+            yield self.public_keys[offset : offset + PUBLIC_KEY_LENGTH]
+
+    def iter_hash160s(self) -> Iterator[bytes]:
+        for offset in range(0, len(self.hash160s), HASH160_LENGTH):
+            yield self.hash160s[offset : offset + HASH160_LENGTH]
+
+    def __len__(self) -> int:
+        return len(self.hash160s) // HASH160_LENGTH
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<DerivedKeys start={self.start} count={len(self)}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+def derive_range(
+    xkey: Union[Xprv, Xpub],
+    start: Union[str, int],
+    end: Union[str, int],
+    change: Optional[Union[str, int]] = None,
+    max_workers: int = PROCESS_POOL_MAX_EXECUTORS,
+    executor: Optional[Executor] = None,
+    chunk_size: int = DERIVE_RANGE_CHUNK_SIZE,
+) -> DerivedKeys:
+    """
+    Derive the public keys and hash160s of the children of xkey in [start, end), without building extended keys.
+
+    Chunks of chunk_size indexes are spread over a process pool, a range of a single chunk (or max_workers of 1) is
+    derived in the calling process. Hardened indexes need an Xprv, normal ones are derived from the public key alone.
+
+    :param change: optional step derived first, e.g. 0 for receiving and 1 for change addresses of a BIP44 account
+    :param max_workers: number of worker processes, defaults to PROCESS_POOL_MAX_EXECUTORS
+    :param executor: an existing executor to use instead of creating a process pool
+    """
+    start, end = step_to_index(start), step_to_index(end)
+    if start >= end:
+        raise ValueError("Invalid index range: start must be less than end")
+    if change is not None:
+        xkey = xkey.ckd(step_to_index(change))
+    private_key = None
+    if end > 0x80000000:
+        if not isinstance(xkey, Xprv):
+            raise ValueError("can't make hardened derivation from xpub")
+        private_key = xkey.key_bytes[1:]
+
+    jobs: List[_Chunk] = [
+        (xkey.public_key().serialize(), xkey.chain_code, private_key, i, min(i + chunk_size, end))
+        for i in range(start, end, chunk_size)
+    ]
+    if len(jobs) == 1 or (executor is None and max_workers == 1):
+        results = [_derive_chunk(job) for job in jobs]
+    elif executor is not None:
+        results = list(executor.map(_derive_chunk, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_derive_chunk, jobs))
+    return DerivedKeys(
+        start, b"".join(public_keys for public_keys, _ in results), b"".join(hash160s for _, hash160s in results)
+    )
@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .bip32 import Xprv, Xpub
+from .derive_range import DerivedKeys, derive_range
+from ..address_index import AddressIndex, electrumx_scripthash, p2pkh_locking_script
+from ..constants import Network
+
+# unused addresses in a row after which a chain is considered exhausted, as in BIP44
+BIP44_GAP_LIMIT = 20
+# addresses derived and looked up together
+DISCOVERY_BATCH_SIZE = 500
+
+
+class HistoryBackend(ABC):
+    """
+    Tells which addresses have a transaction history, looked up by their ElectrumX script hash.
+    """
+
+    @abstractmethod
+    def used(self, scripthashes: List[str]) -> List[bool]:
+        """
+        :returns: whether each script hash has any history, in order
+        """
+
+
+class LocalHistory(HistoryBackend):
+    """
+    History backend over a set of script hashes known to be used, e.g. exported from a local address index.
+    """
+
+    def __init__(self, scripthashes: Iterable[str] = ()):
+        self.scripthashes: Set[str] = set(scripthashes)
+
+    def add(self, scripthashes: Iterable[str]) -> None:
+        self.scripthashes.update(scripthashes)
+
+    def used(self, scripthashes: List[str]) -> List[bool]:
+        return [scripthash in self.scripthashes for scripthash in scripthashes]
+
+
+class ChainDiscovery:
+    """
+    Outcome of the scan of one chain of an account, 0 for receiving and 1 for change addresses.
+    """
+
+    def __init__(self, chain: int, used: List[int], scanned: int):
+        self.chain = chain
+        # indexes of the addresses with history, in order
+        self.used = used
+        # number of addresses derived and looked up
+        self.scanned = scanned
+
+    @property
+    def next_index(self) -> int:
+        """
+        :returns: index of the first address after the last used one
+        """
+        return self.used[-1] + 1 if self.used else 0
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<ChainDiscovery chain={self.chain} used={len(self.used)} next_index={self.next_index}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class AccountDiscovery:
+    """
+    Outcome of GapLimitScanner.scan(), the used addresses of every chain are in index with paths like "0/12".
+    """
+
+    def __init__(self, chains: Dict[int, ChainDiscovery], index: AddressIndex):
+        self.chains = chains
+        self.index = index
+
+    @property
+    def used(self) -> bool:
+        return any(chain.used for chain in self.chains.values())
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<AccountDiscovery chains={list(self.chains.values())}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class GapLimitScanner:
+    """
+    Discovers the used addresses of an account, chain after chain, until gap_limit unused addresses in a row.
+
+    Addresses are derived from the account extended public key in batches of batch_size, without building extended
+    keys, and each batch is looked up with a single backend call. The next batch is derived on a worker thread while
+    the backend answers for the current one.
+
+    Example:
+        account_xpub = Xpub.from_xprv(bip44_derive_xprv_from_mnemonic(mnemonic))
+        discovery = GapLimitScanner(account_xpub, LocalHistory(scripthashes)).scan()
+        receiving = discovery.chains[0].next_index
+    """
+
+    def __init__(
+        self,
+        xkey: Xpub,
+        backend: HistoryBackend,
+        gap_limit: int = BIP44_GAP_LIMIT,
+        batch_size: int = DISCOVERY_BATCH_SIZE,
+        chains: Sequence[int] = (0, 1),
+        network: Optional[Network] = None,
+    ):
+        """
+        :param xkey: account extended key, an Xprv is scanned through its Xpub
+        :param network: network of the addresses, by default the network of xkey
+        """
+        if gap_limit < 1 or batch_size < 1:
+            raise ValueError("gap_limit and batch_size must be positive")
+        self.xpub = Xpub.from_xprv(xkey) if isinstance(xkey, Xprv) else xkey
+        self.backend = backend
+        self.gap_limit = gap_limit
+        self.batch_size = batch_size
+        self.chains = list(chains)
+        self.network = network or self.xpub.network
+
+    def scan(self) -> AccountDiscovery:
+        index = AddressIndex(self.network)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            chains = {chain: self._scan_chain(chain, index, executor) for chain in self.chains}
+        return AccountDiscovery(chains, index)
+
+    def _scan_chain(self, chain: int, index: AddressIndex, executor: ThreadPoolExecutor) -> ChainDiscovery:
+        chain_xpub = self.xpub.ckd(chain)
+        used: List[int] = []
+        start = 0
+        pending: Future = executor.submit(derive_range, chain_xpub, start, start + self.batch_size, max_workers=1)
+        while True:
+            keys: DerivedKeys = pending.result()
+            end = start + len(keys)
+            # derive ahead while the backend answers, the gap is unlikely to close within this batch
+            pending = executor.submit(derive_range, chain_xpub, end, end + self.batch_size, max_workers=1)
+            hash160s = list(keys.iter_hash160s())
+            history = self.backend.used([electrumx_scripthash(p2pkh_locking_script(h)) for h in hash160s])
+            batch_used = [i for i, is_used in enumerate(history) if is_used]
+            if batch_used:
+                index.add_hash160s([hash160s[i] for i in batch_used], [f"{chain}/{start + i}" for i in batch_used])
+                used.extend(start + i for i in batch_used)
+            start = end
+            if end - (used[-1] + 1 if used else 0) >= self.gap_limit:
+                pending.cancel()
+                return ChainDiscovery(chain, used, end)
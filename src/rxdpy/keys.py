@@ -1,19 +1,48 @@
 import hashlib
 import hmac
 from base64 import b64encode, b64decode
-from typing import Optional, Union, Callable, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Union, Callable, Tuple, Dict, List, Sequence
 
 from coincurve import PrivateKey as CcPrivateKey, PublicKey as CcPublicKey
 
 from .aes_cbc import aes_decrypt_with_iv, aes_encrypt_with_iv
 from .base58 import base58check_encode
+from .cache import LRUCache, SignatureCache
 from .constants import Network, NETWORK_ADDRESS_PREFIX_DICT, NETWORK_WIF_PREFIX_DICT, PUBLIC_KEY_COMPRESSED_PREFIX_LIST
+from .constants import SIGNATURE_CACHE_SIZE, THREAD_POOL_MAX_EXECUTORS, PUBLIC_KEY_CACHE_SIZE
 from .curve import Point
 from .curve import curve, curve_multiply as curve_multiply, curve_add as curve_add
 from .hash import hash160, hash256, hmac_sha256
 from .utils import decode_wif, text_digest, stringify_ecdsa_recoverable, unstringify_ecdsa_recoverable
 from .utils import deserialize_ecdsa_recoverable, serialize_ecdsa_der
 
+# valid signatures seen by PublicKey.verify and script validation, resize it with SIGNATURE_CACHE.resize()
+SIGNATURE_CACHE = SignatureCache(SIGNATURE_CACHE_SIZE)
+
+# parsed public keys shared by PublicKey.intern(), keyed by their serialization
+PUBLIC_KEY_CACHE = LRUCache(PUBLIC_KEY_CACHE_SIZE)
+
+# below this many signatures left to verify, verify_batch() does not bother with worker threads
+VERIFY_BATCH_PARALLEL_THRESHOLD = 16
+
+
+def _verify_chunk(jobs: List[Tuple[CcPublicKey, bytes, bytes]]) -> List[bool]:
+    results = []
+    for key, signature, digest in jobs:
+        try:
+            results.append(key.verify(signature, digest, None))
+        except ValueError:
+            # malformed DER signature
+            results.append(False)
+    return results
+
+
+def _verify_chunks(executor: Executor, jobs: List[Tuple[CcPublicKey, bytes, bytes]], workers: int) -> List[bool]:
+    size = -(-len(jobs) // max(workers, 1))
+    chunks = [jobs[i : i + size] for i in range(0, len(jobs), size)]
+    return [valid for chunk in executor.map(_verify_chunk, chunks) for valid in chunk]
+
 
 class PublicKey:
     def __init__(self, public_key: Union[str, bytes, Point, CcPublicKey]):
@@ -39,13 +68,37 @@ class PublicKey:
             # here we have serialized public key in bytes
             self.key: CcPublicKey = CcPublicKey(pk)
             self.compressed: bool = pk[:1] in PUBLIC_KEY_COMPRESSED_PREFIX_LIST
+        # serializations, hashes and addresses computed so far, keyed by format (and network)
+        self._derived: Dict[tuple, Union[bytes, str]] = {}
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get("_interned"):
+            raise AttributeError("interned public keys are shared and can't be modified")
+        super().__setattr__(name, value)
+
+    @classmethod
+    def intern(cls, public_key: Union[str, bytes]) -> "PublicKey":
+        """
+        :returns: the shared PublicKey parsed from the serialized public key, parsed only when it is not among
+            the PUBLIC_KEY_CACHE_SIZE keys used last. Interned keys can't be modified.
+        """
+        pk: bytes = bytes.fromhex(public_key) if isinstance(public_key, str) else bytes(public_key)
+        key = PUBLIC_KEY_CACHE.get(pk)
+        if key is None:
+            key = cls(pk)
+            key._interned = True
+            PUBLIC_KEY_CACHE.put(pk, key)
+        return key
 
     def point(self) -> Point:
         return Point(*self.key.point())
 
     def serialize(self, compressed: Optional[bool] = None) -> bytes:
         compressed = self.compressed if compressed is None else compressed
-        return self.key.format(compressed)
+        serialized = self._derived.get((compressed,))
+        if serialized is None:
+            serialized = self._derived[(compressed,)] = self.key.format(compressed)
+        return serialized
 
     def hex(self, compressed: Optional[bool] = None) -> str:
         return self.serialize(compressed).hex()
@@ -54,7 +107,11 @@ class PublicKey:
         """
         :returns: public key hash corresponding to this public key
         """
-        return hash160(self.serialize(compressed))
+        compressed = self.compressed if compressed is None else compressed
+        h = self._derived.get((compressed, "hash160"))
+        if h is None:
+            h = self._derived[(compressed, "hash160")] = hash160(self.serialize(compressed))
+        return h
 
     hash = hash160
 
@@ -62,13 +119,85 @@ class PublicKey:
         """
         :returns: P2PKH address corresponding to this public key
         """
-        return base58check_encode(NETWORK_ADDRESS_PREFIX_DICT.get(network) + self.hash160(compressed))
+        compressed = self.compressed if compressed is None else compressed
+        address = self._derived.get((compressed, network))
+        if address is None:
+            address = base58check_encode(NETWORK_ADDRESS_PREFIX_DICT.get(network) + self.hash160(compressed))
+            self._derived[(compressed, network)] = address
+        return address
 
     def verify(self, signature: bytes, message: bytes, hasher: Optional[Callable[[bytes], bytes]] = hash256) -> bool:
         """
         verify serialized ECDSA signature in bitcoin strict DER (low-s) format
         """
-        return self.key.verify(signature, message, hasher)
+        return self.verify_digest(signature, hasher(message) if hasher else message)
+
+    def verify_digest(self, signature: bytes, digest: bytes, check_cache: bool = True) -> bool:
+        """
+        verify serialized ECDSA signature of a 32-byte digest, signatures found valid are kept in SIGNATURE_CACHE
+        :param check_cache: if False then skip the lookup, for callers which already looked the signature up
+        """
+        public_key = self.serialize()
+        if check_cache and SIGNATURE_CACHE.contains(digest, public_key, signature):
+            return True
+        valid = self.key.verify(signature, digest, None)
+        if valid:
+            SIGNATURE_CACHE.add(digest, public_key, signature)
+        return valid
+
+    @staticmethod
+    def verify_batch(
+        items: Sequence[Tuple[Union[bytes, "PublicKey"], bytes, bytes]],
+        max_workers: int = THREAD_POOL_MAX_EXECUTORS,
+        executor: Optional[Executor] = None,
+    ) -> List[bool]:
+        """
+        verify many serialized ECDSA signatures of 32-byte digests at once
+        :param items: (public key, signature, digest) triples, the public key serialized or a PublicKey
+        :param max_workers: number of worker threads, 1 to verify in the calling thread
+        :param executor: an existing executor to use instead of creating a thread pool
+        :returns: whether each signature is valid, in the order of the items
+
+        Signatures already in SIGNATURE_CACHE are not verified again, each distinct public key is interned once,
+        and the remaining signatures are split over the workers. coincurve releases the GIL while verifying.
+        Malformed public keys and signatures are reported as invalid instead of raising.
+        """
+        results = [False] * len(items)
+        keys: Dict[bytes, Optional[CcPublicKey]] = {}
+        pending: List[int] = []
+        jobs: List[Tuple[CcPublicKey, bytes, bytes]] = []
+        for i, (public_key, signature, digest) in enumerate(items):
+            if isinstance(public_key, PublicKey):
+                public_key = public_key.serialize()
+            if SIGNATURE_CACHE.contains(digest, public_key, signature):
+                results[i] = True
+                continue
+            if public_key not in keys:
+                try:
+                    keys[public_key] = PublicKey.intern(public_key).key
+                except ValueError:
+                    keys[public_key] = None
+            key = keys[public_key]
+            if key is not None:
+                pending.append(i)
+                jobs.append((key, signature, digest))
+
+        if executor is not None and len(jobs) > 1:
+            verified = _verify_chunks(executor, jobs, max_workers)
+        elif max_workers > 1 and len(jobs) >= VERIFY_BATCH_PARALLEL_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                verified = _verify_chunks(pool, jobs, max_workers)
+        else:
+            verified = _verify_chunk(jobs)
+
+        for i, valid in zip(pending, verified):
+            if valid:
+                public_key, signature, digest = items[i]
+                if isinstance(public_key, PublicKey):
+                    public_key = public_key.serialize()
+                SIGNATURE_CACHE.add(digest, public_key, signature)
+                results[i] = True
+        return results
 
     def verify_recoverable(
         self, signature: bytes, message: bytes, hasher: Optional[Callable[[bytes], bytes]] = hash256
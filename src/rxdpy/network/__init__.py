@@ -0,0 +1,9 @@
+from .electrumx import (
+    ElectrumXClient,
+    ElectrumXConnection,
+    ElectrumXError,
+    ElectrumXHistory,
+    address_scripthash,
+)
+from .electrumx_stub import ElectrumXStub
+from .utxo_cache import Utxo, UtxoCache
@@ -0,0 +1,332 @@
+import asyncio
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from websockets.asyncio.client import ClientConnection, connect
+
+from ..address_index import electrumx_scripthash, p2pkh_locking_script
+from ..constants import HTTP_REQUEST_TIMEOUT
+from ..hd.discovery import HistoryBackend
+from ..utils import decode_address
+
+ELECTRUMX_POOL_SIZE = 4
+# requests awaiting their response on one connection, further requests wait for a slot
+ELECTRUMX_MAX_IN_FLIGHT = 256
+# requests sent in one JSON-RPC batch
+ELECTRUMX_BATCH_SIZE = 100
+ELECTRUMX_MAX_MESSAGE_SIZE = 32 * 1024 * 1024
+
+Call = Tuple[str, Sequence[Any]]
+# called with the params of every notification of a method
+NotificationHandler = Callable[[List[Any]], None]
+
+
+class ElectrumXError(Exception):
+    """
+    Error returned by the server for one request.
+    """
+
+    def __init__(self, code: Optional[int], message: str):
+        super().__init__(f"ElectrumX error {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+def _result(response: Dict[str, Any]) -> Any:
+    error = response.get("error")
+    if error is not None:
+        if isinstance(error, dict):
+            return ElectrumXError(error.get("code"), str(error.get("message")))
+        return ElectrumXError(None, str(error))
+    return response.get("result")
+
+
+class ElectrumXConnection:
+    """
+    One websocket to an ElectrumX server, shared by concurrent requests.
+
+    Requests are matched to their responses by id, so any number of them can wait on the connection at the same
+    time, up to max_in_flight. A single reader task dispatches responses and notifications.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = HTTP_REQUEST_TIMEOUT,
+        max_in_flight: int = ELECTRUMX_MAX_IN_FLIGHT,
+        notification_handlers: Optional[Dict[str, List[NotificationHandler]]] = None,
+        disconnect_handlers: Optional[List[Callable[[], None]]] = None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.notification_handlers = notification_handlers if notification_handlers is not None else {}
+        # called when the connection is lost, not when it is closed by close()
+        self.disconnect_handlers = disconnect_handlers if disconnect_handlers is not None else []
+        self._closing = False
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.max_in_flight = max_in_flight
+        # created on first use, in the event loop the connection runs in
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._connecting: Optional[asyncio.Lock] = None
+        self._acquiring: Optional[asyncio.Lock] = None
+        self._websocket: Optional[ClientConnection] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def connected(self) -> bool:
+        return self._reader is not None and not self._reader.done()
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    async def connect(self) -> None:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self.connected:
+                return
+            self._websocket = await asyncio.wait_for(
+                connect(self.url, max_size=ELECTRUMX_MAX_MESSAGE_SIZE, open_timeout=None), self.timeout
+            )
+            self._reader = asyncio.ensure_future(self._read(self._websocket))
+
+    async def _read(self, websocket: ClientConnection) -> None:
+        error: Exception = ConnectionError(f"connection to {self.url} closed")
+        try:
+            async for message in websocket:
+                payload = json.loads(message)
+                for response in payload if isinstance(payload, list) else [payload]:
+                    self._dispatch(response)
+        except Exception as e:
+            error = ConnectionError(f"connection to {self.url} lost: {e}")
+        finally:
+            # requests still waiting will never be answered
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            if not self._closing:
+                for handler in self.disconnect_handlers:
+                    handler()
+
+    def _dispatch(self, response: Dict[str, Any]) -> None:
+        if "id" not in response and "method" in response:
+            for handler in self.notification_handlers.get(response["method"], []):
+                handler(response.get("params") or [])
+            return
+        future = self._pending.pop(response.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    async def _send(self, calls: Sequence[Call], batch: bool) -> List[Any]:
+        if not self.connected:
+            await self.connect()
+        loop = asyncio.get_running_loop()
+        requests = []
+        futures = []
+        for method, params in calls:
+            request_id = next(self._ids)
+            future = loop.create_future()
+            self._pending[request_id] = future
+            futures.append(future)
+            requests.append({"jsonrpc": "2.0", "method": method, "params": list(params), "id": request_id})
+        try:
+            await self._websocket.send(json.dumps(requests if batch else requests[0]))
+            responses = await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        finally:
+            for request in requests:
+                self._pending.pop(request["id"], None)
+        return [_result(response) for response in responses]
+
+    async def request(self, method: str, *params: Any) -> Any:
+        """
+        :returns: the result of the request
+        :raises ElectrumXError: when the server answers with an error
+        """
+        async with self.slots:
+            result = (await self._send([(method, params)], batch=False))[0]
+        if isinstance(result, ElectrumXError):
+            raise result
+        return result
+
+    async def batch(self, calls: Sequence[Call]) -> List[Any]:
+        """
+        Sends the calls as one JSON-RPC batch.
+
+        :returns: the result of each call in order, an ElectrumXError instance in place of the result of a failed call
+        """
+        if not calls:
+            return []
+        if len(calls) > self.max_in_flight:
+            raise ValueError(f"a batch holds at most {self.max_in_flight} calls")
+        if self._acquiring is None:
+            self._acquiring = asyncio.Lock()
+        # a batch takes one slot per call, batches waiting together must not each hold part of the slots
+        async with self._acquiring:
+            for _ in calls:
+                await self.slots.acquire()
+        try:
+            return await self._send(calls, batch=True)
+        finally:
+            for _ in calls:
+                self.slots.release()
+
+    async def close(self) -> None:
+        self._closing = True
+        try:
+            if self._websocket is not None:
+                await self._websocket.close()
+            if self._reader is not None:
+                await asyncio.gather(self._reader, return_exceptions=True)
+        finally:
+            self._closing = False
+
+
+class ElectrumXClient:
+    """
+    Pool of connections to an ElectrumX server.
+
+    Connections are opened on first use and reused, each request goes to the connection with the fewest requests in
+    flight. batch() splits a large number of calls into JSON-RPC batches of batch_size spread over the pool.
+
+    Example:
+        async with ElectrumXClient("wss://electrumx.example:50022/") as client:
+            utxos = await client.listunspent_many(scripthashes)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = ELECTRUMX_POOL_SIZE,
+        timeout: float = HTTP_REQUEST_TIMEOUT,
+        max_in_flight: int = ELECTRUMX_MAX_IN_FLIGHT,
+        batch_size: int = ELECTRUMX_BATCH_SIZE,
+    ):
+        """
+        :param timeout: seconds to wait for a connection or a response, defaults to HTTP_REQUEST_TIMEOUT
+        :param max_in_flight: requests awaiting a response per connection before further requests wait
+        """
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = min(batch_size, max_in_flight)
+        self.notification_handlers: Dict[str, List[NotificationHandler]] = {}
+        self.disconnect_handlers: List[Callable[[], None]] = []
+        self.connections = [
+            ElectrumXConnection(url, timeout, max_in_flight, self.notification_handlers, self.disconnect_handlers)
+            for _ in range(pool_size)
+        ]
+        self._rotation = 0
+
+    def _connection(self) -> ElectrumXConnection:
+        # the least busy connection, ties rotate so that a burst of requests is spread over the pool
+        self._rotation = (self._rotation + 1) % len(self.connections)
+        candidates = self.connections[self._rotation :] + self.connections[: self._rotation]
+        return min(candidates, key=lambda connection: connection.in_flight)
+
+    def on_notification(self, method: str, handler: NotificationHandler) -> None:
+        """
+        calls handler with the params of every notification of method, e.g. "blockchain.scripthash.subscribe"
+        """
+        self.notification_handlers.setdefault(method, []).append(handler)
+
+    def on_disconnect(self, handler: Callable[[], None]) -> None:
+        """
+        calls handler whenever a connection of the pool is lost, the subscriptions made on it are lost with it
+        """
+        self.disconnect_handlers.append(handler)
+
+    async def request(self, method: str, *params: Any) -> Any:
+        return await self._connection().request(method, *params)
+
+    async def batch(self, calls: Iterable[Call]) -> List[Any]:
+        """
+        :returns: the result of each call in order, an ElectrumXError instance in place of the result of a failed call
+        """
+        calls = list(calls)
+        chunks = [calls[i : i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        results = await asyncio.gather(*[self._connection().batch(chunk) for chunk in chunks])
+        return [result for chunk in results for result in chunk]
+
+    async def _batch_strict(self, method: str, params: Iterable[Sequence[Any]]) -> List[Any]:
+        results = await self.batch((method, p) for p in params)
+        for result in results:
+            if isinstance(result, ElectrumXError):
+                raise result
+        return results
+
+    async def relay_fee(self) -> int:
+        """
+        :returns: minimum relay fee in satoshis per kilobyte
+        """
+        return round(await self.request("blockchain.relayfee") * 1e8)
+
+    async def listunspent(self, scripthash: str) -> List[Dict[str, Any]]:
+        return await self.request("blockchain.scripthash.listunspent", scripthash)
+
+    async def listunspent_many(self, scripthashes: Iterable[str]) -> List[List[Dict[str, Any]]]:
+        return await self._batch_strict("blockchain.scripthash.listunspent", ([s] for s in scripthashes))
+
+    async def get_history_many(self, scripthashes: Iterable[str]) -> List[List[Dict[str, Any]]]:
+        return await self._batch_strict("blockchain.scripthash.get_history", ([s] for s in scripthashes))
+
+    async def subscribe_many(self, scripthashes: Iterable[str]) -> List[Optional[str]]:
+        """
+        :returns: status of each script hash, None for a script hash without history. Status changes are notified as
+            "blockchain.scripthash.subscribe" with params [scripthash, status]
+        """
+        return await self._batch_strict("blockchain.scripthash.subscribe", ([s] for s in scripthashes))
+
+    async def get_transaction(self, txid: str) -> str:
+        return await self.request("blockchain.transaction.get", txid)
+
+    async def broadcast(self, raw: Union[str, bytes]) -> str:
+        """
+        :returns: txid of the transaction accepted by the server
+        """
+        return await self.request("blockchain.transaction.broadcast", raw if isinstance(raw, str) else raw.hex())
+
+    async def close(self) -> None:
+        await asyncio.gather(*[connection.close() for connection in self.connections])
+
+    async def __aenter__(self) -> "ElectrumXClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+def address_scripthash(address: str) -> str:
+    """
+    :returns: ElectrumX script hash of the P2PKH address
+    """
+    return electrumx_scripthash(p2pkh_locking_script(decode_address(address)[0]))
+
+
+class ElectrumXHistory(HistoryBackend):
+    """
+    History backend of GapLimitScanner querying an ElectrumX server.
+
+    The scanner is synchronous, it runs in a thread while the client lives on the event loop given here.
+
+    Example:
+        async with ElectrumXClient(url) as client:
+            scanner = GapLimitScanner(xpub, ElectrumXHistory(client, asyncio.get_running_loop()))
+            discovery = await asyncio.get_running_loop().run_in_executor(None, scanner.scan)
+    """
+
+    def __init__(self, client: ElectrumXClient, loop: asyncio.AbstractEventLoop):
+        self.client = client
+        self.loop = loop
+
+    def used(self, scripthashes: List[str]) -> List[bool]:
+        future = asyncio.run_coroutine_threadsafe(self.client.get_history_many(scripthashes), self.loop)
+        return [bool(history) for history in future.result()]
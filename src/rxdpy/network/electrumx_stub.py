@@ -0,0 +1,169 @@
+import asyncio
+import inspect
+import json
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+from .electrumx import ELECTRUMX_MAX_MESSAGE_SIZE, ElectrumXError
+from ..hash import hash256, sha256
+
+# called with the params of a request, returns its result or an awaitable of it, raises ElectrumXError to fail it
+Handler = Callable[..., Any]
+
+
+class ElectrumXStub:
+    """
+    ElectrumX server on localhost answering from memory, to test clients without a network.
+
+    unspent, history and transactions hold what the blockchain.* methods return, broadcast transactions are added to
+    transactions. update() changes a script hash and notifies its subscribers. Any method can be answered by a handler
+    of its own, a coroutine handler answers after the requests that arrived later when it awaits.
+
+    Example:
+        async with ElectrumXStub() as stub:
+            stub.unspent[scripthash] = [{"tx_hash": txid, "tx_pos": 0, "height": 1, "value": 1000}]
+            async with ElectrumXClient(stub.url) as client:
+                utxos = await client.listunspent(scripthash)
+    """
+
+    def __init__(self, handlers: Optional[Dict[str, Handler]] = None, host: str = "127.0.0.1", relay_fee: float = 0.01):
+        self.host = host
+        self.relay_fee = relay_fee
+        self.unspent: Dict[str, List[Dict[str, Any]]] = {}
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+        self.transactions: Dict[str, str] = {}
+        self.handlers: Dict[str, Handler] = {
+            "server.version": lambda *params: ["ElectrumXStub", "1.4"],
+            "server.ping": lambda: None,
+            "blockchain.relayfee": lambda: self.relay_fee,
+            "blockchain.scripthash.listunspent": lambda scripthash: self.unspent.get(scripthash, []),
+            "blockchain.scripthash.get_history": lambda scripthash: self.history.get(scripthash, []),
+            "blockchain.scripthash.subscribe": self.status,
+            "blockchain.transaction.get": self._get_transaction,
+            "blockchain.transaction.broadcast": self._broadcast,
+        }
+        self.handlers.update(handlers or {})
+        # (method, params) of every request received
+        self.requests: List[Tuple[str, List[Any]]] = []
+        # websocket messages received, a batch is one message
+        self.messages = 0
+        self.connections = 0
+        self._websockets: Set[ServerConnection] = set()
+        self._server: Optional[Server] = None
+        self.url: Optional[str] = None
+
+    def status(self, scripthash: str) -> Optional[str]:
+        """
+        :returns: status of the script hash, it changes whenever its history or unspent outputs change
+        """
+        history = self.history.get(scripthash, [])
+        unspent = self.unspent.get(scripthash, [])
+        if not history and not unspent:
+            return None
+        return sha256(json.dumps([history, unspent], sort_keys=True).encode()).hex()
+
+    async def update(
+        self,
+        scripthash: str,
+        unspent: Optional[List[Dict[str, Any]]] = None,
+        history: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        replaces the unspent outputs and/or history of the script hash and notifies its new status
+        """
+        if unspent is not None:
+            self.unspent[scripthash] = unspent
+        if history is not None:
+            self.history[scripthash] = history
+        await self.notify("blockchain.scripthash.subscribe", [scripthash, self.status(scripthash)])
+
+    def _get_transaction(self, txid: str) -> str:
+        if txid not in self.transactions:
+            raise ElectrumXError(2, f"unknown transaction {txid}")
+        return self.transactions[txid]
+
+    def _broadcast(self, raw: str) -> str:
+        try:
+            txid = hash256(bytes.fromhex(raw))[::-1].hex()
+        except ValueError:
+            raise ElectrumXError(1, "the transaction was rejected by network rules.\n\nTX decode failed")
+        self.transactions[txid] = raw
+        return txid
+
+    async def start(self) -> str:
+        """
+        :returns: url of the server, listening on a free port
+        """
+        self._server = await serve(self._serve, self.host, 0, max_size=ELECTRUMX_MAX_MESSAGE_SIZE)
+        port = next(iter(self._server.sockets)).getsockname()[1]
+        self.url = f"ws://{self.host}:{port}/"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def notify(self, method: str, params: List[Any]) -> None:
+        """
+        sends a notification to every connected client
+        """
+        message = json.dumps({"jsonrpc": "2.0", "method": method, "params": params})
+        await asyncio.gather(*[websocket.send(message) for websocket in self._websockets], return_exceptions=True)
+
+    async def drop_connections(self) -> None:
+        """
+        closes every client connection, as a server restart would
+        """
+        await asyncio.gather(*[websocket.close() for websocket in list(self._websockets)], return_exceptions=True)
+
+    async def _serve(self, websocket: ServerConnection) -> None:
+        self.connections += 1
+        self._websockets.add(websocket)
+        tasks = set()
+        try:
+            async for message in websocket:
+                self.messages += 1
+                # answered concurrently, responses go out in the order they are ready
+                task = asyncio.ensure_future(self._answer(websocket, message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            self._websockets.discard(websocket)
+
+    async def _answer(self, websocket: ServerConnection, message: str) -> None:
+        payload = json.loads(message)
+        if isinstance(payload, list):
+            response = await asyncio.gather(*[self._call(request) for request in payload])
+        else:
+            response = await self._call(payload)
+        try:
+            await websocket.send(json.dumps(response))
+        except Exception:  # pragma: no cover
+            # the client went away
+            pass
+
+    async def _call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = request.get("method"), request.get("params") or []
+        self.requests.append((method, params))
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        handler = self.handlers.get(method)
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"unknown method {method}"}
+            return response
+        try:
+            result = handler(*params)
+            if inspect.isawaitable(result):
+                result = await result
+            response["result"] = result
+        except ElectrumXError as e:
+            response["error"] = {"code": e.code, "message": e.message}
+        return response
+
+    async def __aenter__(self) -> "ElectrumXStub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
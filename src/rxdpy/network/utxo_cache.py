@@ -0,0 +1,206 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from .electrumx import ElectrumXClient, address_scripthash
+from ..address_index import electrumx_scripthash, p2pkh_locking_script
+from ..script.script import Script
+from ..utils import decode_address
+from ..utxo import Outpoint, Utxo
+
+SUBSCRIBE_METHOD = "blockchain.scripthash.subscribe"
+
+
+class UtxoCache:
+    """
+    Unspent outputs of watched script hashes, kept in memory and up to date through ElectrumX subscriptions.
+
+    watch() subscribes to the script hashes and lists their unspent outputs once. Afterwards a script hash is listed
+    again only when the server notifies a new status for it, the notifications arriving together being refreshed in
+    one batch. Transactions sent with broadcast() take effect at once: the outputs they spend are no longer served and
+    their outputs to watched script hashes are served as unconfirmed, before the server notifies anything.
+
+    When a connection is lost its subscriptions are lost with it, every script hash is subscribed again and the ones
+    whose status changed meanwhile are refreshed.
+
+    Example:
+        async with ElectrumXClient(url) as client:
+            cache = UtxoCache(client)
+            await cache.watch_addresses([address])
+            inputs = [utxo.to_input(P2PKH().unlock(private_key)) for utxo in cache.utxos()]
+    """
+
+    def __init__(self, client: ElectrumXClient):
+        self.client = client
+        self._status: Dict[str, Optional[str]] = {}
+        self._locking_scripts: Dict[str, bytes] = {}
+        self._utxos: Dict[str, Dict[Outpoint, Utxo]] = {}
+        # script hash of every output in _utxos
+        self._owners: Dict[Outpoint, str] = {}
+        # outputs spent by our broadcasts that the server may still list, with their script hash
+        self._spent: Dict[Outpoint, str] = {}
+        self._dirty: Set[str] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._resubscribe_task: Optional[asyncio.Task] = None
+        # error of the last background refresh, None once a refresh succeeds
+        self.error: Optional[Exception] = None
+        client.on_notification(SUBSCRIBE_METHOD, self._on_status)
+        client.on_disconnect(self._on_disconnect)
+
+    async def watch(
+        self, scripthashes: Iterable[str], locking_scripts: Optional[Iterable[Union[bytes, Script]]] = None
+    ) -> None:
+        """
+        subscribes to the script hashes and lists the unspent outputs of the ones with history
+
+        :param locking_scripts: optional locking script of each script hash, set on its Utxo objects
+        """
+        scripthashes = list(scripthashes)
+        if locking_scripts is not None:
+            for scripthash, script in zip(scripthashes, locking_scripts):
+                self._locking_scripts[scripthash] = script.serialize() if isinstance(script, Script) else script
+        statuses = await self.client.subscribe_many(scripthashes)
+        changed = []
+        for scripthash, status in zip(scripthashes, statuses):
+            if scripthash in self._status and self._status[scripthash] == status:
+                continue
+            self._status[scripthash] = status
+            changed.append(scripthash)
+        await self.refresh(changed)
+
+    async def watch_scripts(self, locking_scripts: Iterable[Union[bytes, Script]]) -> None:
+        locking_scripts = list(locking_scripts)
+        await self.watch([electrumx_scripthash(script) for script in locking_scripts], locking_scripts)
+
+    async def watch_addresses(self, addresses: Iterable[str]) -> None:
+        """
+        watches P2PKH addresses
+        """
+        await self.watch_scripts(p2pkh_locking_script(decode_address(address)[0]) for address in addresses)
+
+    async def refresh(self, scripthashes: Iterable[str]) -> None:
+        """
+        lists the unspent outputs of the script hashes again, whatever their status
+        """
+        scripthashes = list(scripthashes)
+        # a script hash without history has no unspent output, no need to ask
+        listed = [scripthash for scripthash in scripthashes if self._status.get(scripthash) is not None]
+        for scripthash in scripthashes:
+            if self._status.get(scripthash) is None:
+                self._replace(scripthash, [])
+        if listed:
+            for scripthash, unspent in zip(listed, await self.client.listunspent_many(listed)):
+                self._replace(scripthash, unspent)
+
+    def _replace(self, scripthash: str, unspent: List[Dict[str, Any]]) -> None:
+        locking_script = self._locking_scripts.get(scripthash)
+        utxos = {}
+        for item in unspent:
+            utxo = Utxo(item["tx_hash"], item["tx_pos"], item["value"], item["height"], scripthash, locking_script)
+            utxos[utxo.outpoint] = utxo
+        for outpoint in self._utxos.get(scripthash, {}):
+            self._owners.pop(outpoint, None)
+        self._utxos[scripthash] = utxos
+        self._owners.update((outpoint, scripthash) for outpoint in utxos)
+        # the server has seen the spend once it no longer lists the output
+        for outpoint, spent_scripthash in list(self._spent.items()):
+            if spent_scripthash == scripthash and outpoint not in utxos:
+                del self._spent[outpoint]
+
+    def _on_status(self, params: List[Any]) -> None:
+        scripthash = params[0]
+        status = params[1] if len(params) > 1 else None
+        if scripthash not in self._status or self._status[scripthash] == status:
+            return
+        self._status[scripthash] = status
+        self._dirty.add(scripthash)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_dirty())
+
+    async def _refresh_dirty(self) -> None:
+        while self._dirty:
+            scripthashes = list(self._dirty)
+            self._dirty.clear()
+            try:
+                await self.refresh(scripthashes)
+                self.error = None
+            except Exception as e:
+                # refreshed again with the next notification or resubscription
+                self._dirty.update(scripthashes)
+                self.error = e
+                return
+
+    def _on_disconnect(self) -> None:
+        if self._status and (self._resubscribe_task is None or self._resubscribe_task.done()):
+            self._resubscribe_task = asyncio.ensure_future(self._resubscribe())
+
+    async def _resubscribe(self) -> None:
+        try:
+            await self.watch(list(self._status))
+            self.error = None
+        except Exception as e:
+            self.error = e
+
+    async def synced(self) -> None:
+        """
+        waits until the refreshes triggered by notifications or by a lost connection are done
+        """
+        for task in (self._resubscribe_task, self._refresh_task):
+            if task is not None:
+                await task
+
+    def mark_spent(self, tx) -> None:
+        """
+        applies a transaction sent to the network, its outputs to watched script hashes become unspent outputs
+        """
+        for tx_input in tx.inputs:
+            outpoint = (tx_input.source_txid, tx_input.source_output_index)
+            if outpoint in self._owners:
+                self._spent[outpoint] = self._owners[outpoint]
+        txid = tx.txid()
+        for index, tx_output in enumerate(tx.outputs):
+            scripthash = electrumx_scripthash(tx_output.locking_script)
+            if scripthash in self._status:
+                utxo = Utxo(txid, index, tx_output.satoshis, 0, scripthash, self._locking_scripts.get(scripthash))
+                self._utxos.setdefault(scripthash, {})[utxo.outpoint] = utxo
+                self._owners[utxo.outpoint] = scripthash
+
+    async def broadcast(self, tx) -> str:
+        """
+        :returns: txid of the transaction, whose spends are applied to the cache once the server accepted it
+        """
+        txid = await self.client.broadcast(tx.hex())
+        self.mark_spent(tx)
+        return txid
+
+    def utxos(self, scripthashes: Optional[Iterable[str]] = None, confirmed_only: bool = False) -> List[Utxo]:
+        """
+        :param scripthashes: script hashes whose outputs are returned, by default every watched one
+        :param confirmed_only: if True then leave out the outputs of unconfirmed transactions
+        :returns: the unspent outputs from memory, largest first
+        """
+        selected = []
+        for scripthash in self._utxos if scripthashes is None else scripthashes:
+            for outpoint, utxo in self._utxos.get(scripthash, {}).items():
+                if outpoint in self._spent or (confirmed_only and utxo.height <= 0):
+                    continue
+                selected.append(utxo)
+        return sorted(selected, key=lambda utxo: utxo.satoshis, reverse=True)
+
+    def address_utxos(self, address: str, confirmed_only: bool = False) -> List[Utxo]:
+        return self.utxos([address_scripthash(address)], confirmed_only)
+
+    def balance(self, scripthashes: Optional[Iterable[str]] = None) -> int:
+        return sum(utxo.satoshis for utxo in self.utxos(scripthashes))
+
+    @property
+    def watched(self) -> List[str]:
+        return list(self._status)
+
+    def __len__(self) -> int:
+        return len(self.utxos())
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<UtxoCache watched={len(self._status)} utxos={len(self)}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
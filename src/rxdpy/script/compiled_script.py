@@ -0,0 +1,170 @@
+from typing import List, Optional
+
+from .script import Script
+from ..cache import LRUCache
+from ..constants import OpCode, OPCODE_VALUE_NAME_DICT, COMPILED_SCRIPT_CACHE_SIZE
+from ..hash import sha256
+
+MAX_SCRIPT_ELEMENT_SIZE = 1024 * 1024 * 1024
+
+# opcode metadata indexed by opcode value
+OPCODE_NAMES: List[Optional[str]] = [OPCODE_VALUE_NAME_DICT.get(bytes([i])) for i in range(256)]
+# named opcodes and direct pushes of 1 to 75 bytes
+OPCODE_VALID: List[bool] = [
+    name is not None or 0x01 <= i < OpCode.OP_PUSHDATA1[0] for i, name in enumerate(OPCODE_NAMES)
+]
+OPCODE_DISABLED: List[bool] = [False] * 256
+for _opcode in (OpCode.OP_2MUL, OpCode.OP_2DIV, OpCode.OP_VERIF, OpCode.OP_VERNOTIF, OpCode.OP_VER):
+    OPCODE_DISABLED[_opcode[0]] = True
+
+# OP_DUP OP_HASH160 <20 bytes> OP_EQUALVERIFY OP_CHECKSIG
+_P2PKH_PREFIX = OpCode.OP_DUP + OpCode.OP_HASH160 + b"\x14"
+_P2PKH_SUFFIX = OpCode.OP_EQUALVERIFY + OpCode.OP_CHECKSIG
+
+_OP_PUSHDATA1 = OpCode.OP_PUSHDATA1[0]
+_OP_PUSHDATA4 = OpCode.OP_PUSHDATA4[0]
+_OP_16 = OpCode.OP_16[0]
+_OP_STATESEPARATOR = OpCode.OP_STATESEPARATOR[0]
+_OP_IF = OpCode.OP_IF[0]
+_OP_NOTIF = OpCode.OP_NOTIF[0]
+_OP_ELSE = OpCode.OP_ELSE[0]
+_OP_ENDIF = OpCode.OP_ENDIF[0]
+# fail even inside a branch that is not taken
+_OP_VERIF = OpCode.OP_VERIF[0]
+_OP_VERNOTIF = OpCode.OP_VERNOTIF[0]
+
+
+class CompiledScript:
+    """
+    A script decoded once into the arrays Spend executes: integer opcodes, the data pushed by each of them, and for
+    every OP_IF, OP_NOTIF and OP_ELSE the position of the matching OP_ELSE or OP_ENDIF, so that a branch which is not
+    taken is skipped in one jump rather than stepped through.
+
+    Compiled scripts are immutable and shared. compile() keeps the locking scripts seen last in an LRU cache keyed
+    by script hash, since most of them are a handful of templates.
+
+    Example:
+        program = CompiledScript.compile(P2PKH().lock(address))
+        opcodes = program.opcodes
+    """
+
+    cache = LRUCache(COMPILED_SCRIPT_CACHE_SIZE)
+
+    def __init__(self, script: Script):
+        self.script = script
+        self.bytecode: bytes = script.serialize()
+        chunks = script.chunks
+        self.opcodes: List[int] = [chunk.op[0] for chunk in chunks]
+        self.data: List[Optional[bytes]] = [chunk.data for chunk in chunks]
+        self.jumps: List[int] = self._jump_targets()
+        self._offsets: Optional[List[int]] = None
+        # public key hash when the script is the P2PKH template, which Spend validates without interpreting it
+        self.p2pkh_hash: Optional[bytes] = None
+        if len(self.bytecode) == 25 and self.bytecode[:3] == _P2PKH_PREFIX and self.bytecode[23:] == _P2PKH_SUFFIX:
+            self.p2pkh_hash = self.bytecode[3:23]
+
+    @classmethod
+    def compile(cls, script: Script) -> "CompiledScript":
+        """
+        :returns: the compiled form of the script, from the cache when the same script was compiled recently
+        """
+        key = sha256(script.serialize())
+        program = cls.cache.get(key)
+        if program is None:
+            program = cls(script)
+            cls.cache.put(key, program)
+        return program
+
+    def _jump_targets(self) -> List[int]:
+        """
+        :returns: for each position, where to continue when its branch is not taken, or -1
+        """
+        jumps = [-1] * len(self.opcodes)
+        # positions a jump must not skip, they raise whether the branch is taken or not
+        fatal = [0]
+        open_branches = []
+        for i, opcode in enumerate(self.opcodes):
+            data = self.data[i]
+            fatal.append(
+                fatal[-1]
+                + (
+                    not OPCODE_VALID[opcode]
+                    or opcode == _OP_VERIF
+                    or opcode == _OP_VERNOTIF
+                    or (data is not None and len(data) > MAX_SCRIPT_ELEMENT_SIZE)
+                )
+            )
+            if opcode == _OP_IF or opcode == _OP_NOTIF:
+                open_branches.append(i)
+            elif opcode == _OP_ELSE and open_branches:
+                jumps[open_branches[-1]] = i
+                open_branches[-1] = i
+            elif opcode == _OP_ENDIF and open_branches:
+                jumps[open_branches.pop()] = i
+        for i, target in enumerate(jumps):
+            if target != -1 and fatal[target] != fatal[i + 1]:
+                jumps[i] = -1
+        return jumps
+
+    def offsets(self) -> List[int]:
+        """
+        :returns: byte offset of each opcode in the bytecode, followed by the bytecode length
+        """
+        if self._offsets is None:
+            length = len(self.bytecode)
+            offsets = []
+            offset = 0
+            for opcode, data in zip(self.opcodes, self.data):
+                offsets.append(offset)
+                offset += 1
+                if _OP_PUSHDATA1 <= opcode <= _OP_PUSHDATA4:
+                    # length prefix of 1, 2 or 4 bytes, possibly truncated
+                    offset = min(offset + (1 << (opcode - _OP_PUSHDATA1)), length)
+                if data is not None:
+                    offset += len(data)
+            offsets.append(offset)
+            self._offsets = offsets
+        return self._offsets
+
+    def bytecode_after(self, position: Optional[int]) -> bytes:
+        """
+        :returns: the bytecode following the opcode at the given position, the whole bytecode for None
+        """
+        if position is None:
+            return self.bytecode
+        return self.bytecode[self.offsets()[position + 1] :]
+
+    def state_separator_index(self) -> Optional[int]:
+        """
+        :returns: byte offset of the first OP_STATESEPARATOR, None when the script has no state
+        """
+        try:
+            return self.offsets()[self.opcodes.index(_OP_STATESEPARATOR)]
+        except ValueError:
+            return None
+
+    def code_script(self) -> bytes:
+        """
+        :returns: the bytecode after OP_STATESEPARATOR, the whole bytecode when the script has no state
+        """
+        index = self.state_separator_index()
+        return self.bytecode if index is None else self.bytecode[index + 1 :]
+
+    def state_script(self) -> bytes:
+        """
+        :returns: the bytecode before OP_STATESEPARATOR, empty when the script has no state
+        """
+        index = self.state_separator_index()
+        return b"" if index is None else self.bytecode[:index]
+
+    def is_push_only(self) -> bool:
+        return all(opcode <= _OP_16 for opcode in self.opcodes)
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<CompiledScript {self.script}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
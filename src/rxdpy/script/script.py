@@ -1,7 +1,20 @@
 from typing import Union, Optional, List
 
 from ..constants import OpCode, OPCODE_VALUE_NAME_DICT
-from ..utils import encode_pushdata, unsigned_to_varint, Reader
+from ..utils import encode_pushdata, unsigned_to_varint
+
+# opcodes followed by a 36 bytes reference (txid and output index) instead of a regular push
+REFERENCE_OPCODES = frozenset(
+    op[0]
+    for op in (
+        OpCode.OP_PUSHINPUTREF,
+        OpCode.OP_REQUIREINPUTREF,
+        OpCode.OP_DISALLOWPUSHINPUTREF,
+        OpCode.OP_DISALLOWPUSHINPUTREFSIBLING,
+        OpCode.OP_PUSHINPUTREFSINGLETON,
+    )
+)
+REFERENCE_LENGTH = 36
 
 
 class ScriptChunk:
@@ -15,6 +28,8 @@ class ScriptChunk:
         self.data = data
 
     def __str__(self):
+        if self.op[0] in REFERENCE_OPCODES:
+            return f"{OPCODE_VALUE_NAME_DICT[self.op]} {(self.data or b'').hex()}"
         if self.data is not None:
             return self.data.hex()
         return OPCODE_VALUE_NAME_DICT[self.op]
@@ -23,6 +38,42 @@ class ScriptChunk:
         return self.__str__()
 
 
+def tokenize(script: bytes) -> List[ScriptChunk]:
+    """
+    Splits a serialized script into chunks by slicing the bytes directly.
+    A push running past the end of the script keeps whatever data is left, as the node does when it reports the error.
+    """
+    chunks = []
+    append = chunks.append
+    length = len(script)
+    i = 0
+    while i < length:
+        opcode = script[i]
+        op = script[i : i + 1]
+        i += 1
+        if opcode > 0x4E or opcode == 0:
+            if opcode in REFERENCE_OPCODES:
+                append(ScriptChunk(op, script[i : i + REFERENCE_LENGTH]))
+                i += REFERENCE_LENGTH
+            else:
+                append(ScriptChunk(op))
+            continue
+        if opcode <= 0x4B:
+            data_length = opcode
+        else:
+            # OP_PUSHDATA1, OP_PUSHDATA2 or OP_PUSHDATA4
+            size = 1 << (opcode - 0x4C)
+            length_bytes = script[i : i + size]
+            i += size
+            if not length_bytes:
+                append(ScriptChunk(op))
+                continue
+            data_length = int.from_bytes(length_bytes, "little")
+        append(ScriptChunk(op, script[i : i + data_length]))
+        i += data_length
+    return chunks
+
+
 class Script:
     def __init__(self, script: Union[str, bytes, None] = None):
         """
@@ -38,33 +89,21 @@ class Script:
             self.script: bytes = script
         else:
             raise TypeError("unsupported script type")
-        # An array of script chunks that make up the script.
-        self.chunks: List[ScriptChunk] = []
-        self._build_chunks()
+        # An array of script chunks that make up the script, decoded on first access.
+        self._chunks: Optional[List[ScriptChunk]] = None
+
+    @property
+    def chunks(self) -> List[ScriptChunk]:
+        if self._chunks is None:
+            self._build_chunks()
+        return self._chunks
+
+    @chunks.setter
+    def chunks(self, chunks: List[ScriptChunk]):
+        self._chunks = chunks
 
     def _build_chunks(self):
-        self.chunks = []
-        reader = Reader(self.script)
-        while not reader.eof():
-            op = reader.read_bytes(1)
-            chunk = ScriptChunk(op)
-            data = None
-            if b"\x01" <= op <= b"\x4b":
-                data = reader.read_bytes(int.from_bytes(op, "big"))
-            elif op == OpCode.OP_PUSHDATA1:  # 0x4c
-                length = reader.read_uint8()
-                if length is not None:
-                    data = reader.read_bytes(length)
-            elif op == OpCode.OP_PUSHDATA2:
-                length = reader.read_uint16_le()
-                if length is not None:
-                    data = reader.read_bytes(length)
-            elif op == OpCode.OP_PUSHDATA4:
-                length = reader.read_uint32_le()
-                if length is not None:
-                    data = reader.read_bytes(length)
-            chunk.data = data
-            self.chunks.append(chunk)
+        self._chunks = tokenize(self.script)
 
     def serialize(self) -> bytes:
         return self.script
@@ -107,7 +146,12 @@ class Script:
     def from_chunks(cls, chunks: List[ScriptChunk]) -> "Script":
         script = b""
         for chunk in chunks:
-            script += encode_pushdata(chunk.data) if chunk.data is not None else chunk.op
+            if chunk.data is None:
+                script += chunk.op
+            elif chunk.op[0] in REFERENCE_OPCODES:
+                script += chunk.op + chunk.data
+            else:
+                script += encode_pushdata(chunk.data)
         s = Script(script)
         s.chunks = chunks
         return s
@@ -152,6 +196,9 @@ class Script:
                     opcode_value = OpCode.OP_PUSHDATA4
                 chunks.append(ScriptChunk(opcode_value, hex_bytes))
                 i = i + 1
+            elif opcode_value[0] in REFERENCE_OPCODES:
+                chunks.append(ScriptChunk(opcode_value, bytes.fromhex(tokens[i + 1])))
+                i += 2
             elif (
                 opcode_value == OpCode.OP_PUSHDATA1
                 or opcode_value == OpCode.OP_PUSHDATA2
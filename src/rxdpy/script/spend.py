@@ -1,24 +1,151 @@
+import operator
 from contextlib import suppress
-from typing import Literal
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
 
-from .script import ScriptChunk, Script
+from .compiled_script import CompiledScript, MAX_SCRIPT_ELEMENT_SIZE, OPCODE_DISABLED, OPCODE_NAMES, OPCODE_VALID
+from .script import ScriptChunk, Script, REFERENCE_LENGTH
 from ..constants import OpCode, OPCODE_VALUE_NAME_DICT, SIGHASH
 from ..curve import curve
-from ..hash import sha1, sha256, ripemd160, hash256, hash160
-from ..keys import PublicKey
+from ..hash import sha1, sha256, ripemd160, hash256, hash160, sha512_256, hash512_256
+from ..keys import PublicKey, SIGNATURE_CACHE
 from ..transaction.transaction_input import TransactionInput
-from ..transaction.transaction_preimage import tx_preimage
+from ..transaction.transaction_introspection import TransactionIntrospectionContext
+from ..transaction.transaction_preimage import TransactionPreimageContext
+from ..transaction.transaction_references import TransactionReferenceIndex
 from ..utils import unsigned_to_bytes, deserialize_ecdsa_der
 
-MAX_SCRIPT_ELEMENT_SIZE = 1024 * 1024 * 1024
 MAX_MULTISIG_KEY_COUNT = pow(2, 31) - 1
 REQUIRE_MINIMAL_PUSH = True
 REQUIRE_PUSH_ONLY_UNLOCKING_SCRIPTS = True
 REQUIRE_LOW_S_SIGNATURES = True
 REQUIRE_CLEAN_STACK = True
+# validate spends of the P2PKH template without running the interpreter
+P2PKH_FAST_PATH = True
+
+# opcode values the interpreter branches on
+OP_PUSHDATA1 = OpCode.OP_PUSHDATA1[0]
+OP_PUSHDATA4 = OpCode.OP_PUSHDATA4[0]
+OP_1 = OpCode.OP_1[0]
+OP_IF = OpCode.OP_IF[0]
+OP_NOTIF = OpCode.OP_NOTIF[0]
+OP_ELSE = OpCode.OP_ELSE[0]
+OP_ENDIF = OpCode.OP_ENDIF[0]
+OP_ROLL = OpCode.OP_ROLL[0]
+OP_LSHIFT = OpCode.OP_LSHIFT[0]
+OP_EQUALVERIFY = OpCode.OP_EQUALVERIFY[0]
+OP_DIV = OpCode.OP_DIV[0]
+OP_MOD = OpCode.OP_MOD[0]
+OP_NUMEQUALVERIFY = OpCode.OP_NUMEQUALVERIFY[0]
+OP_CHECKSIGVERIFY = OpCode.OP_CHECKSIGVERIFY[0]
+OP_CHECKMULTISIGVERIFY = OpCode.OP_CHECKMULTISIGVERIFY[0]
+
+BITWISE_OPERATIONS: Dict[int, Callable[[int, int], int]] = {
+    OpCode.OP_AND[0]: operator.and_,
+    OpCode.OP_OR[0]: operator.or_,
+    OpCode.OP_XOR[0]: operator.xor,
+}
+UNARY_ARITHMETIC_OPERATIONS: Dict[int, Callable[[int], int]] = {
+    OpCode.OP_1ADD[0]: lambda x: x + 1,
+    OpCode.OP_1SUB[0]: lambda x: x - 1,
+    OpCode.OP_NEGATE[0]: operator.neg,
+    OpCode.OP_ABS[0]: abs,
+    OpCode.OP_NOT[0]: lambda x: 1 if x == 0 else 0,
+    OpCode.OP_0NOTEQUAL[0]: lambda x: 1 if x != 0 else 0,
+}
+BINARY_ARITHMETIC_OPERATIONS: Dict[int, Callable[[int, int], int]] = {
+    OpCode.OP_ADD[0]: operator.add,
+    OpCode.OP_SUB[0]: operator.sub,
+    OpCode.OP_MUL[0]: operator.mul,
+    OpCode.OP_DIV[0]: operator.floordiv,
+    OpCode.OP_MOD[0]: operator.mod,
+    OpCode.OP_BOOLAND[0]: lambda x1, x2: 1 if x1 != 0 and x2 != 0 else 0,
+    OpCode.OP_BOOLOR[0]: lambda x1, x2: 1 if x1 != 0 or x2 != 0 else 0,
+    OpCode.OP_NUMEQUAL[0]: lambda x1, x2: 1 if x1 == x2 else 0,
+    OpCode.OP_NUMEQUALVERIFY[0]: lambda x1, x2: 1 if x1 == x2 else 0,
+    OpCode.OP_NUMNOTEQUAL[0]: lambda x1, x2: 1 if x1 != x2 else 0,
+    OpCode.OP_LESSTHAN[0]: lambda x1, x2: 1 if x1 < x2 else 0,
+    OpCode.OP_GREATERTHAN[0]: lambda x1, x2: 1 if x1 > x2 else 0,
+    OpCode.OP_LESSTHANOREQUAL[0]: lambda x1, x2: 1 if x1 <= x2 else 0,
+    OpCode.OP_GREATERTHANOREQUAL[0]: lambda x1, x2: 1 if x1 >= x2 else 0,
+    OpCode.OP_MIN[0]: min,
+    OpCode.OP_MAX[0]: max,
+}
+HASH_OPERATIONS: Dict[int, Callable[[bytes], bytes]] = {
+    OpCode.OP_RIPEMD160[0]: ripemd160,
+    OpCode.OP_SHA1[0]: sha1,
+    OpCode.OP_SHA256[0]: sha256,
+    OpCode.OP_HASH160[0]: hash160,
+    OpCode.OP_HASH256[0]: hash256,
+    OpCode.OP_SHA512_256[0]: sha512_256,
+    OpCode.OP_HASH512_256[0]: hash512_256,
+}
+
+# native introspection opcodes reading a field of the transaction
+TRANSACTION_INTROSPECTION: Dict[int, Callable[[TransactionIntrospectionContext], int]] = {
+    OpCode.OP_TXVERSION[0]: lambda context: context.tx_version,
+    OpCode.OP_TXINPUTCOUNT[0]: lambda context: context.input_count,
+    OpCode.OP_TXOUTPUTCOUNT[0]: lambda context: context.output_count,
+    OpCode.OP_TXLOCKTIME[0]: lambda context: context.tx_locktime,
+}
+# native introspection opcodes reading a field of the input whose index is on top of the stack
+INPUT_INTROSPECTION: Dict[int, Callable[[TransactionIntrospectionContext, int], Union[int, bytes, None]]] = {
+    OpCode.OP_UTXOVALUE[0]: lambda context, i: context.utxo_values[i],
+    OpCode.OP_UTXOBYTECODE[0]: lambda context, i: context.utxo_bytecodes[i],
+    OpCode.OP_OUTPOINTTXHASH[0]: lambda context, i: context.outpoint_tx_hashes[i],
+    OpCode.OP_OUTPOINTINDEX[0]: lambda context, i: context.outpoint_indexes[i],
+    OpCode.OP_INPUTBYTECODE[0]: lambda context, i: context.input_bytecodes[i],
+    OpCode.OP_INPUTSEQUENCENUMBER[0]: lambda context, i: context.input_sequences[i],
+    OpCode.OP_STATESEPARATORINDEX_UTXO[0]: lambda context, i: context.state_separator_index(context.utxo_program(i)),
+    OpCode.OP_CODESCRIPTBYTECODE_UTXO[0]: lambda context, i: context.code_script(context.utxo_program(i)),
+    OpCode.OP_STATESCRIPTBYTECODE_UTXO[0]: lambda context, i: context.state_script(context.utxo_program(i)),
+}
+# native introspection opcodes reading a field of the output whose index is on top of the stack
+OUTPUT_INTROSPECTION: Dict[int, Callable[[TransactionIntrospectionContext, int], Union[int, bytes]]] = {
+    OpCode.OP_OUTPUTVALUE[0]: lambda context, i: context.output_values[i],
+    OpCode.OP_OUTPUTBYTECODE[0]: lambda context, i: context.output_bytecodes[i],
+    OpCode.OP_STATESEPARATORINDEX_OUTPUT[0]: lambda context, i: context.state_separator_index(
+        context.output_program(i)
+    ),
+    OpCode.OP_CODESCRIPTBYTECODE_OUTPUT[0]: lambda context, i: context.code_script(context.output_program(i)),
+    OpCode.OP_STATESCRIPTBYTECODE_OUTPUT[0]: lambda context, i: context.state_script(context.output_program(i)),
+}
+# reference opcodes followed by the reference they push
+INPUT_REFERENCE_OPCODES = frozenset(
+    op[0] for op in (OpCode.OP_PUSHINPUTREF, OpCode.OP_REQUIREINPUTREF, OpCode.OP_PUSHINPUTREFSINGLETON)
+)
+DISALLOWED_REFERENCE_OPCODES = frozenset(
+    op[0] for op in (OpCode.OP_DISALLOWPUSHINPUTREF, OpCode.OP_DISALLOWPUSHINPUTREFSIBLING)
+)
+# reference opcodes reading what the index knows of the reference on top of the stack
+REFERENCE_QUERIES: Dict[int, Callable[[TransactionReferenceIndex, bytes], int]] = {
+    OpCode.OP_REFTYPE_UTXO[0]: lambda index, ref: index.utxos.ref_type(ref),
+    OpCode.OP_REFTYPE_OUTPUT[0]: lambda index, ref: index.outputs.ref_type(ref),
+    OpCode.OP_REFVALUESUM_UTXOS[0]: lambda index, ref: index.utxos.ref(ref).value_sum,
+    OpCode.OP_REFVALUESUM_OUTPUTS[0]: lambda index, ref: index.outputs.ref(ref).value_sum,
+    OpCode.OP_REFOUTPUTCOUNT_UTXOS[0]: lambda index, ref: index.utxos.ref(ref).count,
+    OpCode.OP_REFOUTPUTCOUNT_OUTPUTS[0]: lambda index, ref: index.outputs.ref(ref).count,
+    OpCode.OP_REFOUTPUTCOUNTZEROVALUED_UTXOS[0]: lambda index, ref: index.utxos.ref(ref).zero_valued_count,
+    OpCode.OP_REFOUTPUTCOUNTZEROVALUED_OUTPUTS[0]: lambda index, ref: index.outputs.ref(ref).zero_valued_count,
+}
+# code script hash opcodes reading what the index knows of the hash on top of the stack
+CODE_SCRIPT_HASH_QUERIES: Dict[int, Callable[[TransactionReferenceIndex, bytes], int]] = {
+    OpCode.OP_CODESCRIPTHASHVALUESUM_UTXOS[0]: lambda index, h: index.utxos.code_script_hash(h).value_sum,
+    OpCode.OP_CODESCRIPTHASHVALUESUM_OUTPUTS[0]: lambda index, h: index.outputs.code_script_hash(h).value_sum,
+    OpCode.OP_CODESCRIPTHASHOUTPUTCOUNT_UTXOS[0]: lambda index, h: index.utxos.code_script_hash(h).count,
+    OpCode.OP_CODESCRIPTHASHOUTPUTCOUNT_OUTPUTS[0]: lambda index, h: index.outputs.code_script_hash(h).count,
+    OpCode.OP_CODESCRIPTHASHZEROVALUEDOUTPUTCOUNT_UTXOS[0]: lambda index, h: (
+        index.utxos.code_script_hash(h).zero_valued_count
+    ),
+    OpCode.OP_CODESCRIPTHASHZEROVALUEDOUTPUTCOUNT_OUTPUTS[0]: lambda index, h: (
+        index.outputs.code_script_hash(h).zero_valued_count
+    ),
+}
 
 
 class Spend:
+    # handler of every non-push opcode indexed by opcode value, None for the ones the interpreter rejects
+    OPCODE_HANDLERS: List[Optional[Callable[["Spend", int, Optional[bytes]], None]]] = []
+
     def __init__(self, params):
         """
         Constructs a Spend object with necessary transaction details.
@@ -34,6 +161,14 @@ class Spend:
         :param UnlockingScript params['unlockingScript']: The unlocking script for this spend.
         :param int params['inputSequence']: The sequence number of this input.
         :param int params['lockTime']: The lock time of the transaction.
+        :param TransactionPreimageContext params['preimageContext']: Optional sighash context of the transaction,
+            shared by the spends of all its inputs. Built from the other inputs and outputs when omitted.
+        :param TransactionIntrospectionContext params['introspectionContext']: Optional context read by the native
+            introspection opcodes, shared by the spends of all inputs. Built from the other inputs and outputs when
+            omitted, which needs their satoshis and locking scripts.
+        :param list params['deferredSignatures']: Optional list collecting the (public key, signature, digest) of
+            every signature check instead of verifying it, each check then succeeds. The caller verifies them at once
+            with PublicKey.verify_batch(), and validates the spend again without deferring if any of them is invalid.
 
         Example:
         spend = Spend({
@@ -61,6 +196,10 @@ class Spend:
         self.unlocking_script: Script = params["unlockingScript"]
         self.input_sequence = params["inputSequence"]
         self.lock_time = params["lockTime"]
+        self.preimage_context: TransactionPreimageContext = params.get("preimageContext")
+        self.introspection_context: TransactionIntrospectionContext = params.get("introspectionContext")
+        self.deferred_signatures: Optional[List[Tuple[bytes, bytes, bytes]]] = params.get("deferredSignatures")
+        self._current_input: Optional[TransactionInput] = None
 
         self.context: Literal["UnlockingScript", "LockingScript"] = "UnlockingScript"
         self.program_counter = 0
@@ -69,713 +208,620 @@ class Spend:
         self.alt_stack = []
         self.if_stack = []
 
+    @property
+    def locking_script(self) -> Script:
+        return self._locking_script
+
+    @locking_script.setter
+    def locking_script(self, script: Script) -> None:
+        self._locking_script = script
+        # locking scripts are mostly a few templates, compiled once and shared
+        self.locking_program = CompiledScript.compile(script)
+
+    @property
+    def unlocking_script(self) -> Script:
+        return self._unlocking_script
+
+    @unlocking_script.setter
+    def unlocking_script(self, script: Script) -> None:
+        self._unlocking_script = script
+        self.unlocking_program = CompiledScript(script)
+
+    def program(self) -> CompiledScript:
+        """
+        :returns: the compiled script running in the current context
+        """
+        return self.unlocking_program if self.context == "UnlockingScript" else self.locking_program
+
     def step(self) -> None:
         # If the context is UnlockingScript, and we have reached the end,
         # set the context to LockingScript and zero the program counter
-        if self.context == "UnlockingScript" and self.program_counter >= len(self.unlocking_script.chunks):
+        if self.context == "UnlockingScript" and self.program_counter >= len(self.unlocking_program):
             self.context = "LockingScript"
             self.program_counter = 0
 
-        if self.context == "UnlockingScript":
-            operation = self.unlocking_script.chunks[self.program_counter]
-        else:
-            operation = self.locking_script.chunks[self.program_counter]
-
-        is_script_executing = not (b"" in self.if_stack)
+        program = self.unlocking_program if self.context == "UnlockingScript" else self.locking_program
+        program_counter = self.program_counter
+        is_script_executing = b"" not in self.if_stack
 
         # Read instruction
-        current_opcode = operation.op
-        if current_opcode not in OPCODE_VALUE_NAME_DICT.keys() and not (
-            b"\x01" <= current_opcode < OpCode.OP_PUSHDATA1
-        ):
+        opcode = program.opcodes[program_counter]
+        data = program.data[program_counter]
+        if not OPCODE_VALID[opcode]:
             self.script_evaluation_error(f"An opcode is missing in this chunk of the {self.context}!")
-        if operation.data is not None and len(operation.data) > MAX_SCRIPT_ELEMENT_SIZE:
+        if data is not None and len(data) > MAX_SCRIPT_ELEMENT_SIZE:
             _m = f"It's not currently possible to push data larger than {MAX_SCRIPT_ELEMENT_SIZE} bytes."
             self.script_evaluation_error(_m)
-        if is_script_executing and self.is_opcode_disabled(current_opcode):
-            self.script_evaluation_error("This opcode is currently disabled.")
-
-        if is_script_executing and OpCode.OP_0 <= current_opcode <= OpCode.OP_PUSHDATA4:
-            if REQUIRE_MINIMAL_PUSH and not self.is_chunk_minimal(operation):
-                self.script_evaluation_error("This data is not minimally-encoded.")
-            if operation.data is None:
-                self.stack.append(b"")
+
+        if is_script_executing:
+            if OPCODE_DISABLED[opcode]:
+                self.script_evaluation_error("This opcode is currently disabled.")
+            if opcode <= OP_PUSHDATA4:
+                if REQUIRE_MINIMAL_PUSH and not self.is_push_minimal(opcode, data):
+                    self.script_evaluation_error("This data is not minimally-encoded.")
+                self.stack.append(b"" if data is None else data)
             else:
-                self.stack.append(operation.data)
-        elif is_script_executing or (OpCode.OP_IF <= current_opcode <= OpCode.OP_ENDIF):
-            if current_opcode in [
-                OpCode.OP_1NEGATE,
-                OpCode.OP_1,
-                OpCode.OP_2,
-                OpCode.OP_3,
-                OpCode.OP_4,
-                OpCode.OP_5,
-                OpCode.OP_6,
-                OpCode.OP_7,
-                OpCode.OP_8,
-                OpCode.OP_9,
-                OpCode.OP_10,
-                OpCode.OP_11,
-                OpCode.OP_12,
-                OpCode.OP_13,
-                OpCode.OP_14,
-                OpCode.OP_15,
-                OpCode.OP_16,
-            ]:
-                n = int.from_bytes(current_opcode, "big") - (int.from_bytes(OpCode.OP_1, "big") - 1)
-                self.stack.append(self.minimally_encode(n))
-
-            elif current_opcode in [
-                OpCode.OP_NOP,
-                OpCode.OP_NOP1,
-                OpCode.OP_NOP2,
-                OpCode.OP_NOP3,
-                OpCode.OP_NOP4,
-                OpCode.OP_NOP5,
-                OpCode.OP_NOP6,
-                OpCode.OP_NOP7,
-                OpCode.OP_NOP8,
-                OpCode.OP_NOP9,
-                OpCode.OP_NOP10,
-                OpCode.OP_NOP11,
-                OpCode.OP_NOP12,
-                OpCode.OP_NOP13,
-                OpCode.OP_NOP14,
-                OpCode.OP_NOP15,
-                OpCode.OP_NOP16,
-                OpCode.OP_NOP17,
-                OpCode.OP_NOP18,
-                OpCode.OP_NOP19,
-                OpCode.OP_NOP20,
-                OpCode.OP_NOP21,
-                OpCode.OP_NOP22,
-                OpCode.OP_NOP23,
-                OpCode.OP_NOP24,
-                OpCode.OP_NOP25,
-                OpCode.OP_NOP26,
-                OpCode.OP_NOP27,
-                OpCode.OP_NOP28,
-                OpCode.OP_NOP29,
-                OpCode.OP_NOP30,
-                OpCode.OP_NOP31,
-                OpCode.OP_NOP32,
-                OpCode.OP_NOP33,
-                OpCode.OP_NOP34,
-                OpCode.OP_NOP35,
-                OpCode.OP_NOP36,
-                OpCode.OP_NOP37,
-                OpCode.OP_NOP38,
-                OpCode.OP_NOP39,
-                OpCode.OP_NOP40,
-                OpCode.OP_NOP41,
-                OpCode.OP_NOP42,
-                OpCode.OP_NOP43,
-                OpCode.OP_NOP44,
-                OpCode.OP_NOP45,
-                OpCode.OP_NOP46,
-                OpCode.OP_NOP47,
-                OpCode.OP_NOP48,
-                OpCode.OP_NOP49,
-                OpCode.OP_NOP50,
-                OpCode.OP_NOP51,
-                OpCode.OP_NOP52,
-                OpCode.OP_NOP53,
-                OpCode.OP_NOP54,
-                OpCode.OP_NOP55,
-                OpCode.OP_NOP56,
-                OpCode.OP_NOP57,
-                OpCode.OP_NOP58,
-                OpCode.OP_NOP59,
-                OpCode.OP_NOP60,
-                OpCode.OP_NOP61,
-                OpCode.OP_NOP62,
-                OpCode.OP_NOP63,
-                OpCode.OP_NOP64,
-                OpCode.OP_NOP65,
-                OpCode.OP_NOP66,
-                OpCode.OP_NOP67,
-                OpCode.OP_NOP68,
-                OpCode.OP_NOP69,
-                OpCode.OP_NOP70,
-                OpCode.OP_NOP71,
-                OpCode.OP_NOP72,
-                OpCode.OP_NOP73,
-                OpCode.OP_NOP77,
-            ]:
-                pass
-
-            elif current_opcode in [OpCode.OP_IF, OpCode.OP_NOTIF]:
-                f = False
-                if is_script_executing:
-                    if len(self.stack) < 1:
-                        _m = "OP_IF and OP_NOTIF require at least one item on the stack when they are used!"
-                        self.script_evaluation_error(_m)
-                    octets = self.stacktop(-1)
-                    f = self.cast_to_bool(octets)
-                    if current_opcode == OpCode.OP_NOTIF:
-                        f = not f
-                    self.stack.pop()
-                self.if_stack.append(self.encode_bool(f))
-
-            elif current_opcode == OpCode.OP_ELSE:
-                if len(self.if_stack) == 0:
-                    self.script_evaluation_error("OP_ELSE requires a preceeding OP_IF.")
-                f = not self.cast_to_bool(self.if_stack[-1])
-                self.if_stack[-1] = self.encode_bool(f)
-
-            elif current_opcode == OpCode.OP_ENDIF:
-                if len(self.if_stack) == 0:
-                    self.script_evaluation_error("OP_ENDIF requires a preceeding OP_IF.")
-                self.if_stack.pop()
-
-            elif current_opcode == OpCode.OP_VERIFY:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_VERIFY requires at least one item to be on the stack.")
-                f = self.cast_to_bool(self.stacktop(-1))
-                if f:
-                    self.stack.pop()
-                else:
-                    self.script_evaluation_error("OP_VERIFY requires the top stack value to be truthy.")
-
-            elif current_opcode == OpCode.OP_RETURN:
-                if self.context == "UnlockingScript":
-                    self.program_counter = len(self.unlocking_script.chunks)
-                else:
-                    self.program_counter = len(self.locking_script.chunks)
-                self.if_stack = []
-
-            elif current_opcode == OpCode.OP_TOALTSTACK:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_TOALTSTACK requires at oeast one item to be on the stack.")
-                self.alt_stack.append(self.stack.pop())
-
-            elif current_opcode == OpCode.OP_FROMALTSTACK:
-                if len(self.alt_stack) < 1:
-                    self.script_evaluation_error("OP_FROMALTSTACK requires at least one item to be on the stack.")
-                self.stack.append(self.alt_stack.pop())
-
-            elif current_opcode == OpCode.OP_2DROP:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_2DROP requires at least two items to be on the stack.")
-                self.stack.pop()
-                self.stack.pop()
+                self.execute(opcode, data)
+        elif OP_IF <= opcode <= OP_ENDIF:
+            # conditionals are tracked in non-executed branches as well
+            self.execute(opcode, data)
+
+        if program.jumps[program_counter] != -1 and self.if_stack[-1] == b"":
+            # the branch is not taken, go straight to its OP_ELSE or OP_ENDIF
+            self.program_counter = program.jumps[program_counter]
+        else:
+            # Finally, increment the program counter
+            self.program_counter += 1
 
-            elif current_opcode == OpCode.OP_2DUP:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_2DUP requires at least two items to be on the stack.")
-                x1 = self.stacktop(-2)
-                x2 = self.stacktop(-1)
-                self.stack.append(x1)
-                self.stack.append(x2)
-
-            elif current_opcode == OpCode.OP_3DUP:
-                if len(self.stack) < 3:
-                    self.script_evaluation_error("OP_3DUP requires at least three items to be on the stack.")
-                x1 = self.stacktop(-3)
-                x2 = self.stacktop(-2)
-                x3 = self.stacktop(-1)
-                self.stack.append(x1)
-                self.stack.append(x2)
-                self.stack.append(x3)
-
-            elif current_opcode == OpCode.OP_2OVER:
-                if len(self.stack) < 4:
-                    self.script_evaluation_error("OP_2OVER requires at least four items to be on the stack.")
-                x1 = self.stacktop(-4)
-                x2 = self.stacktop(-3)
-                self.stack.append(x1)
-                self.stack.append(x2)
-
-            elif current_opcode == OpCode.OP_2ROT:
-                if len(self.stack) < 6:
-                    self.script_evaluation_error("OP_2ROT requires at least six items to be on the stack.")
-                x1 = self.stack.pop(-6)
-                x2 = self.stack.pop(-5)
-                self.stack.append(x1)
-                self.stack.append(x2)
-
-            elif current_opcode == OpCode.OP_2SWAP:
-                if len(self.stack) < 4:
-                    self.script_evaluation_error("OP_2SWAP requires at least four items to be on the stack.")
-                x1 = self.stack.pop(-4)
-                x2 = self.stack.pop(-3)
-                self.stack.append(x1)
-                self.stack.append(x2)
-
-            elif current_opcode == OpCode.OP_IFDUP:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_IFDUP requires at least one item to be on the stack.")
-                octets = self.stacktop(-1)
-                f = self.cast_to_bool(octets)
-                if f:
-                    self.stack.append(octets)
-
-            elif current_opcode == OpCode.OP_DEPTH:
-                self.stack.append(self.minimally_encode(len(self.stack)))
-
-            elif current_opcode == OpCode.OP_DROP:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_DROP requires at least one item to be on the stack.")
-                self.stack.pop()
+    def execute(self, opcode: int, data: Optional[bytes]) -> None:
+        """
+        Runs the handler of a non-push opcode
+        """
+        handler = self.OPCODE_HANDLERS[opcode]
+        if handler is None:
+            self.script_evaluation_error("Invalid opcode!")
+        handler(self, opcode, data)
+
+    def _op_push_number(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_1NEGATE and OP_1 to OP_16
+        self.stack.append(self.minimally_encode(opcode - (OP_1 - 1)))
+
+    def _op_nop(self, opcode: int, data: Optional[bytes]) -> None:
+        pass
+
+    def _op_if(self, opcode: int, data: Optional[bytes]) -> None:
+        f = False
+        if b"" not in self.if_stack:
+            if len(self.stack) < 1:
+                _m = "OP_IF and OP_NOTIF require at least one item on the stack when they are used!"
+                self.script_evaluation_error(_m)
+            octets = self.stacktop(-1)
+            f = self.cast_to_bool(octets)
+            if opcode == OP_NOTIF:
+                f = not f
+            self.stack.pop()
+        self.if_stack.append(self.encode_bool(f))
+
+    def _op_else(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.if_stack) == 0:
+            self.script_evaluation_error("OP_ELSE requires a preceeding OP_IF.")
+        f = not self.cast_to_bool(self.if_stack[-1])
+        self.if_stack[-1] = self.encode_bool(f)
+
+    def _op_endif(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.if_stack) == 0:
+            self.script_evaluation_error("OP_ENDIF requires a preceeding OP_IF.")
+        self.if_stack.pop()
+
+    def _op_verify(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_VERIFY requires at least one item to be on the stack.")
+        f = self.cast_to_bool(self.stacktop(-1))
+        if f:
+            self.stack.pop()
+        else:
+            self.script_evaluation_error("OP_VERIFY requires the top stack value to be truthy.")
 
-            elif current_opcode == OpCode.OP_DUP:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_DUP requires at least one item to be on the stack.")
-                self.stack.append(self.stacktop(-1))
-
-            elif current_opcode == OpCode.OP_NIP:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_NIP requires at least two items to be on the stack.")
-                self.stack.pop(-2)
-
-            elif current_opcode == OpCode.OP_OVER:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_OVER requires at least two items to be on the stack.")
-                self.stack.append(self.stacktop(-2))
-
-            elif current_opcode in [OpCode.OP_PICK, OpCode.OP_ROLL]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
-                n = self.bin2num(self.stacktop(-1))
-                self.stack.pop()
-                if n < 0 or n >= len(self.stack):
-                    _m = (
-                        f"{_codename} requires the top stack element to be 0 or "
-                        "a positive number less than the current size of the stack."
-                    )
-                    self.script_evaluation_error(_m)
-                octets = self.stacktop(-n - 1)
-                if current_opcode == OpCode.OP_ROLL:
-                    octets = self.stack.pop(len(self.stack) - n - 1)
-                self.stack.append(octets)
-
-            elif current_opcode == OpCode.OP_ROT:
-                if len(self.stack) < 3:
-                    self.script_evaluation_error("OP_ROT requires at least three items to be on the stack.")
-                x1 = self.stacktop(-3)
-                x2 = self.stacktop(-2)
-                x3 = self.stacktop(-1)
-                self.stack[-3] = x2
-                self.stack[-2] = x3
-                self.stack[-1] = x1
-
-            elif current_opcode == OpCode.OP_SWAP:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_SWAP requires at least two items to be on the stack.")
-                x1 = self.stacktop(-2)
-                x2 = self.stacktop(-1)
-                self.stack[-2] = x2
-                self.stack[-1] = x1
-
-            elif current_opcode == OpCode.OP_TUCK:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_TUCK requires at least two items to be on the stack.")
-                x1 = self.stack.pop(-2)
-                x2 = self.stack.pop(-1)
-                self.stack.append(x2)
-                self.stack.append(x1)
-                self.stack.append(x2)
-
-            elif current_opcode == OpCode.OP_SIZE:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_SIZE requires at least one item to be on the stack.")
-                n = len(self.stacktop(-1))
-                self.stack.append(self.minimally_encode(n))
-
-            elif current_opcode in [OpCode.OP_AND, OpCode.OP_OR, OpCode.OP_XOR]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least one item to be on the stack.")
-                x1 = self.stack.pop(-2)
-                x2 = self.stack.pop(-1)
-                if len(x1) != len(x2):
-                    self.script_evaluation_error(f"{_codename} requires the top two stack items to be the same size.")
-                if current_opcode == OpCode.OP_AND:
-                    sig = bytes([a & b for a, b in zip(x1, x2)])
-                elif current_opcode == OpCode.OP_OR:
-                    sig = bytes([a | b for a, b in zip(x1, x2)])
-                else:
-                    sig = bytes([a ^ b for a, b in zip(x1, x2)])
-                self.stack.append(sig)
-
-            elif current_opcode == OpCode.OP_INVERT:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_INVERT requires at least one item to be on the stack.")
-                x = self.stack.pop()
-                x = bytes([~b for b in x])
-                self.stack.append(x)
-
-            elif current_opcode in [OpCode.OP_LSHIFT, OpCode.OP_RSHIFT]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
-                n = self.bin2num(self.stacktop(-1))
-                if n < 0:
-                    self.script_evaluation_error(f"{_codename} requires the top stack item to be non-negative.")
-                x = self.stack.pop(-2)
-                if current_opcode == OpCode.OP_LSHIFT:
-                    x = x[n:] + b"\x00" * n
-                else:
-                    x = b"\x00" * n + x[:-n]
-                self.stack.append(x)
-
-            elif current_opcode in [OpCode.OP_EQUAL, OpCode.OP_EQUALVERIFY]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
-                x1 = self.stack.pop(-2)
-                x2 = self.stack.pop(-1)
-                f = x1 == x2
-                self.stack.append(self.encode_bool(f))
-                if current_opcode == OpCode.OP_EQUALVERIFY:
-                    if f:
-                        self.stack.pop()
-                    else:
-                        self.script_evaluation_error("OP_EQUALVERIFY requires the top two stack items to be equal.")
-
-            elif current_opcode in [
-                OpCode.OP_1ADD,
-                OpCode.OP_1SUB,
-                OpCode.OP_NEGATE,
-                OpCode.OP_ABS,
-                OpCode.OP_NOT,
-                OpCode.OP_0NOTEQUAL,
-            ]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 1:
-                    self.script_evaluation_error(f"{_codename} requires at least one items to be on the stack.")
-                x = self.bin2num(self.stack.pop())
-                if current_opcode == OpCode.OP_1ADD:
-                    x += 1
-                elif current_opcode == OpCode.OP_1SUB:
-                    x -= 1
-                elif current_opcode == OpCode.OP_NEGATE:
-                    x = -x
-                elif current_opcode == OpCode.OP_ABS:
-                    x = abs(x)
-                elif current_opcode == OpCode.OP_NOT:
-                    x = 1 if x == 0 else 0
-                else:
-                    x = 1 if x != 0 else 0
-                self.stack.append(self.minimally_encode(x))
-
-            elif current_opcode in [
-                OpCode.OP_ADD,
-                OpCode.OP_SUB,
-                OpCode.OP_MUL,
-                OpCode.OP_MOD,
-                OpCode.OP_DIV,
-                OpCode.OP_BOOLAND,
-                OpCode.OP_BOOLOR,
-                OpCode.OP_NUMEQUAL,
-                OpCode.OP_NUMEQUALVERIFY,
-                OpCode.OP_NUMNOTEQUAL,
-                OpCode.OP_LESSTHAN,
-                OpCode.OP_GREATERTHAN,
-                OpCode.OP_LESSTHANOREQUAL,
-                OpCode.OP_GREATERTHANOREQUAL,
-                OpCode.OP_MIN,
-                OpCode.OP_MAX,
-            ]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
-                x1 = self.bin2num(self.stack.pop(-2))
-                x2 = self.bin2num(self.stack.pop())
-                if current_opcode == OpCode.OP_ADD:
-                    x = x1 + x2
-                elif current_opcode == OpCode.OP_SUB:
-                    x = x1 - x2
-                elif current_opcode == OpCode.OP_MUL:
-                    x = x1 * x2
-                elif current_opcode == OpCode.OP_DIV:
-                    if x2 == 0:
-                        self.script_evaluation_error("OP_DIV cannot divide by zero!")
-                    x = x1 // x2
-                elif current_opcode == OpCode.OP_MOD:
-                    if x2 == 0:
-                        self.script_evaluation_error("OP_MOD cannot divide by zero!")
-                    x = x1 % x2
-                elif current_opcode == OpCode.OP_BOOLAND:
-                    x = 1 if x1 != 0 and x2 != 0 else 0
-                elif current_opcode == OpCode.OP_BOOLOR:
-                    x = 1 if x1 != 0 or x2 != 0 else 0
-                elif current_opcode == OpCode.OP_NUMEQUAL:
-                    x = 1 if x1 == x2 else 0
-                elif current_opcode == OpCode.OP_NUMEQUALVERIFY:
-                    x = 1 if x1 == x2 else 0
-                elif current_opcode == OpCode.OP_NUMNOTEQUAL:
-                    x = 1 if x1 != x2 else 0
-                elif current_opcode == OpCode.OP_LESSTHAN:
-                    x = 1 if x1 < x2 else 0
-                elif current_opcode == OpCode.OP_GREATERTHAN:
-                    x = 1 if x1 > x2 else 0
-                elif current_opcode == OpCode.OP_LESSTHANOREQUAL:
-                    x = 1 if x1 <= x2 else 0
-                elif current_opcode == OpCode.OP_GREATERTHANOREQUAL:
-                    x = 1 if x1 >= x2 else 0
-                elif current_opcode == OpCode.OP_MIN:
-                    x = min(x1, x2)
-                else:
-                    x = max(x1, x2)
-                self.stack.append(self.minimally_encode(x))
-
-                if current_opcode == OpCode.OP_NUMEQUALVERIFY:
-                    if self.cast_to_bool(self.stacktop(-1)):
-                        self.stack.pop()
-                    else:
-                        self.script_evaluation_error("OP_NUMEQUALVERIFY requires the top stack item to be truthy.")
-
-            elif current_opcode == OpCode.OP_WITHIN:
-                if len(self.stack) < 3:
-                    self.script_evaluation_error("OP_WITHIN requires at least three items to be on the stack.")
-                x1 = self.bin2num(self.stack.pop(-3))
-                x2 = self.bin2num(self.stack.pop(-2))
-                x3 = self.bin2num(self.stack.pop())
-                f = x2 <= x1 < x3
-                self.stack.append(self.encode_bool(f))
+    def _op_return(self, opcode: int, data: Optional[bytes]) -> None:
+        self.program_counter = len(self.program())
+        self.if_stack = []
 
-            elif current_opcode in [
-                OpCode.OP_RIPEMD160,
-                OpCode.OP_SHA1,
-                OpCode.OP_SHA256,
-                OpCode.OP_HASH160,
-                OpCode.OP_HASH256,
-            ]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 1:
-                    self.script_evaluation_error(f"{_codename} requires at least one item to be on the stack.")
-                sig = self.stack.pop()
-                if current_opcode == OpCode.OP_RIPEMD160:
-                    sig = ripemd160(sig)
-                elif current_opcode == OpCode.OP_SHA1:
-                    sig = sha1(sig)
-                elif current_opcode == OpCode.OP_SHA256:
-                    sig = sha256(sig)
-                elif current_opcode == OpCode.OP_HASH160:
-                    sig = hash160(sig)
-                else:
-                    sig = hash256(sig)
-                self.stack.append(sig)
-
-            elif current_opcode == OpCode.OP_CODESEPARATOR:
-                self.last_code_separator = self.program_counter
-
-            elif current_opcode in [OpCode.OP_CHECKSIG, OpCode.OP_CHECKSIGVERIFY]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                if len(self.stack) < 2:
-                    self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
-                sig = self.stack.pop(-2)
-                pub_key = self.stack.pop()
-                if not self.check_signature_encoding(sig) or not self.check_public_key_encoding(pub_key):
-                    _m = f"{_codename} requires correct encoding for the public key and signature."
-                    self.script_evaluation_error(_m)
-
-                # Subset of script starting at the most recent code separator
-                if self.context == "UnlockingScript":
-                    sub_script = Script.from_chunks(self.unlocking_script.chunks[self.last_code_separator :])
-                else:
-                    sub_script = Script.from_chunks(self.locking_script.chunks[self.last_code_separator :])
-
-                # Drop the signature, since there's no way for a signature to sign itself
-                sub_script = Script.find_and_delete(sub_script, Script.write_bin(sig))
-
-                # TODO
-                f = self.verify_signature(sig, pub_key, sub_script)
-
-                if not f and len(sig) > 0:
-                    self.script_evaluation_error(
-                        f"{_codename} failed to verify the signature, "
-                        "and requires an empty signature when verification fails."
-                    )
+    def _op_toaltstack(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_TOALTSTACK requires at oeast one item to be on the stack.")
+        self.alt_stack.append(self.stack.pop())
+
+    def _op_fromaltstack(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.alt_stack) < 1:
+            self.script_evaluation_error("OP_FROMALTSTACK requires at least one item to be on the stack.")
+        self.stack.append(self.alt_stack.pop())
+
+    def _op_2drop(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_2DROP requires at least two items to be on the stack.")
+        self.stack.pop()
+        self.stack.pop()
+
+    def _op_2dup(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_2DUP requires at least two items to be on the stack.")
+        self.stack.extend(self.stack[-2:])
+
+    def _op_3dup(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 3:
+            self.script_evaluation_error("OP_3DUP requires at least three items to be on the stack.")
+        self.stack.extend(self.stack[-3:])
+
+    def _op_2over(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 4:
+            self.script_evaluation_error("OP_2OVER requires at least four items to be on the stack.")
+        self.stack.extend(self.stack[-4:-2])
+
+    def _op_2rot(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 6:
+            self.script_evaluation_error("OP_2ROT requires at least six items to be on the stack.")
+        x1 = self.stack.pop(-6)
+        x2 = self.stack.pop(-5)
+        self.stack.append(x1)
+        self.stack.append(x2)
+
+    def _op_2swap(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 4:
+            self.script_evaluation_error("OP_2SWAP requires at least four items to be on the stack.")
+        x1 = self.stack.pop(-4)
+        x2 = self.stack.pop(-3)
+        self.stack.append(x1)
+        self.stack.append(x2)
+
+    def _op_ifdup(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_IFDUP requires at least one item to be on the stack.")
+        octets = self.stacktop(-1)
+        if self.cast_to_bool(octets):
+            self.stack.append(octets)
+
+    def _op_depth(self, opcode: int, data: Optional[bytes]) -> None:
+        self.stack.append(self.minimally_encode(len(self.stack)))
+
+    def _op_drop(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_DROP requires at least one item to be on the stack.")
+        self.stack.pop()
+
+    def _op_dup(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_DUP requires at least one item to be on the stack.")
+        self.stack.append(self.stack[-1])
+
+    def _op_nip(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_NIP requires at least two items to be on the stack.")
+        self.stack.pop(-2)
+
+    def _op_over(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_OVER requires at least two items to be on the stack.")
+        self.stack.append(self.stack[-2])
+
+    def _op_pick_roll(self, opcode: int, data: Optional[bytes]) -> None:
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
+        n = self.bin2num(self.stack.pop())
+        if n < 0 or n >= len(self.stack):
+            _m = (
+                f"{_codename} requires the top stack element to be 0 or "
+                "a positive number less than the current size of the stack."
+            )
+            self.script_evaluation_error(_m)
+        if opcode == OP_ROLL:
+            octets = self.stack.pop(len(self.stack) - n - 1)
+        else:
+            octets = self.stacktop(-n - 1)
+        self.stack.append(octets)
+
+    def _op_rot(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 3:
+            self.script_evaluation_error("OP_ROT requires at least three items to be on the stack.")
+        self.stack.append(self.stack.pop(-3))
+
+    def _op_swap(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_SWAP requires at least two items to be on the stack.")
+        self.stack[-2], self.stack[-1] = self.stack[-1], self.stack[-2]
+
+    def _op_tuck(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_TUCK requires at least two items to be on the stack.")
+        self.stack.insert(-2, self.stack[-1])
+
+    def _op_size(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_SIZE requires at least one item to be on the stack.")
+        self.stack.append(self.minimally_encode(len(self.stack[-1])))
+
+    def _op_bitwise(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_AND, OP_OR and OP_XOR
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{_codename} requires at least one item to be on the stack.")
+        x1 = self.stack.pop(-2)
+        x2 = self.stack.pop(-1)
+        if len(x1) != len(x2):
+            self.script_evaluation_error(f"{_codename} requires the top two stack items to be the same size.")
+        # operate on the items as big integers rather than byte by byte
+        n = BITWISE_OPERATIONS[opcode](int.from_bytes(x1, "big"), int.from_bytes(x2, "big"))
+        self.stack.append(n.to_bytes(len(x1), "big"))
+
+    def _op_invert(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_INVERT requires at least one item to be on the stack.")
+        x = self.stack.pop()
+        self.stack.append(bytes(~b & 0xFF for b in x))
+
+    def _op_shift(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_LSHIFT and OP_RSHIFT
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
+        n = self.bin2num(self.stacktop(-1))
+        if n < 0:
+            self.script_evaluation_error(f"{_codename} requires the top stack item to be non-negative.")
+        x = self.stack.pop(-2)
+        if opcode == OP_LSHIFT:
+            x = x[n:] + b"\x00" * n
+        else:
+            x = b"\x00" * n + x[:-n]
+        self.stack.append(x)
+
+    def _op_equal(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_EQUAL and OP_EQUALVERIFY
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{OPCODE_NAMES[opcode]} requires at least two items to be on the stack.")
+        x2 = self.stack.pop()
+        f = self.stack.pop() == x2
+        if opcode == OP_EQUALVERIFY:
+            if not f:
                 self.stack.append(self.encode_bool(f))
+                self.script_evaluation_error("OP_EQUALVERIFY requires the top two stack items to be equal.")
+        else:
+            self.stack.append(self.encode_bool(f))
+
+    def _op_unary_arithmetic(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_1ADD, OP_1SUB, OP_NEGATE, OP_ABS, OP_NOT and OP_0NOTEQUAL
+        if len(self.stack) < 1:
+            self.script_evaluation_error(f"{OPCODE_NAMES[opcode]} requires at least one items to be on the stack.")
+        x = UNARY_ARITHMETIC_OPERATIONS[opcode](self.bin2num(self.stack.pop()))
+        self.stack.append(self.minimally_encode(x))
+
+    def _op_binary_arithmetic(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_ADD to OP_MAX, except the shifts
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{OPCODE_NAMES[opcode]} requires at least two items to be on the stack.")
+        x1 = self.bin2num(self.stack.pop(-2))
+        x2 = self.bin2num(self.stack.pop())
+        if x2 == 0 and (opcode == OP_DIV or opcode == OP_MOD):
+            self.script_evaluation_error(f"{OPCODE_NAMES[opcode]} cannot divide by zero!")
+        self.stack.append(self.minimally_encode(BINARY_ARITHMETIC_OPERATIONS[opcode](x1, x2)))
+
+        if opcode == OP_NUMEQUALVERIFY:
+            if self.cast_to_bool(self.stacktop(-1)):
+                self.stack.pop()
+            else:
+                self.script_evaluation_error("OP_NUMEQUALVERIFY requires the top stack item to be truthy.")
+
+    def _op_within(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 3:
+            self.script_evaluation_error("OP_WITHIN requires at least three items to be on the stack.")
+        x1 = self.bin2num(self.stack.pop(-3))
+        x2 = self.bin2num(self.stack.pop(-2))
+        x3 = self.bin2num(self.stack.pop())
+        self.stack.append(self.encode_bool(x2 <= x1 < x3))
+
+    def _op_hash(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_RIPEMD160, OP_SHA1, OP_SHA256, OP_HASH160 and OP_HASH256
+        if len(self.stack) < 1:
+            self.script_evaluation_error(f"{OPCODE_NAMES[opcode]} requires at least one item to be on the stack.")
+        self.stack.append(HASH_OPERATIONS[opcode](self.stack.pop()))
+
+    def transaction_inputs(self) -> list:
+        """
+        :returns: inputs of the transaction, this one included with the output it spends
+        """
+        current_input = TransactionInput(
+            source_txid=self.source_txid,
+            source_output_index=self.source_output_index,
+            unlocking_script=self.unlocking_script,
+            sequence=self.input_sequence,
+        )
+        current_input.satoshis = self.source_satoshis
+        current_input.locking_script = self.locking_script
+        inputs = self.other_inputs[:]
+        inputs.insert(self.input_index, current_input)
+        return inputs
+
+    def introspection(self) -> TransactionIntrospectionContext:
+        if self.introspection_context is None:
+            self.introspection_context = TransactionIntrospectionContext(
+                self.transaction_inputs(), self.outputs, self.transaction_version, self.lock_time
+            )
+        return self.introspection_context
+
+    def pop_index(self, opcode: int, count: int, kind: str) -> int:
+        """
+        :returns: the input or output index on top of the stack, removed from it
+        """
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 1:
+            self.script_evaluation_error(f"{_codename} requires at least one item to be on the stack.")
+        index = self.bin2num(self.stack.pop())
+        if index < 0 or index >= count:
+            self.script_evaluation_error(f"{_codename} requires the top stack item to be a valid {kind} index.")
+        return index
+
+    def _op_inputindex(self, opcode: int, data: Optional[bytes]) -> None:
+        self.stack.append(self.minimally_encode(self.input_index))
+
+    def _op_activebytecode(self, opcode: int, data: Optional[bytes]) -> None:
+        # the running script after the last executed OP_CODESEPARATOR
+        self.stack.append(self.program().bytecode_after(self.last_code_separator))
+
+    def _op_transaction_introspection(self, opcode: int, data: Optional[bytes]) -> None:
+        self.stack.append(self.minimally_encode(TRANSACTION_INTROSPECTION[opcode](self.introspection())))
+
+    def _op_input_introspection(self, opcode: int, data: Optional[bytes]) -> None:
+        context = self.introspection()
+        index = self.pop_index(opcode, context.input_count, "input")
+        value = INPUT_INTROSPECTION[opcode](context, index)
+        if value is None:
+            self.script_evaluation_error(
+                f"{OPCODE_NAMES[opcode]} requires the satoshis and locking script of the output spent by input {index}."
+            )
+        self.stack.append(self.minimally_encode(value) if isinstance(value, int) else value)
+
+    def _op_output_introspection(self, opcode: int, data: Optional[bytes]) -> None:
+        context = self.introspection()
+        index = self.pop_index(opcode, context.output_count, "output")
+        value = OUTPUT_INTROSPECTION[opcode](context, index)
+        self.stack.append(self.minimally_encode(value) if isinstance(value, int) else value)
+
+    def pop_bytes(self, opcode: int, length: int, kind: str) -> bytes:
+        """
+        :returns: the reference or hash on top of the stack, removed from it
+        """
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 1:
+            self.script_evaluation_error(f"{_codename} requires at least one item to be on the stack.")
+        value = bytes(self.stack.pop())
+        if len(value) != length:
+            self.script_evaluation_error(f"{_codename} requires the top stack item to be a {length} byte {kind}.")
+        return value
+
+    def _op_input_reference(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_PUSHINPUTREF, OP_REQUIREINPUTREF and OP_PUSHINPUTREFSINGLETON
+        _codename = OPCODE_NAMES[opcode]
+        if data is None or len(data) != REFERENCE_LENGTH:
+            self.script_evaluation_error(f"{_codename} must be followed by a {REFERENCE_LENGTH} byte reference.")
+        if data not in self.introspection().references().input_refs:
+            self.script_evaluation_error(f"{_codename} requires the reference to be spent or carried by an input.")
+        self.stack.append(data)
+
+    def _op_disallowed_reference(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_DISALLOWPUSHINPUTREF and OP_DISALLOWPUSHINPUTREFSIBLING only constrain the outputs of the transaction
+        if data is None or len(data) != REFERENCE_LENGTH:
+            _m = f"{OPCODE_NAMES[opcode]} must be followed by a {REFERENCE_LENGTH} byte reference."
+            self.script_evaluation_error(_m)
+        self.stack.append(data)
+
+    def _op_reference_query(self, opcode: int, data: Optional[bytes]) -> None:
+        ref = self.pop_bytes(opcode, REFERENCE_LENGTH, "reference")
+        self.stack.append(self.minimally_encode(REFERENCE_QUERIES[opcode](self.introspection().references(), ref)))
+
+    def _op_code_script_hash_query(self, opcode: int, data: Optional[bytes]) -> None:
+        code_script_hash = self.pop_bytes(opcode, 32, "code script hash")
+        references = self.introspection().references()
+        self.stack.append(self.minimally_encode(CODE_SCRIPT_HASH_QUERIES[opcode](references, code_script_hash)))
+
+    def _op_codeseparator(self, opcode: int, data: Optional[bytes]) -> None:
+        self.last_code_separator = self.program_counter
+
+    def sub_script(self) -> Script:
+        """
+        :returns: subset of the running script starting at the most recent code separator
+        """
+        if self.context == "UnlockingScript":
+            return Script.from_chunks(self.unlocking_script.chunks[self.last_code_separator :])
+        return Script.from_chunks(self.locking_script.chunks[self.last_code_separator :])
+
+    def _op_checksig(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_CHECKSIG and OP_CHECKSIGVERIFY
+        _codename = OPCODE_NAMES[opcode]
+        if len(self.stack) < 2:
+            self.script_evaluation_error(f"{_codename} requires at least two items to be on the stack.")
+        sig = self.stack.pop(-2)
+        pub_key = self.stack.pop()
+        if not self.check_signature_encoding(sig) or not self.check_public_key_encoding(pub_key):
+            _m = f"{_codename} requires correct encoding for the public key and signature."
+            self.script_evaluation_error(_m)
 
-                if current_opcode == OpCode.OP_CHECKSIGVERIFY:
-                    if f:
-                        self.stack.pop()
-                    else:
-                        self.script_evaluation_error("OP_CHECKSIGVERIFY requires that a valid signature is provided.")
-
-            elif current_opcode in [OpCode.OP_CHECKMULTISIG, OpCode.OP_CHECKMULTISIGVERIFY]:
-                _codename = OPCODE_VALUE_NAME_DICT[current_opcode]
-                i = 1
-                if len(self.stack) < i:
-                    self.script_evaluation_error(f"{_codename} requires at least 1 item to be on the stack.")
-
-                keys_count = self.bin2num(self.stacktop(-i))
-                if keys_count < 0 or keys_count > MAX_MULTISIG_KEY_COUNT:
-                    _m = f"${_codename} requires a key count between 0 and {MAX_MULTISIG_KEY_COUNT}."
-                    self.script_evaluation_error(_m)
-                i += 1
-                i_key = i
-                i += keys_count
-
-                # ikey2 is the position of last non-signature item in the stack. Top stack item = 1.
-                # With SCRIPT_VERIFY_NULLFAIL, this is used for cleanup if operation fails.
-                i_key2 = keys_count + 2
-
-                if len(self.stack) < i:
-                    _m = f"{_codename} requires the number of stack items not to be less than the number of keys used."
-                    self.script_evaluation_error(_m)
-
-                sigs_count = self.bin2num(self.stacktop(-i))
-                if sigs_count < 0 or sigs_count > keys_count:
-                    _m = f"{_codename} requires the number of signatures to be no greater than the number of keys."
-                    self.script_evaluation_error(_m)
-                i += 1
-                i_sig = i
-                i += sigs_count
-                if len(self.stack) < i:
-                    _m = (
-                        f"{_codename} requires the number of stack items "
-                        "not to be less than the number of signatures provided."
-                    )
-                    self.script_evaluation_error(_m)
-
-                # Subset of script starting at the most recent code separator
-                if self.context == "UnlockingScript":
-                    sub_script = Script.from_chunks(self.unlocking_script.chunks[self.last_code_separator :])
-                else:
-                    sub_script = Script.from_chunks(self.locking_script.chunks[self.last_code_separator :])
-
-                # Drop the signatures, since there's no way for a signature to sign itself
-                for j in range(sigs_count):
-                    sub_script = Script.find_and_delete(sub_script, Script.write_bin(self.stacktop(-i_sig - j)))
-
-                f = True
-                while f and sigs_count > 0:
-                    buf_sig = self.stacktop(-i_sig)
-                    buf_pub_key = self.stacktop(-i_key)
-
-                    if not self.check_signature_encoding(buf_sig) or not self.check_public_key_encoding(buf_pub_key):
-                        _m = f"{_codename} requires correct encoding for the public key and signature."
-                        self.script_evaluation_error(_m)
-
-                    # TODO
-                    f_verify = self.verify_signature(buf_sig, buf_pub_key, sub_script)
-
-                    if f_verify:
-                        i_sig += 1
-                        sigs_count -= 1
-                    i_key += 1
-                    sigs_count -= 1
-
-                    # If there are more signatures left than keys left, then too many signatures have failed
-                    if sigs_count > keys_count:
-                        f = False
-
-                # Clean up stack of actual arguments
-                while i > 1:
-                    if not f and not i_key2 and ():
-                        _m = (
-                            f"{_codename} failed to verify a signature, "
-                            "and requires an empty signature when verification fails."
-                        )
-                        self.script_evaluation_error(_m)
-
-                    if i_key2 > 0:
-                        i_key2 -= 1
-
-                    self.stack.pop()
-                    i -= 1
-
-                # A bug causes CHECKMULTISIG to consume one extra argument whose contents were not checked in any way.
-                #
-                # Unfortunately this is a potential source of mutability,
-                # so optionally verify it is exactly equal to zero prior
-                # to removing it from the stack.
-                if len(self.stack) < 1:
-                    self.script_evaluation_error(f"{_codename} requires an extra item to be on the stack.")
-                if len(self.stacktop(-1)) > 0:
-                    self.script_evaluation_error(f"{_codename} requires the extra stack item to be empty.")
+        # Drop the signature, since there's no way for a signature to sign itself
+        sub_script = Script.find_and_delete(self.sub_script(), Script.write_bin(sig))
+
+        f = self.verify_signature(sig, pub_key, sub_script)
+
+        if not f and len(sig) > 0:
+            self.script_evaluation_error(
+                f"{_codename} failed to verify the signature, "
+                "and requires an empty signature when verification fails."
+            )
+        self.stack.append(self.encode_bool(f))
+
+        if opcode == OP_CHECKSIGVERIFY:
+            if f:
                 self.stack.pop()
+            else:
+                self.script_evaluation_error("OP_CHECKSIGVERIFY requires that a valid signature is provided.")
+
+    def _op_checkmultisig(self, opcode: int, data: Optional[bytes]) -> None:
+        # OP_CHECKMULTISIG and OP_CHECKMULTISIGVERIFY
+        _codename = OPCODE_NAMES[opcode]
+        i = 1
+        if len(self.stack) < i:
+            self.script_evaluation_error(f"{_codename} requires at least 1 item to be on the stack.")
+
+        keys_count = self.bin2num(self.stacktop(-i))
+        if keys_count < 0 or keys_count > MAX_MULTISIG_KEY_COUNT:
+            _m = f"${_codename} requires a key count between 0 and {MAX_MULTISIG_KEY_COUNT}."
+            self.script_evaluation_error(_m)
+        i += 1
+        i_key = i
+        i += keys_count
 
-                self.stack.append(self.encode_bool(f))
+        # ikey2 is the position of last non-signature item in the stack. Top stack item = 1.
+        # With SCRIPT_VERIFY_NULLFAIL, this is used for cleanup if operation fails.
+        i_key2 = keys_count + 2
+
+        if len(self.stack) < i:
+            _m = f"{_codename} requires the number of stack items not to be less than the number of keys used."
+            self.script_evaluation_error(_m)
+
+        sigs_count = self.bin2num(self.stacktop(-i))
+        if sigs_count < 0 or sigs_count > keys_count:
+            _m = f"{_codename} requires the number of signatures to be no greater than the number of keys."
+            self.script_evaluation_error(_m)
+        i += 1
+        i_sig = i
+        i += sigs_count
+        if len(self.stack) < i:
+            _m = (
+                f"{_codename} requires the number of stack items "
+                "not to be less than the number of signatures provided."
+            )
+            self.script_evaluation_error(_m)
+
+        # Drop the signatures, since there's no way for a signature to sign itself
+        sub_script = self.sub_script()
+        for j in range(sigs_count):
+            sub_script = Script.find_and_delete(sub_script, Script.write_bin(self.stacktop(-i_sig - j)))
+
+        f = True
+        while f and sigs_count > 0:
+            buf_sig = self.stacktop(-i_sig)
+            buf_pub_key = self.stacktop(-i_key)
+
+            if not self.check_signature_encoding(buf_sig) or not self.check_public_key_encoding(buf_pub_key):
+                _m = f"{_codename} requires correct encoding for the public key and signature."
+                self.script_evaluation_error(_m)
 
-                if current_opcode == OpCode.OP_CHECKMULTISIGVERIFY:
-                    if f:
-                        self.stack.pop()
-                    else:
-                        _m = "OP_CHECKMULTISIGVERIFY requires a sufficient number of valid signatures are provided."
-                        self.script_evaluation_error(_m)
-
-            elif current_opcode == OpCode.OP_CAT:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_CAT requires at least two items to be on the stack.")
-                x1 = self.stack.pop(-2)
-                x2 = self.stack.pop()
-                if len(x1) + len(x2) > MAX_SCRIPT_ELEMENT_SIZE:
-                    self.script_evaluation_error(
-                        "It's not currently possible to push data " f"larger than {MAX_SCRIPT_ELEMENT_SIZE} bytes."
-                    )
-                self.stack.append(x1 + x2)
-
-            elif current_opcode == OpCode.OP_SPLIT:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_SPLIT requires at least two items to be on the stack.")
-                x1 = self.stack.pop(-2)
-                #  Make sure the split point is appropriate.
-                n = self.bin2num(self.stack.pop())
-                if n < 0 or n > len(x1):
-                    self.script_evaluation_error(
-                        "OP_SPLIT requires the first stack item to be a non-negative number "
-                        "less than or equal to the size of the second-from-top stack item."
-                    )
-                self.stack.append(x1[:n])
-                self.stack.append(x1[n:])
-
-            elif current_opcode == OpCode.OP_NUM2BIN:
-                if len(self.stack) < 2:
-                    self.script_evaluation_error("OP_NUM2BIN requires at least two items to be on the stack.")
-                size = self.bin2num(self.stack.pop())
-                if size > MAX_SCRIPT_ELEMENT_SIZE:
-                    self.script_evaluation_error(
-                        "It's not currently possible to push data " f"larger than {MAX_SCRIPT_ELEMENT_SIZE} bytes."
-                    )
-                n = self.bin2num(self.stack.pop())
-                x = bytearray(self.minimally_encode(n))
-
-                # Try to see if we can fit that number in the number of byte requested.
-                if len(x) > size:
-                    _m = (
-                        "OP_NUM2BIN requires that the size expressed in the top stack item "
-                        "is large enough to hold the value expressed in the second-from-top stack item."
-                    )
-                    self.script_evaluation_error(_m)
-
-                msb = b"\x00"
-                if len(x) > 0:
-                    msb = x[-1] & 0x80
-                    x[-1] &= 0x7F
-                octets = x + b"\x00" * (size - len(x))
-                octets[-1] |= msb
-
-                self.stack.append(octets)
-
-            elif current_opcode == OpCode.OP_BIN2NUM:
-                if len(self.stack) < 1:
-                    self.script_evaluation_error("OP_BIN2NUM requires at least one item to be on the stack.")
-                x = self.stack.pop()
-                self.stack.append(self.minimally_encode(self.bin2num(x)))
+            f_verify = self.verify_signature(buf_sig, buf_pub_key, sub_script)
 
+            if f_verify:
+                i_sig += 1
+                sigs_count -= 1
+            i_key += 1
+            sigs_count -= 1
+
+            # If there are more signatures left than keys left, then too many signatures have failed
+            if sigs_count > keys_count:
+                f = False
+
+        # Clean up stack of actual arguments
+        del self.stack[len(self.stack) - (i - 1) :]
+
+        # A bug causes CHECKMULTISIG to consume one extra argument whose contents were not checked in any way.
+        #
+        # Unfortunately this is a potential source of mutability,
+        # so optionally verify it is exactly equal to zero prior
+        # to removing it from the stack.
+        if len(self.stack) < 1:
+            self.script_evaluation_error(f"{_codename} requires an extra item to be on the stack.")
+        if len(self.stacktop(-1)) > 0:
+            self.script_evaluation_error(f"{_codename} requires the extra stack item to be empty.")
+        self.stack.pop()
+
+        self.stack.append(self.encode_bool(f))
+
+        if opcode == OP_CHECKMULTISIGVERIFY:
+            if f:
+                self.stack.pop()
             else:
-                self.script_evaluation_error("Invalid opcode!")
+                _m = "OP_CHECKMULTISIGVERIFY requires a sufficient number of valid signatures are provided."
+                self.script_evaluation_error(_m)
+
+    def _op_cat(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_CAT requires at least two items to be on the stack.")
+        x1 = self.stack.pop(-2)
+        x2 = self.stack.pop()
+        if len(x1) + len(x2) > MAX_SCRIPT_ELEMENT_SIZE:
+            self.script_evaluation_error(
+                "It's not currently possible to push data " f"larger than {MAX_SCRIPT_ELEMENT_SIZE} bytes."
+            )
+        self.stack.append(x1 + x2)
+
+    def _op_split(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_SPLIT requires at least two items to be on the stack.")
+        x1 = self.stack.pop(-2)
+        #  Make sure the split point is appropriate.
+        n = self.bin2num(self.stack.pop())
+        if n < 0 or n > len(x1):
+            self.script_evaluation_error(
+                "OP_SPLIT requires the first stack item to be a non-negative number "
+                "less than or equal to the size of the second-from-top stack item."
+            )
+        self.stack.append(x1[:n])
+        self.stack.append(x1[n:])
+
+    def _op_num2bin(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 2:
+            self.script_evaluation_error("OP_NUM2BIN requires at least two items to be on the stack.")
+        size = self.bin2num(self.stack.pop())
+        if size > MAX_SCRIPT_ELEMENT_SIZE:
+            self.script_evaluation_error(
+                "It's not currently possible to push data " f"larger than {MAX_SCRIPT_ELEMENT_SIZE} bytes."
+            )
+        n = self.bin2num(self.stack.pop())
+        x = bytearray(self.minimally_encode(n))
+
+        # Try to see if we can fit that number in the number of byte requested.
+        if len(x) > size:
+            _m = (
+                "OP_NUM2BIN requires that the size expressed in the top stack item "
+                "is large enough to hold the value expressed in the second-from-top stack item."
+            )
+            self.script_evaluation_error(_m)
+
+        msb = 0
+        if len(x) > 0:
+            msb = x[-1] & 0x80
+            x[-1] &= 0x7F
+        octets = x + b"\x00" * (size - len(x))
+        if msb:
+            octets[-1] |= msb
 
-        # Finally, increment the program counter
-        self.program_counter += 1
+        self.stack.append(octets)
+
+    def _op_bin2num(self, opcode: int, data: Optional[bytes]) -> None:
+        if len(self.stack) < 1:
+            self.script_evaluation_error("OP_BIN2NUM requires at least one item to be on the stack.")
+        x = self.stack.pop()
+        self.stack.append(self.minimally_encode(self.bin2num(x)))
 
     def validate(self) -> bool:
         """
         Validates the spend action by interpreting the locking and unlocking scripts.
         Returns true if the scripts are valid and the spend is legitimate, otherwise false.
         """
-        if REQUIRE_PUSH_ONLY_UNLOCKING_SCRIPTS and not self.unlocking_script.is_push_only():
+        if REQUIRE_PUSH_ONLY_UNLOCKING_SCRIPTS and not self.unlocking_program.is_push_only():
             self.script_evaluation_error("Unlocking scripts can only contain push operations, and no other opcodes.")
 
+        if P2PKH_FAST_PATH and self.validate_p2pkh():
+            return True
+
         while True:
             self.step()
-            if self.context == "LockingScript" and self.program_counter >= len(self.locking_script.chunks):
+            if self.context == "LockingScript" and self.program_counter >= len(self.locking_program):
                 break
 
         if len(self.if_stack) > 0:
@@ -792,6 +838,41 @@ class Spend:
 
         return True
 
+    def validate_p2pkh(self) -> bool:
+        """
+        Validates a spend of the P2PKH template directly: minimal pushes of a signature and a public key, the public
+        key hash check, then a single signature verification.
+        Returns true if the spend is valid, otherwise false, also when the scripts are not a P2PKH spend.
+        validate() then runs the interpreter, which reports why the spend fails.
+        """
+        public_key_hash = self.locking_program.p2pkh_hash
+        unlocking_program = self.unlocking_program
+        if public_key_hash is None or len(unlocking_program) != 2:
+            return False
+        if self.context != "UnlockingScript" or self.program_counter != 0 or self.stack:
+            return False
+
+        (sig_opcode, pub_key_opcode), (sig, pub_key) = unlocking_program.opcodes, unlocking_program.data
+        if not sig or not pub_key or sig_opcode > OP_PUSHDATA4 or pub_key_opcode > OP_PUSHDATA4:
+            return False
+        if REQUIRE_MINIMAL_PUSH and not (
+            self.is_push_minimal(sig_opcode, sig) and self.is_push_minimal(pub_key_opcode, pub_key)
+        ):
+            return False
+        # a signature equal to the public key hash would be deleted from the script code by OP_CHECKSIG
+        if sig == public_key_hash or hash160(pub_key) != public_key_hash:
+            return False
+        if not self.check_signature_encoding(sig) or not self.check_public_key_encoding(pub_key):
+            return False
+        if not self.verify_signature(sig, pub_key, self.locking_script):
+            return False
+
+        # where the interpreter would have ended
+        self.context = "LockingScript"
+        self.program_counter = len(self.locking_program)
+        self.stack = [self.encode_bool(True)]
+        return True
+
     def stacktop(self, i: int) -> bytes:
         return self.stack[len(self.stack) + i]
 
@@ -818,33 +899,30 @@ class Spend:
 
     @classmethod
     def is_opcode_disabled(cls, opcode: bytes) -> bool:
-        return (
-            opcode == OpCode.OP_2MUL
-            or opcode == OpCode.OP_2DIV
-            or opcode == OpCode.OP_VERIF
-            or opcode == OpCode.OP_VERNOTIF
-            or opcode == OpCode.OP_VER
-        )
+        return OPCODE_DISABLED[opcode[0]]
 
     @classmethod
     def is_chunk_minimal(cls, chunk: ScriptChunk) -> bool:
-        data = chunk.data
-        op = chunk.op
+        return cls.is_push_minimal(chunk.op[0], chunk.data)
+
+    @staticmethod
+    def is_push_minimal(opcode: int, data: Optional[bytes]) -> bool:
         if data is None:
             return True
-        if len(data) == 0:
-            return op == OpCode.OP_0
-        if len(data) == 1 and 1 <= data[0] <= 16:
-            return op == OpCode.OP_1 + (int.from_bytes(data, "big") - 1).to_bytes(1, "big")
-        if len(data) == 1 and data[0] == 0x81:
-            return op == OpCode.OP_1NEGATE
-        if len(data) <= 75:
-            return op == len(data).to_bytes(1, "big")
-        if len(data) <= 255:
-            return op == OpCode.OP_PUSHDATA1
-        if len(data) <= 65535:
-            return op == OpCode.OP_PUSHDATA2
-        return op == OpCode.OP_PUSHDATA4
+        length = len(data)
+        if length == 0:
+            return opcode == 0
+        if length == 1 and 1 <= data[0] <= 16:
+            return opcode == OP_1 - 1 + data[0]
+        if length == 1 and data[0] == 0x81:
+            return opcode == OpCode.OP_1NEGATE[0]
+        if length <= 75:
+            return opcode == length
+        if length <= 255:
+            return opcode == OP_PUSHDATA1
+        if length <= 65535:
+            return opcode == OpCode.OP_PUSHDATA2[0]
+        return opcode == OP_PUSHDATA4
 
     @classmethod
     def minimally_encode(cls, num: int) -> bytes:
@@ -888,7 +966,7 @@ class Spend:
     @classmethod
     def check_public_key_encoding(cls, octets: bytes) -> bool:
         with suppress(Exception):
-            PublicKey(octets)
+            PublicKey.intern(octets)
             return True
         return False
 
@@ -896,22 +974,115 @@ class Spend:
         if sig == b"":
             return False
 
-        current_input = TransactionInput(
-            source_txid=self.source_txid,
-            source_output_index=self.source_output_index,
-            unlocking_script=self.unlocking_script,
-            sequence=self.input_sequence,
-            sighash=SIGHASH(sig[-1]),
-        )
+        # one input object per spend, only the script code and the sighash type differ between signatures
+        current_input = self._current_input
+        if current_input is None:
+            current_input = TransactionInput(
+                source_txid=self.source_txid,
+                source_output_index=self.source_output_index,
+                unlocking_script=self.unlocking_script,
+                sequence=self.input_sequence,
+            )
+            current_input.satoshis = self.source_satoshis
+            self._current_input = current_input
         current_input.locking_script = sub_script
-        current_input.satoshis = self.source_satoshis
+        current_input.sighash = SIGHASH(sig[-1])
 
-        inputs = self.other_inputs[:]
-        inputs.insert(self.input_index, current_input)
+        if self.preimage_context is None:
+            inputs = self.other_inputs[:]
+            inputs.insert(self.input_index, current_input)
+            self.preimage_context = TransactionPreimageContext(
+                inputs, self.outputs, self.transaction_version, self.lock_time
+            )
 
-        preimage = tx_preimage(self.input_index, inputs, self.outputs, self.transaction_version, self.lock_time)
-        return PublicKey(pub_key).verify(sig[:-1], preimage)
+        digest = hash256(self.preimage_context.preimage(self.input_index, current_input))
+        if SIGNATURE_CACHE.contains(digest, pub_key, sig[:-1]):
+            return True
+        if self.deferred_signatures is not None:
+            self.deferred_signatures.append((pub_key, sig[:-1], digest))
+            return True
+        return PublicKey.intern(pub_key).verify_digest(sig[:-1], digest, check_cache=False)
 
     @classmethod
     def encode_bool(cls, f: bool) -> bytes:
         return b"\x01" if f else b""
+
+
+def _build_opcode_handlers() -> List[Optional[Callable[[Spend, int, Optional[bytes]], None]]]:
+    handlers = {
+        OpCode.OP_1NEGATE: Spend._op_push_number,
+        OpCode.OP_NOP: Spend._op_nop,
+        OpCode.OP_IF: Spend._op_if,
+        OpCode.OP_NOTIF: Spend._op_if,
+        OpCode.OP_ELSE: Spend._op_else,
+        OpCode.OP_ENDIF: Spend._op_endif,
+        OpCode.OP_VERIFY: Spend._op_verify,
+        OpCode.OP_RETURN: Spend._op_return,
+        OpCode.OP_TOALTSTACK: Spend._op_toaltstack,
+        OpCode.OP_FROMALTSTACK: Spend._op_fromaltstack,
+        OpCode.OP_2DROP: Spend._op_2drop,
+        OpCode.OP_2DUP: Spend._op_2dup,
+        OpCode.OP_3DUP: Spend._op_3dup,
+        OpCode.OP_2OVER: Spend._op_2over,
+        OpCode.OP_2ROT: Spend._op_2rot,
+        OpCode.OP_2SWAP: Spend._op_2swap,
+        OpCode.OP_IFDUP: Spend._op_ifdup,
+        OpCode.OP_DEPTH: Spend._op_depth,
+        OpCode.OP_DROP: Spend._op_drop,
+        OpCode.OP_DUP: Spend._op_dup,
+        OpCode.OP_NIP: Spend._op_nip,
+        OpCode.OP_OVER: Spend._op_over,
+        OpCode.OP_PICK: Spend._op_pick_roll,
+        OpCode.OP_ROLL: Spend._op_pick_roll,
+        OpCode.OP_ROT: Spend._op_rot,
+        OpCode.OP_SWAP: Spend._op_swap,
+        OpCode.OP_TUCK: Spend._op_tuck,
+        OpCode.OP_CAT: Spend._op_cat,
+        OpCode.OP_SPLIT: Spend._op_split,
+        OpCode.OP_NUM2BIN: Spend._op_num2bin,
+        OpCode.OP_BIN2NUM: Spend._op_bin2num,
+        OpCode.OP_SIZE: Spend._op_size,
+        OpCode.OP_INVERT: Spend._op_invert,
+        OpCode.OP_EQUAL: Spend._op_equal,
+        OpCode.OP_EQUALVERIFY: Spend._op_equal,
+        OpCode.OP_LSHIFT: Spend._op_shift,
+        OpCode.OP_RSHIFT: Spend._op_shift,
+        OpCode.OP_WITHIN: Spend._op_within,
+        OpCode.OP_CODESEPARATOR: Spend._op_codeseparator,
+        OpCode.OP_CHECKSIG: Spend._op_checksig,
+        OpCode.OP_CHECKSIGVERIFY: Spend._op_checksig,
+        OpCode.OP_CHECKMULTISIG: Spend._op_checkmultisig,
+        OpCode.OP_CHECKMULTISIGVERIFY: Spend._op_checkmultisig,
+        # only splits state from code in locking scripts
+        OpCode.OP_STATESEPARATOR: Spend._op_nop,
+        OpCode.OP_INPUTINDEX: Spend._op_inputindex,
+        OpCode.OP_ACTIVEBYTECODE: Spend._op_activebytecode,
+    }
+    for opcode in range(OP_1, OpCode.OP_16[0] + 1):
+        handlers[bytes([opcode])] = Spend._op_push_number
+    # includes OP_CHECKLOCKTIMEVERIFY and OP_CHECKSEQUENCEVERIFY (NOP2 and NOP3), their checks are not implemented
+    for opcode in range(OpCode.OP_NOP1[0], OpCode.OP_NOP10[0] + 1):
+        handlers[bytes([opcode])] = Spend._op_nop
+    for opcodes, handler in (
+        (BITWISE_OPERATIONS, Spend._op_bitwise),
+        (UNARY_ARITHMETIC_OPERATIONS, Spend._op_unary_arithmetic),
+        (BINARY_ARITHMETIC_OPERATIONS, Spend._op_binary_arithmetic),
+        (HASH_OPERATIONS, Spend._op_hash),
+        (TRANSACTION_INTROSPECTION, Spend._op_transaction_introspection),
+        (INPUT_INTROSPECTION, Spend._op_input_introspection),
+        (OUTPUT_INTROSPECTION, Spend._op_output_introspection),
+        (INPUT_REFERENCE_OPCODES, Spend._op_input_reference),
+        (DISALLOWED_REFERENCE_OPCODES, Spend._op_disallowed_reference),
+        (REFERENCE_QUERIES, Spend._op_reference_query),
+        (CODE_SCRIPT_HASH_QUERIES, Spend._op_code_script_hash_query),
+    ):
+        for opcode in opcodes:
+            handlers[bytes([opcode])] = handler
+
+    table: List[Optional[Callable[[Spend, int, Optional[bytes]], None]]] = [None] * 256
+    for opcode, handler in handlers.items():
+        table[opcode[0]] = handler
+    return table
+
+
+Spend.OPCODE_HANDLERS = _build_opcode_handlers()
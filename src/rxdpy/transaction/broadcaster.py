@@ -0,0 +1,75 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+
+class BroadcastResponse:
+    """
+    The transaction was accepted.
+
+    latency is the number of seconds from sending the transaction to the answer, when measured.
+    """
+
+    def __init__(self, txid: str, message: str = "broadcast successful", latency: Optional[float] = None):
+        self.status = "success"
+        self.txid = txid
+        self.message = message
+        self.latency = latency
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<BroadcastResponse txid={self.txid} message={self.message}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class BroadcastFailure:
+    """
+    The transaction was rejected, or could not be sent.
+    """
+
+    def __init__(self, code: str, description: str, txid: Optional[str] = None, latency: Optional[float] = None):
+        self.status = "error"
+        self.code = code
+        self.description = description
+        self.txid = txid
+        self.latency = latency
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<BroadcastFailure txid={self.txid} code={self.code} description={self.description}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+BroadcastResult = Union[BroadcastResponse, BroadcastFailure]
+
+
+def is_broadcast_response(result: BroadcastResult) -> bool:
+    return result.status == "success"
+
+
+def is_broadcast_failure(result: BroadcastResult) -> bool:
+    return result.status == "error"
+
+
+class Broadcaster(ABC):
+    """
+    Sends transactions to the network.
+    """
+
+    @abstractmethod
+    async def broadcast(self, transaction) -> BroadcastResult:
+        """
+        :returns: BroadcastResponse once accepted, BroadcastFailure otherwise, never raises for a rejection
+        """
+
+    async def close(self) -> None:
+        """
+        releases the connections of the broadcaster
+        """
+
+    async def __aenter__(self) -> "Broadcaster":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -0,0 +1,10 @@
+from .electrumx import ElectrumXBroadcaster
+from .in_memory import InMemoryBroadcaster
+from .queue import BroadcastQueue, BroadcastStats
+
+
+def default_broadcaster() -> ElectrumXBroadcaster:
+    """
+    :returns: a broadcaster to the ElectrumX server at RXD_PY_SDK_ELECTRUMX_URL, to be closed after use
+    """
+    return ElectrumXBroadcaster()
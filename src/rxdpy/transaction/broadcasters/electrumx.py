@@ -0,0 +1,43 @@
+import time
+from typing import Union
+
+from ..broadcaster import Broadcaster, BroadcastFailure, BroadcastResponse, BroadcastResult
+from ...constants import ELECTRUMX_URL
+from ...network.electrumx import ElectrumXClient, ElectrumXError
+
+
+class ElectrumXBroadcaster(Broadcaster):
+    """
+    Sends transactions with blockchain.transaction.broadcast, over the pooled connections of an ElectrumXClient.
+    Concurrent broadcasts are pipelined: each is sent without waiting for the answers to the others.
+    """
+
+    def __init__(self, client: Union[ElectrumXClient, str] = ELECTRUMX_URL):
+        """
+        :param client: client to send through, or url of a server to open a client of our own to
+        """
+        self._owns_client = isinstance(client, str)
+        self.client = ElectrumXClient(client) if isinstance(client, str) else client
+
+    async def broadcast(self, transaction) -> BroadcastResult:
+        txid = transaction.txid()
+        start = time.perf_counter()
+        try:
+            accepted = await self.client.broadcast(transaction.hex())
+        except ElectrumXError as e:
+            return BroadcastFailure(str(e.code), e.message, txid, time.perf_counter() - start)
+        except Exception as e:
+            # connection lost or timed out, the server may or may not have the transaction
+            return BroadcastFailure("network", str(e) or type(e).__name__, txid, time.perf_counter() - start)
+        return BroadcastResponse(accepted, latency=time.perf_counter() - start)
+
+    async def close(self) -> None:
+        # a client passed in is closed by its owner
+        if self._owns_client:
+            await self.client.close()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<ElectrumXBroadcaster url={self.client.url}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
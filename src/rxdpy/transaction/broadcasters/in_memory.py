@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from ...utxo import Outpoint
+from ..broadcaster import Broadcaster, BroadcastFailure, BroadcastResponse, BroadcastResult
+
+
+class InMemoryBroadcaster(Broadcaster):
+    """
+    Broadcaster accepting transactions into a mempool in memory, to test and load test code that broadcasts without
+    a network.
+
+    It rejects a transaction spending an output already spent by another one, and with check_inputs one spending an
+    output of a transaction it neither accepted nor was told is confirmed, the way a node would. Each broadcast
+    takes latency seconds, the largest number of broadcasts seen in flight at once is kept in max_in_flight.
+
+    Example:
+        broadcaster = InMemoryBroadcaster(latency=0.05, check_inputs=True, confirmed=[funding_txid])
+        results = await BroadcastQueue(broadcaster).broadcast_many(txs)
+        assert list(broadcaster.transactions) == [tx.txid() for tx in txs]
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        check_inputs: bool = False,
+        confirmed: Iterable[str] = (),
+        reject: Optional[Callable[..., Optional[BroadcastFailure]]] = None,
+    ):
+        """
+        :param latency: seconds every broadcast takes
+        :param check_inputs: if True then reject transactions spending outputs of unknown transactions
+        :param confirmed: txids whose outputs can be spent besides the ones of accepted transactions
+        :param reject: optional check called with each new transaction, returns a BroadcastFailure to reject it
+        """
+        self.latency = latency
+        self.check_inputs = check_inputs
+        self.confirmed: Set[str] = set(confirmed)
+        self.reject = reject
+        # raw transactions accepted, in the order they were accepted
+        self.transactions: Dict[str, str] = {}
+        # txid of the transaction spending each output
+        self.spent: Dict[Outpoint, str] = {}
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def broadcast(self, transaction) -> BroadcastResult:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            result = self._accept(transaction)
+        finally:
+            self.in_flight -= 1
+        result.latency = time.perf_counter() - start
+        return result
+
+    def _accept(self, transaction) -> BroadcastResult:
+        txid = transaction.txid()
+        if txid in self.transactions:
+            return BroadcastResponse(txid, "already known")
+        outpoints = [(tx_input.source_txid, tx_input.source_output_index) for tx_input in transaction.inputs]
+        for source_txid, index in outpoints:
+            if (source_txid, index) in self.spent:
+                return BroadcastFailure("txn-mempool-conflict", f"{source_txid}:{index} is already spent", txid)
+            if self.check_inputs and source_txid not in self.transactions and source_txid not in self.confirmed:
+                return BroadcastFailure("missing-inputs", f"unknown transaction {source_txid}", txid)
+        failure = self.reject(transaction) if self.reject is not None else None
+        if failure is not None:
+            failure.txid = txid
+            return failure
+        self.transactions[txid] = transaction.hex()
+        self.spent.update((outpoint, txid) for outpoint in outpoints)
+        return BroadcastResponse(txid)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<InMemoryBroadcaster transactions={len(self.transactions)} calls={self.calls}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
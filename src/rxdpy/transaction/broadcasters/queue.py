@@ -0,0 +1,186 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+from ..broadcaster import Broadcaster, BroadcastFailure, BroadcastResult, is_broadcast_failure
+
+# broadcasts awaiting their answer at once, further transactions wait for a slot
+BROADCAST_MAX_IN_FLIGHT = 256
+
+
+class BroadcastStats:
+    """
+    Outcome and latency counters of the broadcasts of a queue, latencies in seconds
+    """
+
+    def __init__(self):
+        self.accepted: int = 0
+        self.failed: int = 0
+        # submissions answered with the broadcast of the same txid
+        self.duplicates: int = 0
+        self.total_latency: float = 0.0
+        self.max_latency: float = 0.0
+
+    def record(self, result: BroadcastResult) -> None:
+        if is_broadcast_failure(result):
+            self.failed += 1
+        else:
+            self.accepted += 1
+        if result.latency is not None:
+            self.total_latency += result.latency
+            self.max_latency = max(self.max_latency, result.latency)
+
+    @property
+    def mean_latency(self) -> float:
+        sent = self.accepted + self.failed
+        return self.total_latency / sent if sent else 0.0
+
+    def reset(self) -> None:
+        self.accepted = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def __str__(self) -> str:  # pragma: no cover
+        return (
+            f"<BroadcastStats accepted={self.accepted} failed={self.failed} duplicates={self.duplicates} "
+            f"mean_latency={self.mean_latency:.3f}>"
+        )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class BroadcastQueue(Broadcaster):
+    """
+    Broadcasts transactions through another broadcaster, up to max_in_flight at once.
+
+    A transaction is sent once per txid: submitting it again while it is in flight or after it was accepted answers
+    with the same result, only a rejected transaction is sent again. A transaction spending an output of one submitted
+    earlier is sent once its parent is accepted, and fails without being sent if the parent is rejected, so chains of
+    unconfirmed transactions can be submitted at once. broadcast_many() orders the transactions it is given parents
+    first. Every result carries its latency, stats aggregates them.
+
+    Example:
+        async with BroadcastQueue(ElectrumXBroadcaster(url)) as queue:
+            results = await queue.broadcast_many(txs)
+            print(queue.stats)
+    """
+
+    def __init__(self, broadcaster: Broadcaster, max_in_flight: int = BROADCAST_MAX_IN_FLIGHT):
+        self.broadcaster = broadcaster
+        self.max_in_flight = max_in_flight
+        self.stats = BroadcastStats()
+        # result of every txid submitted, kept to answer duplicates until clear()
+        self._results: Dict[str, asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    def submit(self, transaction) -> "asyncio.Future[BroadcastResult]":
+        """
+        queues the transaction, to be called from within the event loop
+
+        :returns: a future of its result
+        """
+        txid = transaction.txid()
+        result = self._results.get(txid)
+        if result is not None and not (result.done() and (result.cancelled() or is_broadcast_failure(result.result()))):
+            self.stats.duplicates += 1
+            return result
+        parents = []
+        for tx_input in transaction.inputs:
+            parent = self._results.get(tx_input.source_txid)
+            if parent is not None and parent not in parents:
+                parents.append(parent)
+        result = asyncio.ensure_future(self._send(transaction, txid, parents))
+        self._results[txid] = result
+        return result
+
+    async def _send(self, transaction, txid: str, parents: List[asyncio.Future]) -> BroadcastResult:
+        for parent in parents:
+            # shielded, the parent is not cancelled along with its child
+            parent_result = await asyncio.shield(parent)
+            if is_broadcast_failure(parent_result):
+                failure = BroadcastFailure(
+                    "parent-rejected",
+                    f"parent {parent_result.txid} was rejected: {parent_result.description}",
+                    txid,
+                )
+                self.stats.record(failure)
+                return failure
+        async with self.slots:
+            start = time.perf_counter()
+            try:
+                result = await self.broadcaster.broadcast(transaction)
+            except Exception as e:
+                result = BroadcastFailure(type(e).__name__, str(e), txid)
+            if result.latency is None:
+                result.latency = time.perf_counter() - start
+        self.stats.record(result)
+        return result
+
+    async def broadcast(self, transaction) -> BroadcastResult:
+        return await self.submit(transaction)
+
+    async def broadcast_many(self, transactions: Iterable) -> List[BroadcastResult]:
+        """
+        :returns: result of each transaction, in the order given
+        """
+        transactions = list(transactions)
+        by_txid = {transaction.txid(): transaction for transaction in transactions}
+        # depth first, parents before children, iteratively as chains can be long
+        ordered = []
+        visited = set()
+        for root in by_txid:
+            stack = [(root, False)]
+            while stack:
+                txid, expanded = stack.pop()
+                if expanded:
+                    ordered.append(by_txid[txid])
+                    continue
+                if txid in visited:
+                    continue
+                visited.add(txid)
+                stack.append((txid, True))
+                for tx_input in by_txid[txid].inputs:
+                    if tx_input.source_txid in by_txid and tx_input.source_txid not in visited:
+                        stack.append((tx_input.source_txid, False))
+        results = {transaction.txid(): self.submit(transaction) for transaction in ordered}
+        await asyncio.gather(*results.values())
+        return [results[transaction.txid()].result() for transaction in transactions]
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for result in self._results.values() if not result.done())
+
+    async def join(self) -> None:
+        """
+        waits until every transaction submitted has its result
+        """
+        while self.pending:
+            await asyncio.gather(*[result for result in self._results.values() if not result.done()])
+
+    def clear(self) -> None:
+        """
+        forgets the transactions that have their result, they are sent again if submitted again
+        """
+        self._results = {txid: result for txid, result in self._results.items() if not result.done()}
+
+    async def close(self) -> None:
+        """
+        waits for the pending transactions then closes the broadcaster
+        """
+        await self.join()
+        await self.broadcaster.close()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<BroadcastQueue broadcaster={self.broadcaster} pending={self.pending} stats={self.stats}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -0,0 +1,195 @@
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Optional, Union
+
+from ..hash import hash256
+from ..script.script import Script
+from ..utils import MemoryReader
+from .transaction import Transaction
+from .transaction_input import TransactionInput
+from .transaction_output import TransactionOutput
+
+
+class LazyItems(Sequence):
+    """
+    Inputs or outputs of a serialized transaction, each one parsed on first access then cached
+    """
+
+    def __init__(self, raw: memoryview, offsets: List[int], parse: Callable[[MemoryReader], Optional[object]]):
+        """
+        :param raw: the serialized transaction
+        :param offsets: start offset of each item in raw, followed by the end offset of the last one
+        :param parse: builds an item from a reader over its bytes
+        """
+        self._raw = raw
+        self._offsets = offsets
+        self._parse = parse
+        self._items: List[Optional[object]] = [None] * (len(offsets) - 1)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if item is None:
+            index %= len(self._items)
+            item = self._parse(MemoryReader(self._raw[self._offsets[index] : self._offsets[index + 1]]))
+            if item is None:
+                raise ValueError(f"malformed transaction item at offset {self._offsets[index]}")
+            self._items[index] = item
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class LazyTransaction:
+    """
+    Read-only view over a serialized transaction.
+
+    Parsing only walks the varints to record where each input, output and script starts, the same way
+    Transaction.parse_script_offsets() does. Inputs, outputs and scripts are built on first access and cached,
+    the transaction bytes themselves are never copied: they stay a slice of the buffer they were read from.
+
+    Example:
+        tx = LazyTransaction(raw)
+        txid = tx.txid()
+        satoshis = tx.output_satoshis(0)
+        locking_script = tx.outputs[0].locking_script
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, str]):
+        if isinstance(data, str):
+            data = bytes.fromhex(data)
+        self._parse(MemoryReader(data))
+
+    @classmethod
+    def from_reader(cls, reader: MemoryReader) -> "LazyTransaction":
+        """
+        Parses the transaction starting at the current position of the reader and leaves the reader right after it
+        """
+        tx = cls.__new__(cls)
+        tx._parse(reader)
+        return tx
+
+    def _parse(self, reader: MemoryReader) -> None:
+        start = reader.tell()
+        self.version: int = self._read(reader.read_uint32_le())
+
+        inputs_count = self._read(reader.read_var_int_num())
+        # offsets are relative to the start of the transaction
+        self._input_offsets: List[int] = []
+        self._input_script_offsets: List[int] = []
+        for _ in range(inputs_count):
+            self._input_offsets.append(reader.tell() - start)
+            reader.skip(36)  # txid and vout
+            script_length = self._read(reader.read_var_int_num())
+            self._input_script_offsets.append(reader.tell() - start)
+            reader.skip(script_length + 4)  # script and sequence
+        self._input_offsets.append(reader.tell() - start)
+
+        outputs_count = self._read(reader.read_var_int_num())
+        self._output_offsets: List[int] = []
+        self._output_script_offsets: List[int] = []
+        for _ in range(outputs_count):
+            self._output_offsets.append(reader.tell() - start)
+            reader.skip(8)  # satoshis
+            script_length = self._read(reader.read_var_int_num())
+            self._output_script_offsets.append(reader.tell() - start)
+            reader.skip(script_length)
+        self._output_offsets.append(reader.tell() - start)
+
+        self.locktime: int = self._read(reader.read_uint32_le())
+        self.raw: memoryview = reader.getbuffer()[start : reader.tell()]
+        self._hash: Optional[bytes] = None
+        self.inputs: LazyItems = LazyItems(self.raw, self._input_offsets, TransactionInput.from_hex)
+        self.outputs: LazyItems = LazyItems(self.raw, self._output_offsets, TransactionOutput.from_hex)
+
+    @staticmethod
+    def _read(value: Optional[int]) -> int:
+        if value is None:
+            raise ValueError("truncated transaction")
+        return value
+
+    def serialize(self) -> bytes:
+        return self.raw.tobytes()
+
+    def hex(self) -> str:
+        return self.raw.hex()
+
+    def byte_length(self) -> int:
+        return len(self.raw)
+
+    size = byte_length
+
+    def hash(self) -> bytes:
+        if self._hash is None:
+            self._hash = hash256(self.raw)
+        return self._hash
+
+    def txid(self) -> str:
+        return self.hash()[::-1].hex()
+
+    def is_coinbase(self) -> bool:
+        return len(self.inputs) == 1 and self.source_txid(0) == "00" * 32
+
+    def source_txid(self, index: int) -> str:
+        offset = self._input_offsets[index]
+        return self.raw[offset : offset + 32][::-1].hex()
+
+    def source_output_index(self, index: int) -> int:
+        offset = self._input_offsets[index] + 32
+        return int.from_bytes(self.raw[offset : offset + 4], "little")
+
+    def sequence(self, index: int) -> int:
+        offset = self._input_offsets[index + 1] - 4
+        return int.from_bytes(self.raw[offset : offset + 4], "little")
+
+    def unlocking_script_bytes(self, index: int) -> memoryview:
+        return self.raw[self._input_script_offsets[index] : self._input_offsets[index + 1] - 4]
+
+    def unlocking_script(self, index: int) -> Script:
+        return self.inputs[index].unlocking_script
+
+    def output_satoshis(self, index: int) -> int:
+        offset = self._output_offsets[index]
+        return int.from_bytes(self.raw[offset : offset + 8], "little")
+
+    def locking_script_bytes(self, index: int) -> memoryview:
+        return self.raw[self._output_script_offsets[index] : self._output_offsets[index + 1]]
+
+    def locking_script(self, index: int) -> Script:
+        return self.outputs[index].locking_script
+
+    def script_offsets(self) -> Dict[str, List[Dict[str, int]]]:
+        """
+        :returns: the same offsets as Transaction.parse_script_offsets() without parsing the transaction again
+        """
+        return {
+            "inputs": [
+                {
+                    "vin": i,
+                    "offset": offset,
+                    "length": self._input_offsets[i + 1] - 4 - offset,
+                }
+                for i, offset in enumerate(self._input_script_offsets)
+            ],
+            "outputs": [
+                {
+                    "vout": i,
+                    "offset": offset,
+                    "length": self._output_offsets[i + 1] - offset,
+                }
+                for i, offset in enumerate(self._output_script_offsets)
+            ],
+        }
+
+    def to_transaction(self) -> Transaction:
+        """
+        :returns: the fully parsed Transaction
+        """
+        return Transaction.from_reader(MemoryReader(self.raw))
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<LazyTransaction txid={self.txid()} inputs={len(self.inputs)} outputs={len(self.outputs)}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -2,8 +2,7 @@ import math
 from contextlib import suppress
 from typing import List, Optional, Union, Dict, Any
 
-# from .broadcaster import Broadcaster, BroadcastResponse
-# from .broadcasters import default_broadcaster
+from .broadcaster import Broadcaster, BroadcastResult
 
 # from .chaintracker import ChainTracker
 # from .chaintrackers import default_chain_tracker
@@ -12,7 +11,10 @@ from ..constants import (
     TRANSACTION_VERSION,
     TRANSACTION_LOCKTIME,
     TRANSACTION_FEE_RATE,
+    THREAD_POOL_MAX_EXECUTORS,
+    PROCESS_POOL_MAX_EXECUTORS,
 )
+from ..cache import CacheStats
 from ..hash import hash256
 from ..merkle_path import MerklePath
 from ..script.spend import Spend
@@ -20,8 +22,11 @@ from ..script.type import P2PKH
 from .transaction_input import TransactionInput
 from .transaction_output import TransactionOutput
 
-from .transaction_preimage import tx_preimage
-from ..utils import unsigned_to_varint, Reader, Writer, reverse_hex_byte_order
+from .transaction_preimage import TransactionPreimageContext
+from .transaction_revision import Revision, RevisedList
+from .transaction_signer import BatchSigner
+from .transaction_verifier import TransactionVerifier, VerificationReport, verify_transaction
+from ..utils import unsigned_to_varint, BinaryReader, Reader, Writer, reverse_hex_byte_order
 
 
 class InsufficientFunds(ValueError):
@@ -29,6 +34,16 @@ class InsufficientFunds(ValueError):
 
 
 class Transaction:
+    """
+    The input and output lists passed in or assigned are copied into lists of the transaction's own, which track
+    changes made to them in place. Changing the original lists afterwards does not change the transaction.
+    """
+
+    # fields written by serialize(), overwriting them invalidates the cached serialization and hash
+    _SERIALIZED_FIELDS = frozenset(["inputs", "outputs", "version", "locktime"])
+    # hits and misses of the serialization and hash caches of all transactions
+    cache_stats = CacheStats()
+
     def __init__(
         self,
         tx_inputs: Optional[List[TransactionInput]] = None,
@@ -38,28 +53,68 @@ class Transaction:
         merkle_path: Optional[MerklePath] = None,
         **kwargs,
     ):
+        self._serialized: Optional[bytes] = None
+        self._hash: Optional[bytes] = None
+        self._cache_key: Optional[int] = None
+        # bumped by the input and output lists below and by the inputs and outputs in them
+        self._revision = Revision()
         self.inputs: List[TransactionInput] = tx_inputs or []
         self.outputs: List[TransactionOutput] = tx_outputs or []
         self.version: int = version
         self.locktime: int = locktime
         self.merkle_path = merkle_path
+        self._preimage_context: Optional[TransactionPreimageContext] = None
 
         self.kwargs: Dict[str, Any] = dict(**kwargs) or {}
 
+    def __setattr__(self, name, value):
+        if name in ("inputs", "outputs") and not (isinstance(value, RevisedList) and value.revision is self._revision):
+            # copied into a list of this transaction's own, so that changes made to it in place are tracked as well
+            value = RevisedList(value, self._revision)
+        super().__setattr__(name, value)
+        if name in self._SERIALIZED_FIELDS:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached serialization and hash. Never needed for correctness: changes of this transaction, of its
+        inputs and outputs and of the input and output lists themselves are tracked automatically.
+        """
+        self._serialized = None
+        self._hash = None
+        self._cache_key = None
+
+    def _current_cache_key(self) -> int:
+        # in-place changes of inputs and outputs bump the revision too, see RevisedList
+        return self._revision.serialization
+
+    def _cache_serialized(self, raw: bytes) -> None:
+        self._serialized = raw
+        self._hash = None
+        self._cache_key = self._current_cache_key()
+
     def serialize(self) -> bytes:
-        raw = self.version.to_bytes(4, "little")
-        raw += unsigned_to_varint(len(self.inputs))
-        for tx_input in self.inputs:
-            raw += tx_input.serialize()
-        raw += unsigned_to_varint(len(self.outputs))
-        for tx_output in self.outputs:
-            raw += tx_output.serialize()
-        raw += self.locktime.to_bytes(4, "little")
+        if self._serialized is not None and self._cache_key == self._current_cache_key():
+            Transaction.cache_stats.hit()
+            return self._serialized
+        Transaction.cache_stats.miss()
+        raw = b"".join(
+            [
+                self.version.to_bytes(4, "little"),
+                unsigned_to_varint(len(self.inputs)),
+                *[tx_input.serialize() for tx_input in self.inputs],
+                unsigned_to_varint(len(self.outputs)),
+                *[tx_output.serialize() for tx_output in self.outputs],
+                self.locktime.to_bytes(4, "little"),
+            ]
+        )
+        self._cache_serialized(raw)
         return raw
 
     def add_input(self, tx_input: TransactionInput) -> "Transaction":  # pragma: no cover
         if isinstance(tx_input, TransactionInput):
             self.inputs.append(tx_input)
+            self.invalidate()
         else:
             raise TypeError("unsupported transaction input type")
         return self
@@ -71,6 +126,7 @@ class Transaction:
 
     def add_output(self, tx_output: TransactionOutput) -> "Transaction":  # pragma: no cover
         self.outputs.append(tx_output)
+        self.invalidate()
         return self
 
     def add_outputs(self, tx_outputs: List[TransactionOutput]) -> "Transaction":
@@ -87,11 +143,28 @@ class Transaction:
     raw = hex
 
     def hash(self) -> bytes:
-        return hash256(self.serialize())
+        if self._hash is not None and self._cache_key == self._current_cache_key():
+            Transaction.cache_stats.hit()
+            return self._hash
+        raw = self.serialize()
+        self._hash = hash256(raw)
+        return self._hash
 
     def txid(self) -> str:
         return self.hash()[::-1].hex()
 
+    def preimage_context(self) -> TransactionPreimageContext:
+        """
+        :returns: the sighash context shared by the preimages of all inputs of this transaction
+        """
+        context = self._preimage_context
+        if context is None or not context.matches(self.inputs, self.outputs, self.version, self.locktime):
+            context = TransactionPreimageContext(
+                self.inputs, self.outputs, self.version, self.locktime, self._revision
+            )
+            self._preimage_context = context
+        return context
+
     def preimage(self, index: int) -> bytes:
         """
         :returns: digest of the input specified by index
@@ -99,13 +172,29 @@ class Transaction:
         assert (
                 0 <= index < len(self.inputs)
         ), f"index out of range [0, {len(self.inputs)})"
-        return tx_preimage(index, self.inputs, self.outputs, self.version, self.locktime)
+        return self.preimage_context().preimage(index)
 
-    def sign(self, bypass: bool = True) -> "Transaction":  # pragma: no cover
+    def sign(self, bypass: bool = True, parallel: Union[bool, int] = False) -> "Transaction":  # pragma: no cover
         """
         :bypass: if True then ONLY sign inputs which unlocking script is None, otherwise sign all the inputs
+        :parallel: if True (or the number of worker threads) then sign the inputs on a thread pool
         sign all inputs according to their script type
         """
+        if parallel:
+            max_workers = THREAD_POOL_MAX_EXECUTORS if parallel is True else parallel
+            with BatchSigner(max_workers=max_workers) as signer:
+                return signer.sign(self, bypass)
+
+        for i in self.inputs_to_sign(bypass):
+            tx_input = self.inputs[i]
+            tx_input.unlocking_script = tx_input.unlocking_script_template.sign(self, i)
+        return self
+
+    def inputs_to_sign(self, bypass: bool = True) -> List[int]:
+        """
+        :bypass: if True then ONLY return inputs which unlocking script is None, otherwise return all the inputs
+        :returns: indexes of the inputs to sign, once checked that the transaction is ready to be signed
+        """
         for out in self.outputs:
             if out.satoshis is None:
                 if out.change:
@@ -117,11 +206,7 @@ class Transaction:
                         "One or more transaction outputs is missing an amount. Ensure all output amounts are provided before signing."
                     )
 
-        for i in range(len(self.inputs)):
-            tx_input = self.inputs[i]
-            if tx_input.unlocking_script is None or not bypass:
-                tx_input.unlocking_script = tx_input.unlocking_script_template.sign(self, i)
-        return self
+        return [i for i, tx_input in enumerate(self.inputs) if tx_input.unlocking_script is None or not bypass]
 
     def total_value_in(self) -> int:
         return sum([tx_input.satoshis for tx_input in self.inputs])
@@ -183,9 +268,13 @@ class Transaction:
 
         change = 0
         for tx_in in self.inputs:
-            if not tx_in.source_transaction:
+            if tx_in.source_transaction:
+                change += tx_in.source_transaction.outputs[tx_in.source_output_index].satoshis
+            elif tx_in.satoshis is not None:
+                # e.g. an input built from a listed unspent output
+                change += tx_in.satoshis
+            else:
                 raise ValueError("Source transactions are required for all inputs during fee computation")
-            change += tx_in.source_transaction.outputs[tx_in.source_output_index].satoshis
 
         change -= fee
 
@@ -212,13 +301,21 @@ class Transaction:
                 if out.change:
                     out.satoshis = per_output
 
-    # async def broadcast(
-    #     self, broadcaster: Broadcaster = default_broadcaster(), check_fee: bool = True
-    # ) -> BroadcastResponse:  # pragma: no cover
-    #     return await broadcaster.broadcast(self)
+    async def broadcast(self, broadcaster: Optional[Broadcaster] = None) -> BroadcastResult:
+        """
+        :param broadcaster: by default a broadcaster to the ElectrumX server at RXD_PY_SDK_ELECTRUMX_URL, opened and
+            closed for this transaction
+        """
+        if broadcaster is not None:
+            return await broadcaster.broadcast(self)
+        # imported here, transactions built and parsed offline do not load the network package
+        from .broadcasters import default_broadcaster
+
+        async with default_broadcaster() as broadcaster:
+            return await broadcaster.broadcast(self)
 
     @classmethod
-    def from_hex(cls, stream: Union[str, bytes, Reader]) -> Optional["Transaction"]:
+    def from_hex(cls, stream: Union[str, bytes, BinaryReader]) -> Optional["Transaction"]:
         with suppress(Exception):
             if isinstance(stream, str):
                 return cls.from_reader(Reader(bytes.fromhex(stream)))
@@ -228,10 +325,10 @@ class Transaction:
         return None
 
     @classmethod
-    def from_beef(cls, stream: Union[str, bytes, Reader]) -> "Transaction":
+    def from_beef(cls, stream: Union[str, bytes, BinaryReader]) -> "Transaction":
         stream = (
             stream
-            if isinstance(stream, Reader)
+            if isinstance(stream, BinaryReader)
             else Reader(stream if isinstance(stream, bytes) else bytes.fromhex(stream))
         )
         version = stream.read_uint32_le()
@@ -357,79 +454,85 @@ class Transaction:
         return writer.to_bytes()
 
     @classmethod
-    def from_reader(cls, reader: Reader) -> "Transaction":
+    def from_reader(cls, reader: BinaryReader) -> "Transaction":
+        start = reader.tell()
         t = cls()
         t.version = reader.read_uint32_le()
         assert t.version is not None
+        # filled as plain lists then assigned, appending to the tracked ones would bump the revisions each time
+        inputs = []
         inputs_count = reader.read_var_int_num()
         assert inputs_count is not None
         for _ in range(inputs_count):
             _input = TransactionInput.from_hex(reader)
             assert _input is not None
-            t.inputs.append(_input)
+            inputs.append(_input)
+        t.inputs = inputs
+        outputs = []
         outputs_count = reader.read_var_int_num()
         assert outputs_count is not None
         for _ in range(outputs_count):
             _output = TransactionOutput.from_hex(reader)
             assert _output is not None
-            t.outputs.append(_output)
+            outputs.append(_output)
+        t.outputs = outputs
         t.locktime = reader.read_uint32_le()
         assert t.locktime is not None
+        # keep the raw bytes, so that txid() does not need to serialize the parsed transaction again
+        with reader.getbuffer() as buffer:
+            t._cache_serialized(bytes(buffer[start : reader.tell()]))
         return t
 
-    # async def verify(self, chaintracker: Optional[ChainTracker] = default_chain_tracker(), scripts_only=False) -> bool:
-    #     if self.merkle_path and not scripts_only:
-    #         proof_valid = await self.merkle_path.verify(self.txid(), chaintracker)
-    #         if proof_valid:
-    #             return True
-
-    #     input_total = 0
-    #     for i, tx_input in enumerate(self.inputs):
-    #         if not tx_input.source_transaction:
-    #             raise ValueError(
-    #                 f"Verification failed because the input at index {i} of transaction {self.txid()} "
-    #                 f"is missing an associated source transaction. "
-    #                 f"This source transaction is required for transaction verification because there is no "
-    #                 f"merkle proof for the transaction spending a UTXO it contains.")
-    #         if not tx_input.unlocking_script:
-    #             raise ValueError(
-    #                 f"Verification failed because the input at index {i} of transaction {self.txid()} "
-    #                 f"is missing an associated unlocking script. "
-    #                 f"This script is required for transaction verification because there is no "
-    #                 f"merkle proof for the transaction spending the UTXO.")
-
-    #         source_output = tx_input.source_transaction.outputs[tx_input.source_output_index]
-    #         input_total += source_output.satoshis
-
-    #         input_verified = await tx_input.source_transaction.verify(chaintracker)
-    #         if not input_verified:
-    #             return False
-
-    #         other_inputs = self.inputs[:i] + self.inputs[i + 1:]
-    #         spend = Spend({
-    #             'sourceTXID': tx_input.source_transaction.txid(),
-    #             'sourceOutputIndex': tx_input.source_output_index,
-    #             'sourceSatoshis': source_output.satoshis,
-    #             'lockingScript': source_output.locking_script,
-    #             'transactionVersion': self.version,
-    #             'otherInputs': other_inputs,
-    #             'inputIndex': i,
-    #             'unlockingScript': tx_input.unlocking_script,
-    #             'outputs': self.outputs,
-    #             'inputSequence': tx_input.sequence,
-    #             'lockTime': self.locktime,
-    #         })
-    #         spend_valid = spend.validate()
-    #         if not spend_valid:
-    #             return False
-
-    #     output_total = 0
-    #     for out in self.outputs:
-    #         if not out.satoshis:
-    #             raise ValueError("Every output must have a defined amount during transaction verification.")
-    #         output_total += out.satoshis
-
-    #     return output_total <= input_total
+    def check_verifiable(self) -> None:
+        """
+        :raises ValueError: if an input misses what its script validation needs, or an output misses its amount
+        """
+        for i, tx_input in enumerate(self.inputs):
+            if tx_input.locking_script is None or tx_input.satoshis is None:
+                raise ValueError(
+                    f"Verification failed because the input at index {i} of transaction {self.txid()} "
+                    f"is missing the locking script or the amount of the output it spends. "
+                    f"Set its source transaction, or its locking_script and satoshis."
+                )
+            if not tx_input.unlocking_script:
+                raise ValueError(
+                    f"Verification failed because the input at index {i} of transaction {self.txid()} "
+                    f"is missing an associated unlocking script."
+                )
+        for out in self.outputs:
+            if out.satoshis is None:
+                raise ValueError("Every output must have a defined amount during transaction verification.")
+
+    def verify_inputs(
+        self, parallel: Union[bool, int, TransactionVerifier] = False, fail_fast: bool = True
+    ) -> VerificationReport:
+        """
+        Checks the references of the outputs, then validates the scripts of every input, one Spend per input sharing
+        the sighash and introspection contexts.
+
+        :parallel: if True (or the number of worker processes, or a TransactionVerifier to reuse) then validate the
+            inputs on a process pool
+        :fail_fast: if True then stop validating at the first input failing
+        :returns: the per-input report
+        """
+        if isinstance(parallel, TransactionVerifier):
+            return parallel.verify(self, fail_fast)
+        if parallel:
+            max_workers = PROCESS_POOL_MAX_EXECUTORS if parallel is True else parallel
+            with TransactionVerifier(max_workers=max_workers) as verifier:
+                return verifier.verify(self, fail_fast)
+
+        return verify_transaction(self, fail_fast)
+
+    def verify(self, parallel: Union[bool, int, TransactionVerifier] = False) -> bool:
+        """
+        Merkle proofs are not checked, the scripts of all inputs are validated against the outputs they spend.
+
+        :parallel: same as verify_inputs()
+        :returns: True if every input script is valid, the outputs do not spend more than the inputs and only carry
+            references the transaction may push
+        """
+        return self.verify_inputs(parallel).valid
 
     @classmethod
     def parse_script_offsets(cls, octets: Union[bytes, str]) -> Dict[str, List[Dict[str, int]]]:
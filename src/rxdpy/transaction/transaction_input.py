@@ -6,10 +6,16 @@ from ..constants import SIGHASH
 from ..constants import TRANSACTION_SEQUENCE
 from ..script.script import Script
 from ..script.unlocking_template import UnlockingScriptTemplate
-from ..utils import Reader
+from ..utils import BinaryReader, Reader
+from .transaction_revision import RevisedItem
 
 
-class TransactionInput:
+class TransactionInput(RevisedItem):
+    # fields hashed into hashPrevouts / hashSequence, overwriting them invalidates cached sighash digests
+    _SIGHASH_FIELDS = frozenset(["source_txid", "source_output_index", "sequence"])
+    # fields written by serialize(), overwriting them invalidates cached serializations
+    _SERIALIZED_FIELDS = frozenset(["source_txid", "source_output_index", "unlocking_script", "sequence"])
+
     def __init__(
         self,
         source_transaction=None,
@@ -20,13 +26,15 @@ class TransactionInput:
         sequence: int = TRANSACTION_SEQUENCE,
         sighash: SIGHASH = SIGHASH.ALL_FORKID,
     ):
+        super().__init__()
+        self._serialized: Optional[bytes] = None
         utxo = None
         if source_transaction:
             utxo = source_transaction.outputs[source_output_index]
 
-        self.source_txid = source_txid
         if source_transaction and not source_txid:
-            self.source_txid = source_transaction.txid()
+            source_txid = source_transaction.txid()
+        self.source_txid = source_txid
 
         self.source_output_index: int = source_output_index
         self.satoshis: int = utxo.satoshis if utxo else None
@@ -37,7 +45,20 @@ class TransactionInput:
         self.sequence: int = sequence
         self.sighash: SIGHASH = sighash
 
+    def __setattr__(self, name, value):
+        overwrite = name in self.__dict__
+        super().__setattr__(name, value)
+        if name in self._SERIALIZED_FIELDS:
+            self._serialized = None
+            if overwrite:
+                self._bump_revisions(sighash=name in self._SIGHASH_FIELDS)
+
     def serialize(self) -> bytes:
+        if self._serialized is None:
+            self._serialized = self._serialize()
+        return self._serialized
+
+    def _serialize(self) -> bytes:
         stream = BytesIO()
         stream.write(bytes.fromhex(self.source_txid)[::-1])
         stream.write(self.source_output_index.to_bytes(4, "little"))
@@ -56,11 +77,11 @@ class TransactionInput:
         return self.__str__()
 
     @classmethod
-    def from_hex(cls, stream: Union[str, bytes, Reader]) -> Optional["TransactionInput"]:
+    def from_hex(cls, stream: Union[str, bytes, BinaryReader]) -> Optional["TransactionInput"]:
         with suppress(Exception):
             stream = (
                 stream
-                if isinstance(stream, Reader)
+                if isinstance(stream, BinaryReader)
                 else Reader(stream if isinstance(stream, bytes) else bytes.fromhex(stream))
             )
             txid = stream.read_bytes(32)[::-1]
@@ -0,0 +1,83 @@
+from typing import List, Optional
+
+from ..script.compiled_script import CompiledScript
+from ..script.script import Script
+from .transaction_references import TransactionReferenceIndex
+
+
+class TransactionIntrospectionContext:
+    """
+    What the native introspection opcodes read from the transaction being validated, gathered once per transaction
+    and shared by the Spend of every input, so that each introspection opcode is a list lookup.
+
+    Values of the spent outputs come from the satoshis and locking_script of the inputs, i.e. their source
+    transactions. Build it once the transaction is complete, it is a snapshot.
+
+    Example:
+        context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+        value = context.utxo_values[0]
+    """
+
+    def __init__(self, inputs: list, outputs: list, tx_version: int, tx_locktime: int):
+        self.tx_version = tx_version
+        self.tx_locktime = tx_locktime
+        self.input_count = len(inputs)
+        self.output_count = len(outputs)
+
+        self.utxo_values: List[Optional[int]] = [tx_input.satoshis for tx_input in inputs]
+        self.utxo_scripts: List[Optional[Script]] = [tx_input.locking_script for tx_input in inputs]
+        self.utxo_bytecodes: List[Optional[bytes]] = [
+            script.serialize() if script is not None else None for script in self.utxo_scripts
+        ]
+        # transaction hashes in internal byte order, as they are serialized
+        self.outpoint_tx_hashes: List[bytes] = [bytes.fromhex(tx_input.source_txid)[::-1] for tx_input in inputs]
+        self.outpoint_indexes: List[int] = [tx_input.source_output_index for tx_input in inputs]
+        self.input_bytecodes: List[bytes] = [
+            tx_input.unlocking_script.serialize() if tx_input.unlocking_script is not None else b""
+            for tx_input in inputs
+        ]
+        self.input_sequences: List[int] = [tx_input.sequence for tx_input in inputs]
+
+        self.output_values: List[int] = [tx_output.satoshis for tx_output in outputs]
+        self.output_scripts: List[Script] = [tx_output.locking_script for tx_output in outputs]
+        self.output_bytecodes: List[bytes] = [script.serialize() for script in self.output_scripts]
+
+        # compiled on first use, only scripts queried for their state or references need it
+        self._utxo_programs: List[Optional[CompiledScript]] = [None] * self.input_count
+        self._output_programs: List[Optional[CompiledScript]] = [None] * self.output_count
+        self._references: Optional[TransactionReferenceIndex] = None
+
+    def utxo_program(self, index: int) -> Optional[CompiledScript]:
+        if self._utxo_programs[index] is None and self.utxo_scripts[index] is not None:
+            self._utxo_programs[index] = CompiledScript(self.utxo_scripts[index])
+        return self._utxo_programs[index]
+
+    def output_program(self, index: int) -> CompiledScript:
+        if self._output_programs[index] is None:
+            self._output_programs[index] = CompiledScript(self.output_scripts[index])
+        return self._output_programs[index]
+
+    @staticmethod
+    def state_separator_index(program: Optional[CompiledScript]) -> Optional[int]:
+        """
+        :returns: byte offset of OP_STATESEPARATOR in the script, 0 when it has none
+        """
+        if program is None:
+            return None
+        return program.state_separator_index() or 0
+
+    @staticmethod
+    def code_script(program: Optional[CompiledScript]) -> Optional[bytes]:
+        return None if program is None else program.code_script()
+
+    @staticmethod
+    def state_script(program: Optional[CompiledScript]) -> Optional[bytes]:
+        return None if program is None else program.state_script()
+
+    def references(self) -> TransactionReferenceIndex:
+        """
+        :returns: the reference index of the transaction, built on first use
+        """
+        if self._references is None:
+            self._references = TransactionReferenceIndex(self)
+        return self._references
@@ -2,21 +2,40 @@ from contextlib import suppress
 from typing import Optional, Union
 
 from ..script.script import Script
-from ..utils import Reader
+from ..utils import BinaryReader, Reader
+from .transaction_revision import RevisedItem
 
 
-class TransactionOutput:
+class TransactionOutput(RevisedItem):
+    # fields hashed into hashOutputs and written by serialize(), overwriting them invalidates cached digests
+    _SERIALIZED_FIELDS = frozenset(["satoshis", "locking_script"])
+
     def __init__(
         self,
         locking_script: Script,
         satoshis: int = None,
         change: bool = False,
     ):
+        super().__init__()
+        self._serialized: Optional[bytes] = None
         self.satoshis = satoshis
         self.locking_script = locking_script
         self.change = change
 
+    def __setattr__(self, name, value):
+        overwrite = name in self.__dict__
+        super().__setattr__(name, value)
+        if name in self._SERIALIZED_FIELDS:
+            self._serialized = None
+            if overwrite:
+                self._bump_revisions()
+
     def serialize(self) -> bytes:
+        if self._serialized is None:
+            self._serialized = self._serialize()
+        return self._serialized
+
+    def _serialize(self) -> bytes:
         return b"".join(
             [
                 self.satoshis.to_bytes(8, "little"),
@@ -32,11 +51,11 @@ class TransactionOutput:
         return self.__str__()
 
     @classmethod
-    def from_hex(cls, stream: Union[str, bytes, Reader]) -> Optional["TransactionOutput"]:
+    def from_hex(cls, stream: Union[str, bytes, BinaryReader]) -> Optional["TransactionOutput"]:
         with suppress(Exception):
             stream = (
                 stream
-                if isinstance(stream, Reader)
+                if isinstance(stream, BinaryReader)
                 else Reader(stream if isinstance(stream, bytes) else bytes.fromhex(stream))
             )
             satoshis = stream.read_int(8)
@@ -1,10 +1,12 @@
+import itertools
 from io import BytesIO
-from typing import List
+from typing import Dict, List, Optional
 
 from ..constants import SIGHASH
 from ..hash import hash256
 from .transaction_input import TransactionInput
 from .transaction_output import TransactionOutput
+from .transaction_revision import Revision, watch
 
 
 def _preimage(
@@ -54,34 +56,137 @@ def _preimage(
     return stream.getvalue()
 
 
-def tx_preimages(
-        inputs: List[TransactionInput],
-        outputs: List[TransactionOutput],
-        tx_version: int,
-        tx_locktime: int,
-) -> List[bytes]:
+class TransactionPreimageContext:
     """
-    :returns: the digests of unsigned transaction
+    Per-transaction sighash context.
+
+    hashPrevouts, hashSequence and hashOutputs only depend on the input outpoints, the input sequences and
+    the outputs, so they are computed once and shared by the preimages of every input instead of being
+    rehashed for each one. The digests are dropped as soon as a field of one of the inputs or outputs is
+    overwritten, or the inputs or outputs of the transaction are added, removed, replaced or reordered in place.
     """
-    _hash_prevouts = hash256(
-        b"".join(
-            bytes.fromhex(_in.source_txid)[::-1] + _in.source_output_index.to_bytes(4, "little")
-            for _in in inputs
+
+    def __init__(
+            self,
+            inputs: List[TransactionInput],
+            outputs: List[TransactionOutput],
+            tx_version: int,
+            tx_locktime: int,
+            revision: Optional[Revision] = None,
+    ):
+        """
+        :param revision: revision of the transaction owning the inputs and outputs. By default the context tracks
+                         overwritten input and output fields on its own, changes made to the lists themselves are not
+                         tracked then.
+        """
+        self.inputs = inputs
+        self.outputs = outputs
+        self.tx_version = tx_version
+        self.tx_locktime = tx_locktime
+        self._inputs_count = len(inputs)
+        self._outputs_count = len(outputs)
+        if revision is None:
+            revision = Revision()
+            watch(itertools.chain(inputs, outputs), revision)
+        self.revision = revision
+        # revision the digests below were computed at
+        self._sighash_revision = revision.sighash
+        self._hash_prevouts: Optional[bytes] = None
+        self._hash_sequence: Optional[bytes] = None
+        self._hash_outputs: Optional[bytes] = None
+        self._hash_single_outputs: Dict[int, bytes] = {}
+
+    def matches(
+            self,
+            inputs: List[TransactionInput],
+            outputs: List[TransactionOutput],
+            tx_version: int,
+            tx_locktime: int,
+    ) -> bool:
+        """
+        :returns: True if this context was built for exactly these inputs, outputs, version and locktime
+        """
+        return (
+                self.inputs is inputs
+                and self.outputs is outputs
+                and len(self.inputs) == self._inputs_count
+                and len(self.outputs) == self._outputs_count
+                and self.tx_version == tx_version
+                and self.tx_locktime == tx_locktime
         )
-    )
-    _hash_sequence = hash256(
-        b"".join(_in.sequence.to_bytes(4, "little") for _in in inputs)
-    )
-    _hash_outputs = hash256(
-        b"".join(tx_output.serialize() for tx_output in outputs)
-    )
-    digests = []
-    for i in range(len(inputs)):
-        sighash = inputs[i].sighash
+
+    def invalidate(self) -> None:
+        self._sighash_revision = self.revision.sighash
+        self._hash_prevouts = None
+        self._hash_sequence = None
+        self._hash_outputs = None
+        self._hash_single_outputs = {}
+
+    def _check_revision(self) -> None:
+        if self._sighash_revision != self.revision.sighash:
+            self.invalidate()
+
+    def hash_prevouts(self) -> bytes:
+        self._check_revision()
+        digest = self._hash_prevouts
+        if digest is None:
+            digest = hash256(
+                b"".join(
+                    bytes.fromhex(_in.source_txid)[::-1] + _in.source_output_index.to_bytes(4, "little")
+                    for _in in self.inputs
+                )
+            )
+            self._hash_prevouts = digest
+        return digest
+
+    def hash_sequence(self) -> bytes:
+        self._check_revision()
+        digest = self._hash_sequence
+        if digest is None:
+            digest = hash256(b"".join(_in.sequence.to_bytes(4, "little") for _in in self.inputs))
+            self._hash_sequence = digest
+        return digest
+
+    def hash_outputs(self) -> bytes:
+        self._check_revision()
+        digest = self._hash_outputs
+        if digest is None:
+            digest = hash256(b"".join(tx_output.serialize() for tx_output in self.outputs))
+            self._hash_outputs = digest
+        return digest
+
+    def hash_single_output(self, output_index: int) -> bytes:
+        self._check_revision()
+        digest = self._hash_single_outputs.get(output_index)
+        if digest is None:
+            digest = hash256(self.outputs[output_index].serialize())
+            self._hash_single_outputs[output_index] = digest
+        return digest
+
+    def precompute(self) -> "TransactionPreimageContext":
+        """
+        Computes all shared digests up front, so that preimages can afterwards be built concurrently
+        """
+        self.hash_prevouts()
+        self.hash_sequence()
+        self.hash_outputs()
+        return self
+
+    def preimage(self, input_index: int, tx_input: Optional[TransactionInput] = None) -> bytes:
+        """
+        :param input_index: index of the input being signed
+        :param tx_input: replaces inputs[input_index] when building the per-input part of the preimage,
+                         e.g. to sign against a sub script or another sighash type.
+                         Its outpoint and sequence must be the same as the ones of inputs[input_index].
+        :returns: BIP-143 preimage of the input specified by index
+        """
+        tx_input = tx_input or self.inputs[input_index]
+        sighash = tx_input.sighash
+
         # hash previous outs
         if not sighash & SIGHASH.ANYONECANPAY:
             # if anyone can pay is not set
-            hash_prevouts = _hash_prevouts
+            hash_prevouts = self.hash_prevouts()
         else:
             hash_prevouts = b"\x00" * 32
         # hash sequence
@@ -91,22 +196,38 @@ def tx_preimages(
                 and sighash & 0x1F != SIGHASH.NONE
         ):
             # if none of anyone can pay, single, none is set
-            hash_sequence = _hash_sequence
+            hash_sequence = self.hash_sequence()
         else:
             hash_sequence = b"\x00" * 32
         # hash outputs
         if sighash & 0x1F != SIGHASH.SINGLE and sighash & 0x1F != SIGHASH.NONE:
             # if neither single nor none
-            hash_outputs = _hash_outputs
-        elif sighash & 0x1F == SIGHASH.SINGLE and i < len(outputs):
+            hash_outputs = self.hash_outputs()
+        elif sighash & 0x1F == SIGHASH.SINGLE and input_index < len(self.outputs):
             # if single and the input index is smaller than the number of outputs
-            hash_outputs = hash256(outputs[i].serialize())
+            hash_outputs = self.hash_single_output(input_index)
         else:
             hash_outputs = b"\x00" * 32
-        digests.append(
-            _preimage(inputs[i], tx_version, tx_locktime, hash_prevouts, hash_sequence, hash_outputs)
-        )
-    return digests
+
+        return _preimage(tx_input, self.tx_version, self.tx_locktime, hash_prevouts, hash_sequence, hash_outputs)
+
+    def preimages(self) -> List[bytes]:
+        """
+        :returns: the digests of all inputs
+        """
+        return [self.preimage(i) for i in range(len(self.inputs))]
+
+
+def tx_preimages(
+        inputs: List[TransactionInput],
+        outputs: List[TransactionOutput],
+        tx_version: int,
+        tx_locktime: int,
+) -> List[bytes]:
+    """
+    :returns: the digests of unsigned transaction
+    """
+    return TransactionPreimageContext(inputs, outputs, tx_version, tx_locktime).preimages()
 
 
 def tx_preimage(
@@ -119,39 +240,4 @@ def tx_preimage(
     """
     Calculates and returns the preimage for a specific input index.
     """
-    sighash = inputs[input_index].sighash
-
-    # hash previous outs
-    if not sighash & SIGHASH.ANYONECANPAY:
-        hash_prevouts = hash256(
-            b"".join(
-                bytes.fromhex(_in.source_txid)[::-1] + _in.source_output_index.to_bytes(4, "little")
-                for _in in inputs
-            )
-        )
-    else:
-        hash_prevouts = b"\x00" * 32
-
-    # hash sequence
-    if (
-            not sighash & SIGHASH.ANYONECANPAY
-            and sighash & 0x1F != SIGHASH.SINGLE
-            and sighash & 0x1F != SIGHASH.NONE
-    ):
-        hash_sequence = hash256(
-            b"".join(_in.sequence.to_bytes(4, "little") for _in in inputs)
-        )
-    else:
-        hash_sequence = b"\x00" * 32
-
-    # hash outputs
-    if sighash & 0x1F != SIGHASH.SINGLE and sighash & 0x1F != SIGHASH.NONE:
-        hash_outputs = hash256(
-            b"".join(tx_output.serialize() for tx_output in outputs)
-        )
-    elif sighash & 0x1F == SIGHASH.SINGLE and input_index < len(outputs):
-        hash_outputs = hash256(outputs[input_index].serialize())
-    else:
-        hash_outputs = b"\x00" * 32
-
-    return _preimage(inputs[input_index], tx_version, tx_locktime, hash_prevouts, hash_sequence, hash_outputs)
+    return TransactionPreimageContext(inputs, outputs, tx_version, tx_locktime).preimage(input_index)
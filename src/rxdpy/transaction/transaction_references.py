@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Set
+
+from ..constants import OpCode
+from ..hash import hash256
+from ..script.compiled_script import CompiledScript
+
+_OP_PUSHINPUTREF = OpCode.OP_PUSHINPUTREF[0]
+_OP_PUSHINPUTREFSINGLETON = OpCode.OP_PUSHINPUTREFSINGLETON[0]
+
+# values of OP_REFTYPE_UTXO and OP_REFTYPE_OUTPUT
+REF_TYPE_NONE = 0
+REF_TYPE_NORMAL = 1
+REF_TYPE_SINGLETON = 2
+
+
+class ReferenceSummary:
+    """
+    Outputs (or spent outputs) carrying a reference, or sharing a code script hash
+    """
+
+    __slots__ = ("value_sum", "count", "zero_valued_count", "indexes")
+
+    def __init__(self):
+        self.value_sum: int = 0
+        self.count: int = 0
+        self.zero_valued_count: int = 0
+        self.indexes: List[int] = []
+
+    def add(self, index: int, value: int) -> None:
+        self.value_sum += value
+        self.count += 1
+        self.zero_valued_count += value == 0
+        self.indexes.append(index)
+
+
+class ScriptReferences:
+    """
+    References of one side of a transaction: the outputs it spends or the outputs it creates.
+
+    A script carries the references it pushes with OP_PUSHINPUTREF or OP_PUSHINPUTREFSINGLETON, each counted once
+    per script. Code script hashes are only computed when a code script hash opcode asks for them.
+    """
+
+    def __init__(self, programs: List[Optional[CompiledScript]], values: List[Optional[int]]):
+        self._programs = programs
+        self._values = values
+        self.refs: Dict[bytes, ReferenceSummary] = {}
+        self.types: Dict[bytes, int] = {}
+        self._code_script_hashes: Optional[Dict[bytes, ReferenceSummary]] = None
+
+        for index, program in enumerate(programs):
+            if program is None:
+                continue
+            carried: Dict[bytes, int] = {}
+            for opcode, data in zip(program.opcodes, program.data):
+                if opcode == _OP_PUSHINPUTREF:
+                    carried.setdefault(data, REF_TYPE_NORMAL)
+                elif opcode == _OP_PUSHINPUTREFSINGLETON:
+                    carried[data] = REF_TYPE_SINGLETON
+            for ref, ref_type in carried.items():
+                summary = self.refs.get(ref)
+                if summary is None:
+                    summary = self.refs[ref] = ReferenceSummary()
+                summary.add(index, values[index] or 0)
+                self.types[ref] = max(self.types.get(ref, REF_TYPE_NONE), ref_type)
+
+    def ref(self, ref: bytes) -> ReferenceSummary:
+        return self.refs.get(ref, _EMPTY_SUMMARY)
+
+    def ref_type(self, ref: bytes) -> int:
+        return self.types.get(ref, REF_TYPE_NONE)
+
+    def code_script_hash(self, code_script_hash: bytes) -> ReferenceSummary:
+        if self._code_script_hashes is None:
+            self._code_script_hashes = {}
+            for index, program in enumerate(self._programs):
+                if program is None:
+                    continue
+                key = hash256(program.code_script())
+                summary = self._code_script_hashes.get(key)
+                if summary is None:
+                    summary = self._code_script_hashes[key] = ReferenceSummary()
+                summary.add(index, self._values[index] or 0)
+        return self._code_script_hashes.get(code_script_hash, _EMPTY_SUMMARY)
+
+
+_EMPTY_SUMMARY = ReferenceSummary()
+
+
+class TransactionReferenceIndex:
+    """
+    Reference index of a transaction, built once and shared by the Spend of every input so that each reference
+    opcode is a dictionary lookup instead of a scan over every script of the transaction.
+
+    Example:
+        index = TransactionReferenceIndex(introspection_context)
+        index.outputs.ref(ref).value_sum
+    """
+
+    def __init__(self, context):
+        """
+        :param TransactionIntrospectionContext context: the transaction to index
+        """
+        self.utxos = ScriptReferences(
+            [context.utxo_program(i) for i in range(context.input_count)], context.utxo_values
+        )
+        self.outputs = ScriptReferences(
+            [context.output_program(i) for i in range(context.output_count)], context.output_values
+        )
+        # outpoints being spent are the references minted by this transaction
+        self.input_refs: Set[bytes] = set(self.utxos.refs)
+        self.input_refs.update(
+            tx_hash + index.to_bytes(4, "little")
+            for tx_hash, index in zip(context.outpoint_tx_hashes, context.outpoint_indexes)
+        )
+
+    def unbacked_output_refs(self) -> Set[bytes]:
+        """
+        :returns: references pushed by the outputs that neither a spent output carries nor an outpoint mints
+        """
+        return set(self.outputs.refs) - self.input_refs
+
+    def singleton_violations(self) -> Set[bytes]:
+        """
+        :returns: singleton references carried by more than one output
+        """
+        return {
+            ref
+            for ref, ref_type in self.outputs.types.items()
+            if ref_type == REF_TYPE_SINGLETON and self.outputs.refs[ref].count > 1
+        }
@@ -0,0 +1,125 @@
+import weakref
+from typing import Iterable, Optional
+
+
+class Revision:
+    """
+    Change counters of one transaction, bumped whenever its input or output lists are changed in place or a field of
+    one of its inputs or outputs is overwritten.
+
+    Anything derived from the transaction (serialization, hash, sighash digests) records the counter it was computed
+    at and is recomputed as soon as the counter moves on. Changes of other transactions never move it.
+    """
+
+    __slots__ = ("serialization", "sighash", "__weakref__")
+
+    def __init__(self):
+        # fields written by serialize()
+        self.serialization: int = 0
+        # fields hashed into the BIP-143 hashPrevouts, hashSequence and hashOutputs digests, a subset of the above
+        self.sighash: int = 0
+
+    def bump(self, sighash: bool = True) -> None:
+        self.serialization += 1
+        if sighash:
+            self.sighash += 1
+
+
+class RevisedItem:
+    """
+    Transaction input or output, bumps the revisions of all transactions it is in when one of its fields is
+    overwritten.
+    """
+
+    def __init__(self):
+        # revisions of the transactions this item is in, registered by their input and output lists
+        self._revisions = weakref.WeakSet()
+
+    def _bump_revisions(self, sighash: bool = True) -> None:
+        for revision in list(self._revisions):
+            revision.bump(sighash)
+
+    def __getstate__(self):
+        # weak references are not picklable, the lists register the transactions again when they are rebuilt
+        state = self.__dict__.copy()
+        del state["_revisions"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__["_revisions"] = weakref.WeakSet()
+
+
+def watch(items: Iterable[RevisedItem], revision: Revision) -> None:
+    """
+    Registers the revision with the inputs or outputs, so that overwriting one of their fields bumps it
+    """
+    for item in items:
+        item._revisions.add(revision)
+
+
+def _bumping(name: str):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    mutate.__name__ = name
+    return mutate
+
+
+class RevisedList(list):
+    """
+    Inputs or outputs of one transaction. Bumps the revision of the transaction whenever the list is changed in place,
+    items added, removed, replaced or reordered, and registers it with the items added, so that overwriting one of
+    their fields bumps it as well.
+
+    Items removed keep the registration, so changing them afterwards only costs the transaction a cache miss.
+    """
+
+    def __init__(self, items: Iterable = (), revision: Optional[Revision] = None):
+        super().__init__(items)
+        self.revision: Revision = revision if revision is not None else Revision()
+        watch(self, self.revision)
+
+    def __reduce__(self):
+        # items are added through __init__, the mutators below need the revision to be set first
+        return self.__class__, (list(self), self.revision)
+
+    def _changed(self, added: Iterable = ()) -> None:
+        watch(added, self.revision)
+        self.revision.bump()
+
+    def __setitem__(self, index, value):
+        value = list(value) if isinstance(index, slice) else value
+        super().__setitem__(index, value)
+        self._changed(value if isinstance(index, slice) else (value,))
+
+    def __iadd__(self, items):
+        items = list(items)
+        super().__iadd__(items)
+        self._changed(items)
+        return self
+
+    def append(self, item) -> None:
+        super().append(item)
+        self._changed((item,))
+
+    def extend(self, items) -> None:
+        items = list(items)
+        super().extend(items)
+        self._changed(items)
+
+    def insert(self, index, item) -> None:
+        super().insert(index, item)
+        self._changed((item,))
+
+    __delitem__ = _bumping("__delitem__")
+    __imul__ = _bumping("__imul__")
+    pop = _bumping("pop")
+    remove = _bumping("remove")
+    clear = _bumping("clear")
+    reverse = _bumping("reverse")
+    sort = _bumping("sort")
@@ -0,0 +1,70 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from ..constants import THREAD_POOL_MAX_EXECUTORS
+from ..script.script import Script
+
+
+def _sign_input(job: Tuple["Transaction", int]) -> Script:
+    tx, input_index = job
+    return tx.inputs[input_index].unlocking_script_template.sign(tx, input_index)
+
+
+class BatchSigner:
+    """
+    Signs the inputs of one or many transactions on a thread pool.
+
+    The sighash digests of every transaction are computed once up front, then each worker builds
+    the preimage of an input and signs it. coincurve releases the GIL while signing, so the ECDSA
+    work runs on all cores. Unlocking scripts are assigned back in input order once every input
+    has been signed, the result is therefore the same as a sequential Transaction.sign().
+
+    Example:
+        with BatchSigner() as signer:
+            signer.sign_many(transactions)
+    """
+
+    def __init__(self, max_workers: int = THREAD_POOL_MAX_EXECUTORS, executor: Optional[Executor] = None):
+        """
+        :param max_workers: number of worker threads, defaults to THREAD_POOL_MAX_EXECUTORS
+        :param executor: an existing executor to use instead of creating a thread pool, it is not shut down by close()
+        """
+        self._owns_executor = executor is None
+        self.executor: Executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+
+    def sign(self, tx: "Transaction", bypass: bool = True) -> "Transaction":
+        """
+        :bypass: if True then ONLY sign inputs which unlocking script is None, otherwise sign all the inputs
+        """
+        return self.sign_many([tx], bypass)[0]
+
+    def sign_many(self, txs: List["Transaction"], bypass: bool = True) -> List["Transaction"]:
+        """
+        Signs all the transactions, their inputs are spread over the same pool.
+        Nothing is assigned if any of the inputs fails to sign.
+        """
+        jobs = []
+        for tx in txs:
+            indexes = tx.inputs_to_sign(bypass)
+            if indexes:
+                tx.preimage_context().precompute()
+            jobs.extend((tx, i) for i in indexes)
+
+        if len(jobs) > 1:
+            unlocking_scripts = list(self.executor.map(_sign_input, jobs))
+        else:
+            unlocking_scripts = [_sign_input(job) for job in jobs]
+
+        for (tx, i), unlocking_script in zip(jobs, unlocking_scripts):
+            tx.inputs[i].unlocking_script = unlocking_script
+        return txs
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    def __enter__(self) -> "BatchSigner":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,321 @@
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..cache import LRUCache
+from ..constants import PROCESS_POOL_MAX_EXECUTORS, THREAD_POOL_MAX_EXECUTORS
+from ..keys import PublicKey
+from ..script.script import Script
+from ..script.spend import Spend
+from .transaction_introspection import TransactionIntrospectionContext
+from .transaction_preimage import TransactionPreimageContext
+
+# (serialized transaction, satoshis and locking script of the output spent by each input)
+_Sources = Tuple[Tuple[int, bytes], ...]
+
+
+class InputVerification:
+    """
+    Outcome of the script validation of one input.
+
+    valid is None when the input was not validated, because another input failed first.
+    """
+
+    __slots__ = ("index", "valid", "error")
+
+    def __init__(self, index: int, valid: Optional[bool], error: Optional[str] = None):
+        self.index = index
+        self.valid = valid
+        self.error = error
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<InputVerification index={self.index} valid={self.valid} error={self.error!r}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class VerificationReport:
+    """
+    Per-input result of Transaction.verify_inputs(), plus the checks that outputs do not spend more than the inputs
+    and only carry references the transaction is allowed to push.
+
+    Example:
+        report = tx.verify_inputs(parallel=True)
+        if not report.valid:
+            print(report.failures(), report.reference_errors)
+    """
+
+    def __init__(
+        self,
+        txid: str,
+        inputs: List[InputVerification],
+        value_in: int,
+        value_out: int,
+        reference_errors: Optional[List[str]] = None,
+    ):
+        self.txid = txid
+        self.inputs = inputs
+        self.value_in = value_in
+        self.value_out = value_out
+        self.reference_errors: List[str] = reference_errors or []
+
+    @property
+    def valid(self) -> bool:
+        return (
+            all(result.valid for result in self.inputs)
+            and self.value_out <= self.value_in
+            and not self.reference_errors
+        )
+
+    def failures(self) -> List[InputVerification]:
+        """
+        :returns: the inputs whose scripts failed to validate
+        """
+        return [result for result in self.inputs if result.valid is False]
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<VerificationReport txid={self.txid} valid={self.valid} failures={len(self.failures())}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+def input_spend(
+    tx: "Transaction",
+    index: int,
+    preimage_context: TransactionPreimageContext,
+    introspection_context: TransactionIntrospectionContext,
+    deferred_signatures: Optional[List[Tuple[bytes, bytes, bytes]]] = None,
+) -> Spend:
+    """
+    :returns: the Spend validating the input specified by index, sharing the contexts of the transaction
+    """
+    tx_input = tx.inputs[index]
+    return Spend(
+        {
+            "sourceTXID": tx_input.source_txid,
+            "sourceOutputIndex": tx_input.source_output_index,
+            "sourceSatoshis": tx_input.satoshis,
+            "lockingScript": tx_input.locking_script,
+            "transactionVersion": tx.version,
+            "otherInputs": tx.inputs[:index] + tx.inputs[index + 1 :],
+            "outputs": tx.outputs,
+            "inputIndex": index,
+            "unlockingScript": tx_input.unlocking_script,
+            "inputSequence": tx_input.sequence,
+            "lockTime": tx.locktime,
+            "preimageContext": preimage_context,
+            "introspectionContext": introspection_context,
+            "deferredSignatures": deferred_signatures,
+        }
+    )
+
+
+def verify_references(context: TransactionIntrospectionContext) -> List[str]:
+    """
+    Checks the reference rules of the outputs: each reference they push is carried by a spent output or minted by an
+    outpoint being spent, and a singleton reference is carried by one output at most.
+
+    :returns: one error per reference breaking a rule, empty if the outputs are valid
+    """
+    references = context.references()
+    errors = [
+        f"output reference {ref.hex()} is neither carried by a spent output nor minted by the transaction."
+        for ref in sorted(references.unbacked_output_refs())
+    ]
+    errors.extend(
+        f"singleton reference {ref.hex()} is carried by more than one output."
+        for ref in sorted(references.singleton_violations())
+    )
+    return errors
+
+
+def verify_input_scripts(
+    tx: "Transaction",
+    indexes: List[int],
+    fail_fast: bool = True,
+    signature_workers: int = THREAD_POOL_MAX_EXECUTORS,
+    introspection_context: Optional[TransactionIntrospectionContext] = None,
+) -> List[InputVerification]:
+    """
+    Validates the scripts of the inputs specified by indexes, with one sighash context and one introspection context
+    shared by all of them.
+
+    Scripts first run assuming their signatures are valid, then the signatures of every input are verified in a
+    single PublicKey.verify_batch() call. An input with an invalid signature runs again checking each signature in
+    turn, since a failed check may have changed the outcome of its script.
+
+    :param fail_fast: if True then stop at the first failure, the inputs left are reported as not validated
+    :param signature_workers: number of threads verifying the signatures, 1 to verify in the calling thread
+    :param introspection_context: context of the transaction to share, e.g. with verify_references()
+    """
+    preimage_context = tx.preimage_context()
+    if introspection_context is None:
+        introspection_context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    results: Dict[int, InputVerification] = {}
+    deferred: Dict[int, List[Tuple[bytes, bytes, bytes]]] = {}
+    failed = False
+    for i in indexes:
+        if failed and fail_fast:
+            results[i] = InputVerification(i, None)
+            continue
+        signatures = []
+        try:
+            input_spend(tx, i, preimage_context, introspection_context, signatures).validate()
+            deferred[i] = signatures
+        except Exception as e:
+            failed = True
+            results[i] = InputVerification(i, False, str(e))
+
+    verified = PublicKey.verify_batch(
+        [signature for signatures in deferred.values() for signature in signatures], max_workers=signature_workers
+    )
+    position = 0
+    for i, signatures in deferred.items():
+        valid = all(verified[position : position + len(signatures)])
+        position += len(signatures)
+        if valid:
+            results[i] = InputVerification(i, True)
+        elif failed and fail_fast:
+            results[i] = InputVerification(i, None)
+        else:
+            try:
+                input_spend(tx, i, preimage_context, introspection_context).validate()
+                results[i] = InputVerification(i, True)
+            except Exception as e:
+                failed = True
+                results[i] = InputVerification(i, False, str(e))
+    return [results[i] for i in indexes]
+
+
+def verify_transaction(
+    tx: "Transaction",
+    fail_fast: bool = True,
+    verify_parallel: Optional[Callable[["Transaction", List[int], bool], List[InputVerification]]] = None,
+) -> VerificationReport:
+    """
+    Checks the references of the outputs, then validates the scripts of every input.
+
+    :param fail_fast: if True then stop at the first failure, the inputs left are reported as not validated
+    :param verify_parallel: validates the inputs of a transaction with more than one of them instead of the calling
+        thread, e.g. on the process pool of a TransactionVerifier
+    """
+    tx.check_verifiable()
+    indexes = list(range(len(tx.inputs)))
+    context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    reference_errors = verify_references(context)
+    if reference_errors and fail_fast:
+        results = [InputVerification(i, None) for i in indexes]
+    elif verify_parallel is not None and len(indexes) > 1:
+        results = verify_parallel(tx, indexes, fail_fast)
+    else:
+        results = verify_input_scripts(tx, indexes, fail_fast, introspection_context=context)
+    return VerificationReport(tx.txid(), results, tx.total_value_in(), tx.total_value_out(), reference_errors)
+
+
+# transactions rebuilt by a worker process, so that the chunks of one transaction it runs share their contexts
+_worker_transactions = LRUCache(8)
+
+
+def _worker_transaction(raw: bytes, sources: _Sources) -> "Transaction":
+    from .transaction import Transaction
+
+    key = (raw, sources)
+    tx = _worker_transactions.get(key)
+    if tx is None:
+        tx = Transaction.from_hex(raw)
+        for tx_input, (satoshis, locking_script) in zip(tx.inputs, sources):
+            tx_input.satoshis = satoshis
+            tx_input.locking_script = Script(locking_script)
+        _worker_transactions.put(key, tx)
+    return tx
+
+
+def _verify_chunk(job: Tuple[bytes, _Sources, List[int], bool]) -> List[InputVerification]:
+    raw, sources, indexes, fail_fast = job
+    # the pool already runs one chunk per core
+    return verify_input_scripts(_worker_transaction(raw, sources), indexes, fail_fast, signature_workers=1)
+
+
+class TransactionVerifier:
+    """
+    Validates the input scripts of transactions on a process pool.
+
+    Script interpretation is pure Python and holds the GIL, so the inputs are spread over worker processes. Each worker
+    receives the serialized transaction and the outputs it spends once per chunk of inputs, rebuilds it, and validates
+    the whole chunk against the same sighash and introspection contexts. With fail_fast, chunks not started yet are
+    cancelled as soon as one input fails.
+
+    Starting a process pool is expensive, keep one verifier for many transactions.
+
+    Example:
+        with TransactionVerifier() as verifier:
+            report = verifier.verify(tx)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PROCESS_POOL_MAX_EXECUTORS,
+        executor: Optional[Executor] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        """
+        :param max_workers: number of worker processes, defaults to PROCESS_POOL_MAX_EXECUTORS
+        :param executor: an existing executor to use instead of creating a process pool, it is not shut down by close()
+        :param chunk_size: number of inputs validated by one task, by default the inputs are split in two chunks per
+            worker
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._owns_executor = executor is None
+        self._executor: Optional[Executor] = executor
+
+    @property
+    def executor(self) -> Executor:
+        # created on first use, a transaction with a single input never needs it
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def verify(self, tx: "Transaction", fail_fast: bool = True) -> VerificationReport:
+        """
+        :param fail_fast: if True then cancel the validation of the remaining inputs at the first failure
+        :returns: the per-input report of the transaction
+        """
+        return verify_transaction(tx, fail_fast, self._verify_parallel)
+
+    def _verify_parallel(self, tx: "Transaction", indexes: List[int], fail_fast: bool) -> List[InputVerification]:
+        raw = tx.serialize()
+        sources = tuple((tx_input.satoshis, tx_input.locking_script.serialize()) for tx_input in tx.inputs)
+        chunk_size = self.chunk_size or math.ceil(len(indexes) / (2 * self.max_workers))
+        chunks = [indexes[i : i + chunk_size] for i in range(0, len(indexes), chunk_size)]
+        futures = {self.executor.submit(_verify_chunk, (raw, sources, chunk, fail_fast)): chunk for chunk in chunks}
+
+        results = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                for result in future.result():
+                    results[result.index] = result
+            if fail_fast and any(result.valid is False for result in results.values()):
+                for future in pending:
+                    future.cancel()
+
+        return [results.get(i) or InputVerification(i, None) for i in indexes]
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "TransactionVerifier":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
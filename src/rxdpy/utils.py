@@ -1,16 +1,19 @@
 import math
+import mmap
 import re
 import struct
+from abc import ABC, abstractmethod
 from base64 import b64encode, b64decode
 from contextlib import suppress
 from io import BytesIO
 from secrets import randbits
 from typing import Tuple, Optional, Union, Literal, List
 
-from .base58 import base58check_decode
+from .base58 import b58_decode, b58_encode, base58check_decode, base58check_encode
 from .constants import Network, ADDRESS_PREFIX_NETWORK_DICT, WIF_PREFIX_NETWORK_DICT, NUMBER_BYTE_LENGTH
 from .constants import OpCode
 from .curve import curve
+from .hash import hash256
 
 
 def unsigned_to_varint(num: int) -> bytes:
@@ -320,59 +323,26 @@ def to_base64(byte_array: List[int]) -> str:
     return base64.b64encode(bytes(byte_array)).decode("ascii")
 
 
-base58chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
-
-
 def from_base58(str_: str) -> List[int]:
     """Converts a base58 string to a binary array."""
     if not str_ or not isinstance(str_, str):
         raise ValueError(f"Expected base58 string but got '{str_}'")
-    if "0" in str_ or "I" in str_ or "O" in str_ or "l" in str_:
+    try:
+        return list(b58_decode(str_))
+    except ValueError:
         raise ValueError(f"Invalid base58 character in '{str_}'")
 
-    lz = len(str_) - len(str_.lstrip("1"))
-    psz = lz
-
-    acc = 0
-    for char in str_:
-        acc = acc * 58 + base58chars.index(char)
-
-    result = []
-    while acc > 0:
-        result.append(acc % 256)
-        acc //= 256
-
-    return [0] * psz + list(reversed(result))
-
 
 def to_base58(bin_: List[int]) -> str:
     """Converts a binary array into a base58 string."""
-    acc = 0
-    for byte in bin_:
-        acc = acc * 256 + byte
-
-    result = ""
-    while acc > 0:
-        acc, mod = divmod(acc, 58)
-        result = base58chars[mod] + result
-
-    for byte in bin_:
-        if byte == 0:
-            result = "1" + result
-        else:
-            break
-
-    return result
+    return b58_encode(bytes(bin_))
 
 
 def to_base58_check(bin_: List[int], prefix: Optional[List[int]] = None) -> str:
     """Converts a binary array into a base58check string with a checksum."""
-    import hashlib
-
     if prefix is None:
         prefix = [0]
-    hash_ = hashlib.sha256(hashlib.sha256(bytes(prefix + bin_)).digest()).digest()
-    return to_base58(prefix + bin_ + list(hash_[:4]))
+    return base58check_encode(bytes(prefix + bin_))
 
 
 def from_base58_check(str_: str, enc: Optional[str] = None, prefix_length: int = 1):
@@ -382,10 +352,7 @@ def from_base58_check(str_: str, enc: Optional[str] = None, prefix_length: int =
     data = bin_[prefix_length:-4]
     checksum = bin_[-4:]
 
-    import hashlib
-
-    hash_ = hashlib.sha256(hashlib.sha256(bytes(prefix + data)).digest()).digest()
-    if list(hash_[:4]) != checksum:
+    if list(hash256(bytes(prefix + data))[:4]) != checksum:
         raise ValueError("Invalid checksum")
 
     if enc == "hex":
@@ -467,16 +434,14 @@ class Writer(BytesIO):
         return unsigned_to_varint(n)
 
 
-class Reader(BytesIO):
-    def __init__(self, data: bytes):
-        super().__init__(data)
-
-    def eof(self) -> bool:
-        return self.tell() >= len(self.getvalue())
+class BinaryReader(ABC):
+    """
+    Decoding helpers shared by Reader and MemoryReader, built on read()
+    """
 
-    def read(self, length: int = None) -> bytes:
-        result = super().read(length)
-        return result if result else None
+    @abstractmethod
+    def read(self, length: int = None) -> Optional[bytes]:
+        pass
 
     def read_reverse(self, length: int = None) -> bytes:
         data = self.read(length)
@@ -562,5 +527,104 @@ class Reader(BytesIO):
         return int.from_bytes(octets, byteorder=byteorder)
 
 
+class Reader(BinaryReader, BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+
+    def eof(self) -> bool:
+        return self.tell() >= len(self.getvalue())
+
+    def read(self, length: int = None) -> bytes:
+        result = BytesIO.read(self, length)
+        return result if result else None
+
+
+class MemoryReader(BinaryReader):
+    """
+    Zero-copy reader over bytes, bytearray, memoryview or mmap.
+
+    Integers are decoded in place and read_view() returns slices of the underlying buffer instead of copies.
+    Slices keep the buffer exported, a memory-mapped file can't be closed while they are alive.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, "mmap.mmap"], offset: int = 0):
+        self._view: memoryview = data if isinstance(data, memoryview) else memoryview(data)
+        if self._view.format != "B" or self._view.ndim != 1:
+            self._view = self._view.cast("B")
+        self._length: int = len(self._view)
+        self._position: int = offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, position: int, whence: int = 0) -> int:
+        if whence == 1:
+            position += self._position
+        elif whence == 2:
+            position += self._length
+        self._position = max(0, position)
+        return self._position
+
+    def eof(self) -> bool:
+        return self._position >= self._length
+
+    def getbuffer(self) -> memoryview:
+        return self._view[:]
+
+    def read_view(self, length: Optional[int] = None) -> memoryview:
+        """
+        :returns: the next length bytes (or the rest of the buffer) as a slice of the underlying buffer
+        """
+        start = self._position
+        end = self._length if length is None or length < 0 else min(start + length, self._length)
+        self._position = max(start, end)
+        return self._view[start:end]
+
+    def skip(self, length: int) -> None:
+        self._position = min(self._position + length, self._length)
+
+    def read(self, length: int = None) -> Optional[bytes]:
+        result = self.read_view(length)
+        return result.tobytes() if result else None
+
+    def _unpack(self, fmt: struct.Struct) -> Optional[int]:
+        if self._position + fmt.size > self._length:
+            self._position = self._length
+            return None
+        (value,) = fmt.unpack_from(self._view, self._position)
+        self._position += fmt.size
+        return value
+
+    def read_uint8(self) -> Optional[int]:
+        if self._position >= self._length:
+            return None
+        self._position += 1
+        return self._view[self._position - 1]
+
+    def read_uint16_le(self) -> Optional[int]:
+        return self._unpack(_UINT16_LE)
+
+    def read_uint32_le(self) -> Optional[int]:
+        return self._unpack(_UINT32_LE)
+
+    def read_uint64_le(self) -> Optional[int]:
+        return self._unpack(_UINT64_LE)
+
+    def read_var_int_num(self) -> Optional[int]:
+        first_byte = self.read_uint8()
+        if first_byte is None or first_byte < 253:
+            return first_byte
+        elif first_byte == 253:
+            return self.read_uint16_le()
+        elif first_byte == 254:
+            return self.read_uint32_le()
+        return self.read_uint64_le()
+
+
+_UINT16_LE = struct.Struct("<H")
+_UINT32_LE = struct.Struct("<I")
+_UINT64_LE = struct.Struct("<Q")
+
+
 def reverse_hex_byte_order(hex_str: str):
     return bytes.fromhex(hex_str)[::-1].hex()
@@ -0,0 +1,63 @@
+from typing import Optional, Tuple
+
+from .script.script import Script
+from .script.unlocking_template import UnlockingScriptTemplate
+from .transaction.transaction_input import TransactionInput
+
+# (txid, output index)
+Outpoint = Tuple[str, int]
+
+
+class Utxo:
+    """
+    Unspent output, as listed by blockchain.scripthash.listunspent or kept in a UtxoStore.
+    height is 0 for an output of an unconfirmed transaction.
+    """
+
+    __slots__ = ("txid", "index", "satoshis", "height", "scripthash", "locking_script")
+
+    def __init__(
+        self,
+        txid: str,
+        index: int,
+        satoshis: int,
+        height: int,
+        scripthash: str,
+        locking_script: Optional[bytes] = None,
+    ):
+        self.txid = txid
+        self.index = index
+        self.satoshis = satoshis
+        self.height = height
+        self.scripthash = scripthash
+        # serialized, known when the script hash was watched along with its script
+        self.locking_script = locking_script
+
+    @property
+    def outpoint(self) -> Outpoint:
+        return self.txid, self.index
+
+    def to_input(self, unlocking_script_template: Optional[UnlockingScriptTemplate] = None) -> TransactionInput:
+        """
+        :returns: a transaction input spending the output, with its satoshis and locking script set for signing
+        """
+        tx_input = TransactionInput(
+            source_txid=self.txid, source_output_index=self.index, unlocking_script_template=unlocking_script_template
+        )
+        tx_input.satoshis = self.satoshis
+        tx_input.locking_script = Script(self.locking_script) if self.locking_script is not None else None
+        return tx_input
+
+    def __eq__(self, o: object) -> bool:
+        if isinstance(o, Utxo):
+            return self.outpoint == o.outpoint and self.satoshis == o.satoshis and self.height == o.height
+        return super().__eq__(o)  # pragma: no cover
+
+    def __hash__(self) -> int:
+        return hash(self.outpoint)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<Utxo {self.txid}:{self.index} satoshis={self.satoshis} height={self.height}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -0,0 +1,315 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .address_index import electrumx_scripthash
+from .block import Block
+from .constants import OpCode
+from .script.compiled_script import CompiledScript
+from .script.script import Script
+from .transaction.lazy_transaction import LazyTransaction
+from .transaction.transaction import Transaction
+from .utxo import Outpoint, Utxo
+
+_OP_PUSHINPUTREF = OpCode.OP_PUSHINPUTREF[0]
+_OP_PUSHINPUTREFSINGLETON = OpCode.OP_PUSHINPUTREFSINGLETON[0]
+_COINBASE_TXID = "00" * 32
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS utxo ("
+    "txid BLOB NOT NULL, vout INTEGER NOT NULL, satoshis INTEGER NOT NULL, height INTEGER NOT NULL, "
+    "scripthash BLOB NOT NULL, locking_script BLOB NOT NULL, PRIMARY KEY (txid, vout)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS utxo_scripthash ON utxo (scripthash, satoshis)",
+    "CREATE INDEX IF NOT EXISTS utxo_satoshis ON utxo (satoshis)",
+    "CREATE TABLE IF NOT EXISTS utxo_ref ("
+    "ref BLOB NOT NULL, txid BLOB NOT NULL, vout INTEGER NOT NULL, PRIMARY KEY (ref, txid, vout)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS utxo_ref_outpoint ON utxo_ref (txid, vout)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)",
+]
+_COLUMNS = "utxo.txid, utxo.vout, utxo.satoshis, utxo.height, utxo.scripthash, utxo.locking_script"
+
+# (txid, vout, satoshis, height, scripthash, locking script) as stored
+_Row = Tuple[bytes, int, int, int, bytes, bytes]
+
+
+def script_refs(locking_script: bytes) -> List[bytes]:
+    """
+    :returns: the references pushed by OP_PUSHINPUTREF or OP_PUSHINPUTREFSINGLETON in the script, each once
+    """
+    # most scripts carry none, and neither opcode byte appears anywhere in them
+    if _OP_PUSHINPUTREF not in locking_script and _OP_PUSHINPUTREFSINGLETON not in locking_script:
+        return []
+    program = CompiledScript(Script(locking_script))
+    refs = []
+    for opcode, data in zip(program.opcodes, program.data):
+        if opcode in (_OP_PUSHINPUTREF, _OP_PUSHINPUTREFSINGLETON) and data not in refs:
+            refs.append(data)
+    return refs
+
+
+def _utxo(row: _Row) -> Utxo:
+    txid, vout, satoshis, height, scripthash, locking_script = row
+    return Utxo(txid.hex(), vout, satoshis, height, scripthash.hex(), locking_script)
+
+
+def _transaction_changes(
+    tx: Union[Transaction, LazyTransaction]
+) -> Tuple[str, List[Outpoint], List[Tuple[int, bytes]]]:
+    """
+    :returns: txid, outpoints spent and (satoshis, locking script) of each output
+    """
+    if isinstance(tx, LazyTransaction):
+        spends = [(tx.source_txid(i), tx.source_output_index(i)) for i in range(len(tx.inputs))]
+        outputs = [(tx.output_satoshis(i), bytes(tx.locking_script_bytes(i))) for i in range(len(tx.outputs))]
+    else:
+        spends = [(tx_input.source_txid, tx_input.source_output_index) for tx_input in tx.inputs]
+        outputs = [(tx_output.satoshis, tx_output.locking_script.serialize()) for tx_output in tx.outputs]
+    return tx.txid(), [spend for spend in spends if spend[0] != _COINBASE_TXID], outputs
+
+
+class _UtxoReader:
+    """
+    Queries shared by the store and its snapshots.
+    """
+
+    _connection: sqlite3.Connection
+
+    def _query(self, sql: str, params: tuple = ()) -> List[_Row]:
+        return self._connection.execute(sql, params).fetchall()
+
+    def get(self, txid: str, vout: int) -> Optional[Utxo]:
+        rows = self._query(f"SELECT {_COLUMNS} FROM utxo WHERE txid = ? AND vout = ?", (bytes.fromhex(txid), vout))
+        return _utxo(rows[0]) if rows else None
+
+    def by_scripthash(self, scripthash: str) -> List[Utxo]:
+        """
+        :returns: the unspent outputs of the ElectrumX script hash, largest first
+        """
+        sql = f"SELECT {_COLUMNS} FROM utxo WHERE scripthash = ? ORDER BY satoshis DESC"
+        return [_utxo(row) for row in self._query(sql, (bytes.fromhex(scripthash),))]
+
+    def by_ref(self, ref: bytes) -> List[Utxo]:
+        """
+        :returns: the unspent outputs whose locking script pushes the Glyph reference
+        """
+        sql = (
+            f"SELECT {_COLUMNS} FROM utxo_ref JOIN utxo ON utxo.txid = utxo_ref.txid AND utxo.vout = utxo_ref.vout "
+            "WHERE utxo_ref.ref = ?"
+        )
+        return [_utxo(row) for row in self._query(sql, (bytes(ref),))]
+
+    def by_value(self, minimum: int = 0, maximum: Optional[int] = None, limit: Optional[int] = None) -> List[Utxo]:
+        """
+        :returns: the unspent outputs worth from minimum to maximum satoshis, smallest first
+        """
+        sql = f"SELECT {_COLUMNS} FROM utxo WHERE satoshis >= ?"
+        params: tuple = (minimum,)
+        if maximum is not None:
+            sql += " AND satoshis <= ?"
+            params += (maximum,)
+        sql += " ORDER BY satoshis"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [_utxo(row) for row in self._query(sql, params)]
+
+    def balance(self, scripthash: str) -> int:
+        sql = "SELECT COALESCE(SUM(satoshis), 0) FROM utxo WHERE scripthash = ?"
+        return self._query(sql, (bytes.fromhex(scripthash),))[0][0]
+
+    def tip(self) -> Optional[Tuple[int, str]]:
+        """
+        :returns: height and hash of the last block applied, None before any
+        """
+        rows = self._query("SELECT key, value FROM meta WHERE key IN ('tip_height', 'tip_hash')")
+        meta = dict(rows)
+        return (meta["tip_height"], meta["tip_hash"]) if "tip_height" in meta else None
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM utxo")[0][0]
+
+
+class UtxoSnapshot(_UtxoReader):
+    """
+    Consistent read-only view of a UtxoStore, unaffected by blocks applied while it is open.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+
+class UtxoStore(_UtxoReader):
+    """
+    Unspent outputs kept in an SQLite file, keyed by outpoint and indexed by ElectrumX script hash, value and the
+    Glyph references their locking scripts push.
+
+    apply_block() applies the spends and creations of a whole block in one write transaction: outputs created and
+    spent within the block never reach the file, the rest is written with a few bulk statements. The file is in WAL
+    mode, so readers in other threads or processes open a snapshot() and keep reading the state they started from
+    while blocks are applied.
+
+    Example:
+        with UtxoStore("utxo.sqlite") as store:
+            store.apply_block(Block(raw), height, keep=watched_scripthashes.__contains__)
+            with store.snapshot() as snapshot:
+                utxos = snapshot.by_scripthash(scripthash)
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: file of the store, created when missing
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # a crash may lose the last blocks applied, never corrupt the file
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # transactions are begun explicitly
+        return sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[_Row]:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def add(self, utxos: Iterable[Utxo]) -> None:
+        """
+        stores unspent outputs listed elsewhere, e.g. by an ElectrumX server, their locking script must be known
+        """
+        rows = [
+            (
+                bytes.fromhex(utxo.txid),
+                utxo.index,
+                utxo.satoshis,
+                utxo.height,
+                bytes.fromhex(utxo.scripthash),
+                bytes(utxo.locking_script),
+            )
+            for utxo in utxos
+        ]
+        with self._write() as connection:
+            self._insert(connection, rows)
+
+    def spend(self, outpoints: Iterable[Outpoint]) -> None:
+        with self._write() as connection:
+            self._delete(connection, [(bytes.fromhex(txid), vout) for txid, vout in outpoints])
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, rows: List[_Row]) -> None:
+        # an outpoint stored again may carry another locking script, its old references go with it
+        connection.executemany("DELETE FROM utxo_ref WHERE txid = ? AND vout = ?", [row[:2] for row in rows])
+        connection.executemany("INSERT OR REPLACE INTO utxo VALUES (?, ?, ?, ?, ?, ?)", rows)
+        connection.executemany(
+            "INSERT OR IGNORE INTO utxo_ref VALUES (?, ?, ?)",
+            [(ref, row[0], row[1]) for row in rows for ref in script_refs(row[5])],
+        )
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, outpoints: List[Tuple[bytes, int]]) -> int:
+        """
+        :returns: number of the outpoints that were stored
+        """
+        before = connection.total_changes
+        connection.executemany("DELETE FROM utxo WHERE txid = ? AND vout = ?", outpoints)
+        deleted = connection.total_changes - before
+        connection.executemany("DELETE FROM utxo_ref WHERE txid = ? AND vout = ?", outpoints)
+        return deleted
+
+    def apply_transactions(
+        self,
+        txs: Iterable[Union[Transaction, LazyTransaction]],
+        height: int,
+        keep: Optional[Callable[[str], bool]] = None,
+        tip_hash: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """
+        Applies the spends and creations of transactions in order, in one write transaction.
+
+        :param height: height of the block the transactions are confirmed in, 0 for unconfirmed ones
+        :param keep: optional filter on the ElectrumX script hash of each output created, by default every output
+            is stored
+        :param tip_hash: hash of the block, recorded with height as the tip of the store
+        :returns: number of outputs stored and number of stored outputs spent
+        """
+        created: Dict[Tuple[bytes, int], _Row] = {}
+        spent: Set[Tuple[bytes, int]] = set()
+        for tx in txs:
+            txid, spends, outputs = _transaction_changes(tx)
+            for source_txid, source_vout in spends:
+                outpoint = (bytes.fromhex(source_txid), source_vout)
+                # an output created earlier in the same batch is never written
+                if created.pop(outpoint, None) is None:
+                    spent.add(outpoint)
+            txid_bytes = bytes.fromhex(txid)
+            for vout, (satoshis, locking_script) in enumerate(outputs):
+                scripthash = electrumx_scripthash(locking_script)
+                if keep is None or keep(scripthash):
+                    created[(txid_bytes, vout)] = (
+                        txid_bytes,
+                        vout,
+                        satoshis,
+                        height,
+                        bytes.fromhex(scripthash),
+                        locking_script,
+                    )
+
+        with self._write() as connection:
+            spent_count = self._delete(connection, list(spent))
+            self._insert(connection, list(created.values()))
+            if tip_hash is not None:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)", [("tip_height", height), ("tip_hash", tip_hash)]
+                )
+        return len(created), spent_count
+
+    def apply_block(self, block: Block, height: int, keep: Optional[Callable[[str], bool]] = None) -> Tuple[int, int]:
+        """
+        applies every transaction of the block, see apply_transactions()
+        """
+        return self.apply_transactions(block.transactions(), height, keep, block.block_hash())
+
+    @contextmanager
+    def snapshot(self) -> Iterator[UtxoSnapshot]:
+        """
+        read-only view on its own connection, seeing the store as it was when the snapshot was opened
+        """
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN")
+            # the read transaction pins its view at its first read
+            connection.execute("SELECT COUNT(*) FROM meta").fetchone()
+            yield UtxoSnapshot(connection)
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "UtxoStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"<UtxoStore path={self.path}>"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -4,12 +4,12 @@ from rxdpy.script.type import P2PKH
 from rxdpy.hd import seed_from_mnemonic, master_xprv_from_seed
 from rxdpy.hd import bip44_derive_xprvs_from_mnemonic
 from rxdpy.constants import BIP44_DERIVATION_PATH
-from rxdpy.hash import sha256
 from rxdpy.fee_models import SatoshisPerKilobyte
+from rxdpy.network import ElectrumXClient, Utxo, address_scripthash
+from rxdpy.coin_selection import select_coins
+from rxdpy.transaction.broadcasters import ElectrumXBroadcaster
 
 import asyncio
-import websockets
-import json
 import sys
 
 if sys.platform == 'win32':
@@ -29,38 +29,23 @@ async def rxd_send_transaction(wif: str, to_address: str, amount: int):
     # Fetch relay fee
     relay_fee = await fetch_relay_fee()
     print(f"Relay fee: {relay_fee} satoshis")
-    # Create inputs from UTXOs
-    inputs = []
-    total_input = 0
-    for utxo in utxos:
-        source_tx = Transaction([], [TransactionOutput(P2PKH().lock(from_address), utxo["value"])])
-        source_tx.txid = lambda: utxo["tx_hash"]
-
-        inputs.append(
-            TransactionInput(
-                source_transaction=source_tx,
-                source_output_index=utxo["tx_pos"],
-                unlocking_script_template=P2PKH().unlock(private_key),
-            )
-        )
-        total_input += utxo["value"]
-
-        if total_input >= amount:
-            break
-
-    if total_input < amount:
-        raise ValueError("Insufficient funds")
+    # Select inputs paying the amount and the fee, with as little change as possible
+    scripthash = address_scripthash(from_address)
+    locking_script = P2PKH().lock(from_address).serialize()
+    coins = [
+        Utxo(utxo["tx_hash"], utxo["tx_pos"], utxo["value"], utxo["height"], scripthash, locking_script)
+        for utxo in utxos
+    ]
+    outputs = [TransactionOutput(P2PKH().lock(to_address), amount)]
+    fee_model = SatoshisPerKilobyte(1_000_000)
+    selection = select_coins(coins, outputs, fee_model, P2PKH().unlock(private_key))
 
     # Create spend transaction
     spend_tx = Transaction(
-        inputs,
-        [
-            TransactionOutput(P2PKH().lock(to_address), amount),
-            TransactionOutput(P2PKH().lock(from_address), change=True),
-        ],
+        selection.inputs(P2PKH().unlock(private_key)),
+        outputs + [TransactionOutput(P2PKH().lock(from_address), change=True)],
     )
 
-    fee_model = SatoshisPerKilobyte(1_000_000)
     spend_tx.fee(fee_model)
     spend_tx.sign()
 
@@ -77,38 +62,22 @@ async def rxd_send_transaction(wif: str, to_address: str, amount: int):
     return spend_tx
 
 
+ELECTRUMX_URL = "wss://electrumx.radiant4people.com:50022/"
+
+
 async def fetch_utxos(address: str):
-    uri = "wss://electrumx.radiant4people.com:50022/"
-    async with websockets.connect(uri) as websocket:
-        script = P2PKH().lock(address)
-        script_bytes = script.serialize()
-        script_hash = sha256(script_bytes).hex()
-        reversed_script_hash = "".join(reversed([script_hash[i : i + 2] for i in range(0, len(script_hash), 2)]))
-        request = {"method": "blockchain.scripthash.listunspent", "params": [reversed_script_hash], "id": 1}
-        print(f"Request: {request}")
-        await websocket.send(json.dumps(request))
-        response = await websocket.recv()
-        response_json = json.loads(response)
-        return response_json.get("result", [])
+    async with ElectrumXClient(ELECTRUMX_URL, pool_size=1) as client:
+        return await client.listunspent(address_scripthash(address))
 
 
 async def fetch_relay_fee() -> int:
-    uri = "wss://electrumx.radiant4people.com:50022/"
-    async with websockets.connect(uri) as websocket:
-        request = {"method": "blockchain.relayfee", "params": [], "id": 1}
-        await websocket.send(json.dumps(request))
-        response = await websocket.recv()
-        response_json = json.loads(response)
-        return int(response_json.get("result", 0) * 1e8)
+    async with ElectrumXClient(ELECTRUMX_URL, pool_size=1) as client:
+        return await client.relay_fee()
 
 
 async def broadcast_transaction(tx: Transaction):
-    uri = "wss://electrumx.radiant4people.com:50022/"
-    async with websockets.connect(uri) as websocket:
-        request = {"method": "blockchain.transaction.broadcast", "params": [tx.hex()], "id": 1}
-        await websocket.send(json.dumps(request))
-        response = await websocket.recv()
-        return response
+    async with ElectrumXBroadcaster(ELECTRUMX_URL) as broadcaster:
+        return await tx.broadcast(broadcaster)
 
 
 if __name__ == "__main__":
@@ -10,11 +10,19 @@ In VSCode, Code Coverage is recorded in config.xml. Delete this file to reset re
 
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, Iterable, List, Tuple
 
 import pytest
 from _pytest.nodes import Item
 
+from rxdpy.keys import PrivateKey
+from rxdpy.script.script import Script
+from rxdpy.script.spend import Spend
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_input import TransactionInput
+from rxdpy.transaction.transaction_output import TransactionOutput
+
 
 def pytest_collection_modifyitems(items: list[Item]):
     for item in items:
@@ -28,3 +36,93 @@ def pytest_collection_modifyitems(items: list[Item]):
 def unit_test_mocks(monkeypatch: None):
     """Include Mocks here to execute all commands offline and fast."""
     pass
+
+
+@pytest.fixture
+def p2pkh_transaction() -> Callable[..., Transaction]:
+    """
+    Builds unsigned transactions spending P2PKH outputs of one key to a fixed output and a change output.
+    """
+
+    def build(inputs_count: int = 3) -> Transaction:
+        private_key = PrivateKey(0xC0FFEE)
+        address = private_key.address()
+        inputs = []
+        for i in range(inputs_count):
+            source_tx = Transaction([], [TransactionOutput(P2PKH().lock(address), 1000 + i)], locktime=i)
+            inputs.append(
+                TransactionInput(
+                    source_transaction=source_tx,
+                    source_output_index=0,
+                    unlocking_script_template=P2PKH().unlock(private_key),
+                )
+            )
+        outputs = [
+            TransactionOutput(P2PKH().lock(address), 1500),
+            TransactionOutput(P2PKH().lock(address), change=True),
+        ]
+        return Transaction(inputs, outputs)
+
+    return build
+
+
+@pytest.fixture
+def unsigned_transaction() -> Callable[..., Transaction]:
+    """
+    Builds transactions with empty unlocking scripts from (txid, output index) spends and (locking script, satoshis)
+    outputs.
+    """
+
+    def build(
+        spends: Iterable[Tuple[str, int]], outputs: Iterable[Tuple[Script, int]], locktime: int = 0
+    ) -> Transaction:
+        inputs = [
+            TransactionInput(source_txid=txid, source_output_index=index, unlocking_script=Script(""))
+            for txid, index in spends
+        ]
+        return Transaction(
+            inputs, [TransactionOutput(script, satoshis) for script, satoshis in outputs], locktime=locktime
+        )
+
+    return build
+
+
+@pytest.fixture
+def script_spend() -> Callable[..., Spend]:
+    """
+    Builds Spend objects evaluating a locking script, and optionally an unlocking script, both given as ASM.
+    """
+
+    def build(locking_asm: str, unlocking_asm: str = "") -> Spend:
+        return Spend(
+            {
+                "sourceTXID": "00" * 32,
+                "sourceOutputIndex": 0,
+                "sourceSatoshis": 1000,
+                "lockingScript": Script.from_asm(locking_asm),
+                "transactionVersion": 1,
+                "otherInputs": [],
+                "outputs": [],
+                "inputIndex": 0,
+                "unlockingScript": Script.from_asm(unlocking_asm) if unlocking_asm else Script(),
+                "inputSequence": 0xFFFFFFFF,
+                "lockTime": 0,
+            }
+        )
+
+    return build
+
+
+@pytest.fixture
+def run_script(script_spend) -> Callable[..., List[bytes]]:
+    """
+    Evaluates scripts given as ASM step by step, returns the stack once the locking script ran.
+    """
+
+    def run(locking_asm: str, unlocking_asm: str = "") -> List[bytes]:
+        spend = script_spend(locking_asm, unlocking_asm)
+        while not (spend.context == "LockingScript" and spend.program_counter >= len(spend.locking_script.chunks)):
+            spend.step()
+        return [bytes(item) for item in spend.stack]
+
+    return run
@@ -0,0 +1,67 @@
+import pytest
+
+from rxdpy.address_index import AddressIndex, electrumx_scripthash, p2pkh_locking_script
+from rxdpy.constants import Network
+from rxdpy.hash import sha256
+from rxdpy.hd import Xprv, bip32_derive_xkeys_from_xkey
+from rxdpy.keys import PrivateKey
+from rxdpy.script.type import P2PKH
+
+
+def test_address_index():
+    keys = [PrivateKey(i + 1).public_key() for i in range(5)]
+    index = AddressIndex()
+    entries = index.add_public_keys(keys, paths=[f'0/{i}' for i in range(5)])
+    assert len(index) == 5
+
+    for key, entry in zip(keys, entries):
+        address = key.address()
+        locking_script = P2PKH().lock(address)
+        scripthash = sha256(locking_script.serialize())[::-1].hex()
+        assert entry.address == address
+        assert entry.locking_script == locking_script.serialize() == p2pkh_locking_script(key.hash160())
+        assert entry.scripthash == scripthash == electrumx_scripthash(locking_script)
+        assert index.by_address(address) is entry
+        assert index.by_hash160(key.hash160()) is entry
+        assert index.by_locking_script(locking_script) is entry
+        assert index.by_scripthash(scripthash) is entry
+        assert address in index
+
+    assert index.by_address(PrivateKey(100).address()) is None
+    assert index.by_locking_script(b'\x6a') is None
+    # adding a key again keeps its first entry
+    assert index.add_public_keys([keys[0]])[0].path == '0/0'
+    assert len(index) == 5
+
+
+def test_address_index_sources():
+    xprv = Xprv.from_seed('00' * 64)
+    xkeys = bip32_derive_xkeys_from_xkey(xprv.xpub(), 0, 3)
+    index = AddressIndex()
+    entries = index.add_xkeys(xkeys)
+    assert [entry.address for entry in entries] == [xkey.address() for xkey in xkeys]
+    assert index.add_addresses([xkeys[0].address()]) == entries[:1]
+    # entries can be kept in sets and dict keys
+    assert len(set(entries + index.add_addresses([xkeys[1].address()]))) == 3
+
+    testnet = AddressIndex(Network.TESTNET)
+    address = PrivateKey(1, network=Network.TESTNET).address()
+    assert testnet.add_addresses([address])[0].address == address
+    with pytest.raises(ValueError, match='expected testnet'):
+        testnet.add_addresses([PrivateKey(1).address()])
+    with pytest.raises(ValueError, match='invalid public key hash'):
+        index.add_hash160s([b'\x00'])
+
+
+def test_address_index_save_load(tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+    index = AddressIndex()
+    index.add_public_keys([PrivateKey(i + 1).public_key() for i in range(10)], paths=[str(i) for i in range(10)])
+    index.save(path)
+    AddressIndex(Network.TESTNET).save(path)
+
+    loaded = AddressIndex.load(path)
+    assert list(loaded) == list(index)
+    entry = next(iter(index))
+    assert loaded.by_scripthash(entry.scripthash).locking_script == entry.locking_script
+    assert len(AddressIndex.load(path, Network.TESTNET)) == 0
@@ -2,6 +2,7 @@ import pytest
 
 from rxdpy.base58 import base58check_encode, base58check_decode, b58_encode, b58_decode
 from rxdpy.base58 import to_base58check, from_base58check
+from rxdpy.utils import to_base58, from_base58, to_base58_check, from_base58_check
 
 ADDRESS = '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'
 PUBLIC_KEY_HASH = bytes.fromhex('62e907b15cbf27d5425399ebf6f0fb50ebb88f18')
@@ -57,3 +58,29 @@ def test_to_base58check():
     for i in range(len(payloads)):
         assert to_base58check(payloads[i], prefixes[i]) == encoded[i]
         assert from_base58check(encoded[i]) == (prefixes[i], payloads[i])
+
+
+def test_base58_round_trip():
+    payloads = [b'', b'\x00', b'\x00\x00\x01', b'hello world', bytes(range(256)), b'\xff' * 82]
+    encoded = [b58_encode(payload) for payload in payloads]
+    assert encoded[:4] == ['', '1', '112', 'StV1DL6CwTryKyV']
+    assert [b58_decode(item) for item in encoded] == payloads
+    assert base58check_encode(b'hello world') == '3vQB7B6MrGQZaxCuFg4oh'
+    assert [base58check_decode(base58check_encode(payload)) for payload in payloads] == payloads
+
+    for invalid in ['0', 'StV1DL6CwTryKyV\u00e9', 'I1']:
+        with pytest.raises(ValueError, match=r'invalid base58 encoded'):
+            b58_decode(invalid)
+
+
+def test_utils_base58():
+    assert to_base58(list(b'hello world')) == 'StV1DL6CwTryKyV'
+    assert from_base58('112') == [0, 0, 1]
+    with pytest.raises(ValueError, match=r'Invalid base58 character'):
+        from_base58('0OIl')
+
+    encoded = to_base58_check(list(PUBLIC_KEY_HASH))
+    assert encoded == ADDRESS
+    assert from_base58_check(encoded, 'hex') == {'prefix': '00', 'data': PUBLIC_KEY_HASH.hex()}
+    with pytest.raises(ValueError, match=r'Invalid checksum'):
+        from_base58_check('3vQB7B6MrGQZaxCuFg4oi')
@@ -0,0 +1,124 @@
+import io
+
+import pytest
+
+from rxdpy.block import Block, BlockHeader, MerkleRootBuilder
+from rxdpy.hash import hash256, hash512_256
+from rxdpy.keys import PrivateKey
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.lazy_transaction import LazyTransaction
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_output import TransactionOutput
+from rxdpy.utils import Writer
+
+ADDRESS = PrivateKey(0xC0FFEE).address()
+
+
+def _naive_merkle_root(hashes):
+    level = list(hashes)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hash256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def _block(tx_count: int = 5, merkle_root: bytes = None):
+    txs = [Transaction([], [TransactionOutput(P2PKH().lock(ADDRESS), 1000 + i)], locktime=i) for i in range(tx_count)]
+    header = BlockHeader(
+        version=0x20000000,
+        prev_block_hash=bytes(range(32)),
+        merkle_root=merkle_root or _naive_merkle_root([tx.hash() for tx in txs]),
+        time=1700000000,
+        bits=0x1D00FFFF,
+        nonce=42,
+    )
+    writer = Writer()
+    writer.write(header.serialize())
+    writer.write_var_int_num(len(txs))
+    for tx in txs:
+        writer.write(tx.serialize())
+    return writer.to_bytes(), txs
+
+
+def test_block_header():
+    raw, _ = _block()
+    header = BlockHeader.from_bytes(raw[:80])
+    assert header.serialize() == raw[:80]
+    assert header.version == 0x20000000
+    assert header.nonce == 42
+    assert header.hash() == hash512_256(raw[:80])
+    assert header.block_hash() == header.hash()[::-1].hex()
+    with pytest.raises(ValueError):
+        BlockHeader.from_bytes(raw[:79])
+
+
+@pytest.mark.parametrize("count", range(1, 21))
+def test_merkle_root_builder(count):
+    hashes = [hash256(i.to_bytes(4, "little")) for i in range(count)]
+    builder = MerkleRootBuilder()
+    for h in hashes:
+        builder.add(h)
+    assert builder.root() == _naive_merkle_root(hashes)
+
+
+def test_merkle_root_builder_empty():
+    with pytest.raises(ValueError):
+        MerkleRootBuilder().root()
+
+
+def test_block_from_bytes():
+    raw, txs = _block()
+    block = Block(raw)
+    assert len(block) == 5
+    assert list(block.txids()) == [tx.txid() for tx in txs]
+    assert all(isinstance(tx, LazyTransaction) for tx in block)
+    assert [tx.serialize() for tx in block.transactions(lazy=False)] == [tx.serialize() for tx in txs]
+    assert block.verify_merkle_root()
+
+    raw, _ = _block(merkle_root=b"\x00" * 32)
+    assert not Block(raw).verify_merkle_root()
+
+
+def test_block_from_file(tmp_path):
+    raw, txs = _block(7)
+    path = tmp_path / "block.bin"
+    path.write_bytes(raw)
+
+    with Block(path) as block:
+        assert [tx.txid() for tx in block] == [tx.txid() for tx in txs]
+        assert block.verify_merkle_root()
+
+    with open(path, "rb") as f:
+        with Block(f) as block:
+            assert block.verify_merkle_root()
+
+    with Block(io.BytesIO(raw)) as block:
+        assert block.verify_merkle_root()
+
+
+def test_block_truncated():
+    raw, _ = _block()
+    with pytest.raises(ValueError):
+        Block(raw[:50])
+    block = Block(raw[:-10])
+    with pytest.raises(ValueError):
+        list(block.txids())
+
+
+def test_block_truncated_file(tmp_path, monkeypatch):
+    raw, _ = _block()
+    path = tmp_path / "block.bin"
+    opened = []
+
+    def record(*args, **kwargs):
+        opened.append(io.open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr("rxdpy.block.open", record, raising=False)
+    for truncated in (raw[:50], raw[:80]):
+        path.write_bytes(truncated)
+        with pytest.raises(ValueError, match="truncated"):
+            Block(path)
+    # the files opened by the failed blocks were closed
+    assert len(opened) == 2 and all(f.closed for f in opened)
@@ -0,0 +1,144 @@
+import asyncio
+import random
+
+import pytest
+
+from rxdpy.keys import PrivateKey
+from rxdpy.network.electrumx import ElectrumXClient, ElectrumXError
+from rxdpy.network.electrumx_stub import ElectrumXStub
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.broadcaster import BroadcastFailure, is_broadcast_failure, is_broadcast_response
+from rxdpy.transaction.broadcasters import BroadcastQueue, ElectrumXBroadcaster, InMemoryBroadcaster
+
+locking_script = P2PKH().lock(PrivateKey(0xC0FFEE).address())
+
+
+@pytest.fixture
+def funding(unsigned_transaction):
+    return unsigned_transaction([('00' * 32, 0xFFFFFFFF)], [(locking_script, 1000000)])
+
+
+def _chain(build, funding, length: int):
+    txs = []
+    parent = funding
+    for i in range(length):
+        parent = build([(parent.txid(), 0)], [(locking_script, 1000000 - 1000 * (i + 1))])
+        txs.append(parent)
+    return txs
+
+
+def _fan_out(build, funding, count: int):
+    # independent transactions, each spending its own output of the funding transaction
+    return [build([(funding.txid(), i)], [(locking_script, 1000)]) for i in range(count)]
+
+
+def test_broadcast_queue_orders_chains(unsigned_transaction, funding):
+    async def run():
+        broadcaster = InMemoryBroadcaster(latency=0.001, check_inputs=True, confirmed=[funding.txid()])
+        queue = BroadcastQueue(broadcaster)
+        chain = _chain(unsigned_transaction, funding, 30)
+        shuffled = random.Random(1).sample(chain, len(chain))
+        results = await queue.broadcast_many(shuffled)
+        assert all(is_broadcast_response(result) for result in results)
+        assert [result.txid for result in results] == [tx.txid() for tx in shuffled]
+        # parents were accepted before their children
+        assert list(broadcaster.transactions) == [tx.txid() for tx in chain]
+        assert queue.stats.accepted == 30 and queue.stats.failed == 0
+        assert all(result.latency >= 0.001 for result in results)
+        assert queue.stats.max_latency >= queue.stats.mean_latency > 0
+
+        # the unordered chain without the queue misses its inputs
+        broadcaster = InMemoryBroadcaster(check_inputs=True, confirmed=[funding.txid()])
+        failure = await broadcaster.broadcast(chain[1])
+        assert is_broadcast_failure(failure) and failure.code == 'missing-inputs'
+
+    asyncio.run(run())
+
+
+def test_broadcast_queue_pipelines(unsigned_transaction, funding):
+    async def run():
+        broadcaster = InMemoryBroadcaster(latency=0.01)
+        queue = BroadcastQueue(broadcaster, max_in_flight=50)
+        txs = _fan_out(unsigned_transaction, funding, 200)
+        results = await queue.broadcast_many(txs)
+        assert all(is_broadcast_response(result) for result in results)
+        assert broadcaster.max_in_flight == 50
+        assert len(broadcaster.transactions) == 200
+
+    asyncio.run(run())
+
+
+def test_broadcast_queue_dedupes(unsigned_transaction, funding):
+    async def run():
+        def reject(tx):
+            return BroadcastFailure('fee', 'fee too low') if tx.outputs[0].satoshis == 1 else None
+
+        broadcaster = InMemoryBroadcaster(latency=0.01, reject=reject)
+        async with BroadcastQueue(broadcaster) as queue:
+            tx = _fan_out(unsigned_transaction, funding, 1)[0]
+            results = await asyncio.gather(*[queue.broadcast(tx) for _ in range(3)])
+            assert results[0] is results[1] is results[2]
+            assert broadcaster.calls == 1 and queue.stats.duplicates == 2
+            # accepted, answered again without sending
+            assert await queue.broadcast(tx) is results[0]
+            assert broadcaster.calls == 1
+
+            # spends the output tx spent
+            conflict = unsigned_transaction([(funding.txid(), 0)], [(locking_script, 999)])
+            result = await queue.broadcast(conflict)
+            assert result.code == 'txn-mempool-conflict' and result.txid == conflict.txid()
+
+            rejected = unsigned_transaction([(funding.txid(), 1)], [(locking_script, 1)])
+            child = unsigned_transaction([(rejected.txid(), 0)], [(locking_script, 500)])
+            queue.submit(rejected)
+            result = await queue.broadcast(child)
+            assert result.code == 'parent-rejected' and result.txid == child.txid()
+            # the child was not sent, a rejected transaction is sent again
+            assert broadcaster.calls == 3
+            assert (await queue.broadcast(rejected)).code == 'fee'
+            assert broadcaster.calls == 4
+            assert queue.stats.accepted == 1 and queue.stats.failed == 4
+
+            queue.submit(_fan_out(unsigned_transaction, funding, 3)[2])
+            assert queue.pending == 1
+        # closing waits for the pending broadcast
+        assert queue.pending == 0 and len(broadcaster.transactions) == 2
+        queue.clear()
+        assert await queue.broadcast(tx) is not results[0]
+
+    asyncio.run(run())
+
+
+def test_electrumx_broadcaster(unsigned_transaction, funding):
+    async def run():
+        def reject(raw):
+            raise ElectrumXError(1, 'the transaction was rejected by network rules.\n\nmissing-inputs')
+
+        async with ElectrumXStub() as stub:
+            async with ElectrumXClient(stub.url, pool_size=2) as client:
+                broadcaster = ElectrumXBroadcaster(client)
+                tx = _fan_out(unsigned_transaction, funding, 1)[0]
+                result = await tx.broadcast(broadcaster)
+                assert is_broadcast_response(result) and result.txid == tx.txid()
+                assert stub.transactions[tx.txid()] == tx.hex()
+                assert result.latency > 0
+
+                txs = _chain(unsigned_transaction, funding, 5) + _fan_out(unsigned_transaction, funding, 20)
+                results = await BroadcastQueue(broadcaster).broadcast_many(txs)
+                assert all(is_broadcast_response(result) for result in results)
+                assert set(stub.transactions) == {tx.txid() for tx in txs}
+
+                stub.handlers['blockchain.transaction.broadcast'] = reject
+                result = await broadcaster.broadcast(_chain(unsigned_transaction, funding, 1)[0])
+                assert result.code == '1' and 'missing-inputs' in result.description
+
+            # a url opens a client of the broadcaster's own, closed with it
+            async with ElectrumXBroadcaster(stub.url) as broadcaster:
+                stub.handlers['blockchain.transaction.broadcast'] = lambda raw: tx.txid()
+                assert (await broadcaster.broadcast(tx)).txid == tx.txid()
+            assert not any(connection.connected for connection in broadcaster.client.connections)
+
+        result = await ElectrumXBroadcaster(client).broadcast(tx)
+        assert result.code == 'network'
+
+    asyncio.run(run())
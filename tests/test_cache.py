@@ -0,0 +1,42 @@
+from rxdpy.cache import LRUCache, SignatureCache
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # b was the least recently used
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+
+    cache.resize(1)
+    assert len(cache) == 1 and 'c' in cache
+    cache.clear()
+    assert len(cache) == 0 and cache.stats.hits == 0
+
+
+def test_disabled_lru_cache():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a', 'missing') == 'missing'
+
+
+def test_signature_cache():
+    cache = SignatureCache(2)
+    assert not cache.contains(b'digest', b'key', b'sig')
+    cache.add(b'digest', b'key', b'sig')
+    assert cache.contains(b'digest', b'key', b'sig')
+    assert not cache.contains(b'digest', b'key', b'other')
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+    cache.add(b'digest', b'key', b'1')
+    cache.add(b'digest', b'key', b'2')
+    assert len(cache) == 2 and not cache.contains(b'digest', b'key', b'sig')
+    cache.resize(0)
+    cache.add(b'digest', b'key', b'sig')
+    assert len(cache) == 0
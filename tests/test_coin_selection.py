@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from rxdpy.coin_selection import CoinPool, CoinSelector, InsufficientFunds, select_coins
+from rxdpy.fee_models import SatoshisPerKilobyte
+from rxdpy.keys import PrivateKey
+from rxdpy.utxo import Utxo
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_output import TransactionOutput
+
+private_key = PrivateKey(0xC0FFEE)
+address = private_key.address()
+locking_script = P2PKH().lock(address).serialize()
+
+
+def _coins(values):
+    return [Utxo(f'{i:064x}', 0, value, 100, '', locking_script) for i, value in enumerate(values)]
+
+
+def _outputs(amount):
+    return [TransactionOutput(P2PKH().lock(PrivateKey(1).address()), amount)]
+
+
+def test_coin_pool():
+    coins = _coins([500, 100, 300, 300])
+    pool = CoinPool(coins)
+    assert [coin.satoshis for coin in pool] == [100, 300, 300, 500]
+    assert pool.total == 1200
+    assert pool.index(300) == 1
+    assert pool.sum(1, 3) == 600
+    pool.remove(coins[3])
+    pool.add(_coins([200])[0])
+    assert [coin.satoshis for coin in pool] == [100, 200, 300, 500]
+    assert pool.sum(0, 4) == 1100
+    assert coins[2] in list(pool)
+    with pytest.raises(KeyError):
+        pool.remove(coins[3])
+
+
+def test_coin_selection_fee_matches_transaction():
+    fee_model = SatoshisPerKilobyte(1000)
+    coins = _coins([10000, 20000, 40000, 80000])
+    for strategy in ('knapsack', 'largest_first'):
+        outputs = _outputs(50000)
+        selection = select_coins(coins, outputs, fee_model, P2PKH().unlock(private_key), strategy)
+        assert selection.strategy == strategy
+        assert selection.total == 50000 + selection.fee + selection.change
+        assert selection.change > 0
+
+        change = TransactionOutput(P2PKH().lock(address), selection.change)
+        tx = Transaction(selection.inputs(P2PKH().unlock(private_key)), outputs + [change]).sign()
+        assert fee_model.compute_fee(tx) <= selection.fee
+        assert tx.get_fee() == selection.fee
+        assert tx.byte_length() <= selection.byte_length
+        assert tx.verify()
+    # change goes to the change output when fee() is left to balance it
+    change = TransactionOutput(P2PKH().lock(address), change=True)
+    tx = Transaction(selection.inputs(P2PKH().unlock(private_key)), outputs + [change])
+    tx.fee(fee_model)
+    assert tx.outputs[-1].satoshis >= selection.change
+
+
+def test_branch_and_bound():
+    selector = CoinSelector(_outputs(0), 1000)
+    input_fee = selector.input_byte_length
+    base_fee = selector._byte_length(0, False)
+    # 3000 + 7000 pays the outputs and the fee exactly, no change needed
+    amount = 10000 - base_fee - 2 * input_fee
+    coins = _coins([1000, 3000, 5000, 7000, 12000])
+    selection = CoinSelector(_outputs(amount), 1000).branch_and_bound(coins)
+    assert sorted(coin.satoshis for coin in selection.coins) == [3000, 7000]
+    assert selection.change == 0
+    assert selection.fee == 10000 - amount
+    assert CoinSelector(_outputs(amount), 1000).select(coins).strategy == 'branch_and_bound'
+    # no combination within the cost of change
+    assert CoinSelector(_outputs(amount), 1000).branch_and_bound(_coins([100000])) is None
+
+
+def test_knapsack_prefers_closest():
+    selector = CoinSelector(_outputs(9000), 500, rng=random.Random(1))
+    selection = selector.knapsack(_coins([1000, 2000, 4000, 5000, 6000, 50000]))
+    assert selection.strategy == 'knapsack'
+    assert 50000 not in [coin.satoshis for coin in selection.coins]
+    assert selection.total < 12000
+    # the smallest coin covering the target beats combinations of smaller ones exceeding it
+    selection = CoinSelector(_outputs(9000), 500).knapsack(_coins([6000, 6000, 9800]))
+    assert [coin.satoshis for coin in selection.coins] == [9800]
+
+
+def test_coin_selection_skips_dust_and_fails():
+    selector = CoinSelector(_outputs(1000), 1000)
+    # worth less than the fee of spending them
+    dust = _coins([100] * 50)
+    with pytest.raises(InsufficientFunds, match=r'5950 satoshis available') as e:
+        selector.select(dust + _coins([950]))
+    assert e.value.available == 5950
+    selection = selector.select(dust + _coins([950, 5000]))
+    assert [coin.satoshis for coin in selection.coins] == [5000]
+
+
+def test_coin_selection_time_bound():
+    rng = random.Random(7)
+    pool = CoinPool(_coins([rng.randint(1000, 10**8) for _ in range(20000)]))
+    selector = CoinSelector(_outputs(123456789), 1000, time_limit_ms=5, rng=rng)
+    for strategy in ('branch_and_bound', 'knapsack', 'largest_first'):
+        selection = selector.select(pool, strategy)
+        assert selection.total == 123456789 + selection.fee + selection.change
+    pool.remove_all(selection.coins)
+    assert len(pool) == 20000 - len(selection.coins)
@@ -0,0 +1,62 @@
+import pytest
+
+from rxdpy.constants import OpCode
+from rxdpy.script.compiled_script import CompiledScript
+from rxdpy.script.script import Script
+
+
+def test_compiled_script():
+    program = CompiledScript(Script.from_asm('OP_DUP OP_HASH160 ' + '11' * 20 + ' OP_EQUALVERIFY OP_CHECKSIG'))
+    assert program.opcodes == [0x76, 0xA9, 0x14, 0x88, 0xAC]
+    assert program.data == [None, None, b'\x11' * 20, None, None]
+    assert program.jumps == [-1] * 5
+    assert len(program) == 5
+    assert not program.is_push_only()
+    assert CompiledScript(Script.from_asm('OP_1 aabb OP_16')).is_push_only()
+    assert program.p2pkh_hash == b'\x11' * 20
+    assert CompiledScript(Script.from_asm('OP_DUP OP_HASH160 ' + '11' * 20 + ' OP_EQUAL OP_CHECKSIG')).p2pkh_hash is None
+
+
+def test_jump_targets():
+    program = CompiledScript(
+        Script.from_asm('OP_IF OP_1 OP_NOTIF OP_2 OP_ENDIF OP_ELSE OP_3 OP_ELSE OP_4 OP_ENDIF OP_IF OP_ENDIF')
+    )
+    assert program.jumps == [5, -1, 4, -1, -1, 7, -1, 9, -1, -1, 11, -1]
+    # unbalanced branches are stepped through
+    assert CompiledScript(Script.from_asm('OP_IF OP_1')).jumps == [-1, -1]
+    # a skipped branch must still fail on OP_VERIF and undefined opcodes
+    assert CompiledScript(Script.from_asm('OP_IF OP_VERIF OP_ENDIF')).jumps == [-1, -1, -1]
+    assert CompiledScript(Script(bytes([0x63, 0xF0, 0x68]))).jumps == [-1, -1, -1]
+
+
+@pytest.mark.parametrize(
+    'locking_asm, stack',
+    [
+        ('OP_0 OP_IF OP_1 OP_IF OP_2 OP_ENDIF OP_ELSE OP_3 OP_ENDIF', ['03']),
+        ('OP_1 OP_IF OP_0 OP_IF OP_2 OP_ELSE OP_4 OP_ENDIF OP_ELSE OP_3 OP_ENDIF', ['04']),
+        ('OP_0 OP_IF OP_1 OP_ELSE OP_2 OP_ELSE OP_3 OP_ENDIF', ['02']),
+        ('OP_1 OP_IF OP_1 OP_ELSE OP_2 OP_ELSE OP_3 OP_ENDIF', ['01', '03']),
+    ],
+)
+def test_skipped_branches(locking_asm, stack, run_script):
+    assert run_script(locking_asm) == [bytes.fromhex(item) for item in stack]
+
+
+def test_skipped_branch_errors(run_script, script_spend):
+    with pytest.raises(Exception, match='Invalid opcode!'):
+        run_script('OP_0 OP_IF OP_VERIF OP_ENDIF')
+    spend = script_spend('OP_1')
+    spend.locking_script = Script(bytes([0x00, 0x63, 0xF0, 0x68]))
+    with pytest.raises(Exception, match='An opcode is missing'):
+        spend.validate()
+
+
+def test_compile_cache(script_spend):
+    CompiledScript.cache.clear()
+    script = Script.from_asm('OP_1 OP_2 OP_ADD')
+    program = CompiledScript.compile(script)
+    assert CompiledScript.compile(Script(script.serialize())) is program
+    assert CompiledScript.cache.stats.hits == 1
+    assert CompiledScript.cache.stats.misses == 1
+    assert script_spend('OP_1 OP_2 OP_ADD').locking_program is program
+    assert program.opcodes[-1] == OpCode.OP_ADD[0]
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from rxdpy.address_index import AddressIndex
+from rxdpy.hd.bip32 import Xprv
+from rxdpy.hd.discovery import GapLimitScanner
+from rxdpy.keys import PrivateKey
+from rxdpy.network.electrumx import ElectrumXClient, ElectrumXError, ElectrumXHistory, address_scripthash
+from rxdpy.network.electrumx_stub import ElectrumXStub
+
+
+def test_electrumx_request():
+    async def run():
+        async with ElectrumXStub() as stub:
+            scripthash = address_scripthash(PrivateKey(1).address())
+            stub.unspent[scripthash] = [{'tx_hash': '00' * 32, 'tx_pos': 0, 'height': 1, 'value': 1000}]
+            async with ElectrumXClient(stub.url, pool_size=2) as client:
+                assert await client.listunspent(scripthash) == stub.unspent[scripthash]
+                assert await client.relay_fee() == 1000000
+                txid = await client.broadcast(b'\x01\x02')
+                assert await client.get_transaction(txid) == '0102'
+                with pytest.raises(ElectrumXError, match=r'unknown transaction') as e:
+                    await client.get_transaction('11' * 32)
+                assert e.value.code == 2
+                with pytest.raises(ElectrumXError, match=r'unknown method'):
+                    await client.request('blockchain.nothing')
+            # connections are reused
+            assert stub.connections <= 2
+
+    asyncio.run(run())
+
+
+def test_electrumx_multiplexing():
+    async def run():
+        async def slow(seconds):
+            await asyncio.sleep(seconds)
+            return seconds
+
+        async with ElectrumXStub({'slow': slow}) as stub:
+            async with ElectrumXClient(stub.url, pool_size=1) as client:
+                # the fast request is answered first on the same connection, each gets its own response
+                assert await asyncio.gather(client.request('slow', 0.2), client.request('slow', 0)) == [0.2, 0]
+            assert stub.connections == 1
+
+    asyncio.run(run())
+
+
+def test_electrumx_batch():
+    async def run():
+        async with ElectrumXStub() as stub:
+            scripthashes = [address_scripthash(PrivateKey(i).address()) for i in range(1, 251)]
+            stub.history[scripthashes[7]] = [{'tx_hash': '00' * 32, 'height': 1}]
+            async with ElectrumXClient(stub.url, pool_size=3, batch_size=100) as client:
+                histories = await client.get_history_many(scripthashes)
+                assert [i for i, history in enumerate(histories) if history] == [7]
+                # 3 batches spread over the pool
+                assert stub.messages == 3
+                assert stub.connections == 3
+
+                results = await client.batch([('server.ping', []), ('blockchain.transaction.get', ['11' * 32])])
+                assert results[0] is None
+                assert isinstance(results[1], ElectrumXError)
+
+            def listunspent(scripthash):
+                if scripthash == scripthashes[1]:
+                    raise ElectrumXError(1, 'history too large')
+                return []
+
+            stub.handlers['blockchain.scripthash.listunspent'] = listunspent
+            async with ElectrumXClient(stub.url) as client:
+                with pytest.raises(ElectrumXError, match=r'history too large'):
+                    await client.listunspent_many(scripthashes)
+
+    asyncio.run(run())
+
+
+def test_electrumx_backpressure_and_timeout():
+    async def run():
+        active = [0, 0]
+
+        async def slow():
+            active[0] += 1
+            active[1] = max(active)
+            await asyncio.sleep(0.02)
+            active[0] -= 1
+
+        async with ElectrumXStub({'slow': slow, 'hang': lambda: asyncio.sleep(10)}) as stub:
+            async with ElectrumXClient(stub.url, pool_size=1, max_in_flight=4, batch_size=10) as client:
+                assert client.batch_size == 4
+                await asyncio.gather(*[client.request('slow') for _ in range(12)], client.batch([('slow', [])] * 9))
+                # never more than 4 requests sent ahead of their responses
+                assert active[1] == 4
+                assert client.connections[0].in_flight == 0
+                with pytest.raises(ValueError, match=r'a batch holds at most 4 calls'):
+                    await client.connections[0].batch([('slow', [])] * 5)
+
+            async with ElectrumXClient(stub.url, pool_size=1, timeout=0.1) as client:
+                with pytest.raises(asyncio.TimeoutError):
+                    await client.request('hang')
+                assert client.connections[0].in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_electrumx_reconnect():
+    async def run():
+        async with ElectrumXStub() as stub:
+            async with ElectrumXClient(stub.url, pool_size=1) as client:
+                await client.request('server.ping')
+                await stub.drop_connections()
+                await asyncio.sleep(0.05)
+                assert not client.connections[0].connected
+                assert await client.request('server.version') == ['ElectrumXStub', '1.4']
+            assert stub.connections == 2
+
+    asyncio.run(run())
+
+
+def test_electrumx_history_backend():
+    async def run():
+        xpub = Xprv.from_seed('00' * 64).xpub()
+        index = AddressIndex()
+        index.add_public_keys([xpub.ckd(0).ckd(i).public_key() for i in (2, 9)])
+        async with ElectrumXStub() as stub:
+            for scripthash in index.scripthashes():
+                stub.history[scripthash] = [{'tx_hash': '00' * 32, 'height': 1}]
+            async with ElectrumXClient(stub.url) as client:
+                scanner = GapLimitScanner(xpub, ElectrumXHistory(client, asyncio.get_running_loop()), batch_size=10)
+                return await asyncio.get_running_loop().run_in_executor(None, scanner.scan)
+
+    discovery = asyncio.run(run())
+    assert discovery.chains[0].used == [2, 9]
+    assert discovery.chains[1].used == []
@@ -1,6 +1,10 @@
 import pytest
 
-from rxdpy.hd.bip32 import Xpub, Xprv, ckd, master_xprv_from_seed
+from rxdpy.address_index import AddressIndex
+from rxdpy.hd.bip32 import Xkey, Xpub, Xprv, ckd, master_xprv_from_seed
+from rxdpy.hd.derivation_cache import DerivationCache
+from rxdpy.hd.derive_range import derive_range
+from rxdpy.hd.discovery import GapLimitScanner, LocalHistory
 from rxdpy.hd.bip39 import WordList, mnemonic_from_entropy, seed_from_mnemonic, validate_mnemonic
 from rxdpy.hd.bip44 import derive_xprvs_from_mnemonic, derive_xkeys_from_xkey
 
@@ -72,6 +76,38 @@ def test_ckd():
         ckd(Xpub(master_xpub), "m/0'")
 
 
+def test_ckd_child_cache():
+    xprv = Xprv(master_xprv)
+    child = xprv.ckd(0)
+    assert xprv.ckd(0) is child
+    assert xprv.ckd('00000000') is child
+    assert ckd(xprv, "m/44'/0'/0'/0/5") is ckd(xprv, "m/44'/0'/0'/0/5")
+    assert ckd(xprv, "m/44'/0'/0'/0/5") == ckd(Xprv(master_xprv), "m/44'/0'/0'/0/5")
+    assert ckd(xprv, "m/44'/0'/0'").xpub().ckd(0).ckd(5) == ckd(xprv, "m/44'/0'/0'/0/5").xpub()
+    assert Xpub(master_xpub).ckd(0) is not None
+    assert child.identifier_fingerprint() == Xpub(normal_xpub).identifier_fingerprint()
+
+
+def test_derivation_cache(tmp_path):
+    path = str(tmp_path / 'derivations.sqlite')
+    expected = ckd(Xprv(master_xprv), "m/44'/0'/0'/0/1")
+    try:
+        with DerivationCache(path) as cache:
+            Xkey.derivation_cache = cache
+            assert ckd(Xprv(master_xprv), "m/44'/0'/0'/0/1") == expected
+            # hardened derivations only
+            assert len(cache) == 3
+
+        with DerivationCache(path) as cache:
+            Xkey.derivation_cache = cache
+            account = ckd(Xprv(master_xprv), "m/44'/0'/0'")
+            assert cache.get(Xprv(master_xprv).payload, 0x8000002C) == ckd(Xprv(master_xprv), "m/44'").payload
+            assert account.ckd(0).ckd(1) == expected
+            assert len(cache) == 3
+    finally:
+        Xkey.derivation_cache = None
+
+
 def test_wordlist():
     assert WordList.get_word(0) == 'abandon'
     assert WordList.get_word(9) == 'abuse'
@@ -194,3 +230,55 @@ def test_derive():
         derive_xkeys_from_xkey(xpub, "0'", "1'")
 
 
+def test_derive_range():
+    xpub = Xpub(master_xpub)
+    keys = derive_range(xpub, 5, 25, change=1)
+    assert len(keys) == 20
+    for i in (5, 17, 24):
+        child = xpub.ckd(1).ckd(i)
+        assert keys.public_key(i) == child.public_key().serialize()
+        assert keys.hash160(i) == child.public_key().hash160()
+    assert list(keys.iter_hash160s())[3] == keys.hash160(8)
+    with pytest.raises(IndexError):
+        keys.hash160(25)
+
+    # chunks spread over worker processes, the same children as derived in process
+    assert derive_range(xpub, 0, 30, chunk_size=7, max_workers=2).hash160s == derive_range(xpub, 0, 30).hash160s
+
+    xprv = Xprv(master_xprv)
+    hardened = derive_range(xprv, "0'", "3'")
+    assert hardened.public_key(0x80000000) == xprv.ckd(0x80000000).public_key().serialize()
+    assert hardened.public_key(0x80000002) == xprv.ckd(0x80000002).public_key().serialize()
+    assert derive_range(xprv, 0, 3).public_keys == derive_range(xpub, 0, 3).public_keys
+    with pytest.raises(ValueError, match=r"can't make hardened derivation from xpub"):
+        derive_range(xpub, 0, "1'")
+    with pytest.raises(ValueError, match=r'Invalid index range'):
+        derive_range(xpub, 3, 3)
+
+
+def test_gap_limit_scanner():
+    xpub = Xpub(master_xpub)
+    receiving = [xpub.ckd(0).ckd(i).public_key() for i in (0, 3, 21)]
+    change = xpub.ckd(1).ckd(40).public_key()
+    index = AddressIndex()
+    index.add_public_keys(receiving + [change])
+    history = LocalHistory(index.scripthashes())
+
+    discovery = GapLimitScanner(Xprv(master_xprv), history, gap_limit=20, batch_size=8).scan()
+    assert discovery.chains[0].used == [0, 3, 21]
+    assert discovery.chains[0].next_index == 22
+    assert discovery.chains[0].scanned >= 42
+    # index 40 of the change chain is beyond the gap
+    assert discovery.chains[1].used == []
+    assert discovery.chains[1].next_index == 0
+    assert discovery.used
+    assert discovery.index.by_address(receiving[2].address()).path == '0/21'
+    assert len(discovery.index) == 3
+
+    discovery = GapLimitScanner(xpub, history, gap_limit=50, batch_size=1000).scan()
+    assert discovery.chains[1].used == [40]
+    assert len(discovery.index) == 4
+
+    assert not GapLimitScanner(xpub, LocalHistory(), chains=[0]).scan().used
+    with pytest.raises(ValueError, match=r'gap_limit and batch_size must be positive'):
+        GapLimitScanner(xpub, history, gap_limit=0)
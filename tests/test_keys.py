@@ -1,4 +1,8 @@
-from rxdpy.keys import PrivateKey, PublicKey
+import pytest
+
+from rxdpy.constants import Network
+from rxdpy.hash import hash256
+from rxdpy.keys import PrivateKey, PublicKey, SIGNATURE_CACHE, PUBLIC_KEY_CACHE
 
 
 def test_import_private_key_and_verify():
@@ -58,3 +62,75 @@ def test_pub_key_from_hex():
     pub_key_hex = pub_key.hex()
     
     assert pub_key_hex == "02588d202afcc1ee4ab5254c7847ec25b9a135bbda0f2bc69ee1a714749fd77dc9"
+
+
+def test_verify_uses_signature_cache():
+    private_key = PrivateKey(0xBEEF)
+    public_key = private_key.public_key()
+    message = b'signature cache'
+    signature = private_key.sign(message)
+
+    SIGNATURE_CACHE.clear()
+    assert public_key.verify(signature, message)
+    assert SIGNATURE_CACHE.contains(hash256(message), public_key.serialize(), signature)
+    hits = SIGNATURE_CACHE.stats.hits
+    assert public_key.verify(signature, message)
+    assert public_key.verify_digest(signature, hash256(message))
+    assert SIGNATURE_CACHE.stats.hits == hits + 2
+
+    # invalid signatures are not remembered
+    assert not public_key.verify(signature, b'other message')
+    assert not SIGNATURE_CACHE.contains(hash256(b'other message'), public_key.serialize(), signature)
+
+
+def test_verify_batch():
+    private_keys = [PrivateKey(i + 1) for i in range(3)]
+    digests = [hash256(bytes([i])) for i in range(30)]
+    items = []
+    for i, digest in enumerate(digests):
+        private_key = private_keys[i % 3]
+        signature = private_key.sign(digest, hasher=None)
+        public_key = private_key.public_key()
+        items.append((public_key.serialize() if i % 2 else public_key, signature, digest))
+    # wrong key, malformed public key, malformed signature
+    items.append((private_keys[0].public_key().serialize(), items[1][1], digests[1]))
+    items.append((b'\x02' + b'\x00' * 32, items[0][1], digests[0]))
+    items.append((private_keys[0].public_key(), b'\x30\x01', digests[0]))
+
+    SIGNATURE_CACHE.clear()
+    expected = [True] * 30 + [False] * 3
+    assert PublicKey.verify_batch(items) == expected
+    assert len(SIGNATURE_CACHE) == 30
+    hits = SIGNATURE_CACHE.stats.hits
+    assert PublicKey.verify_batch(items, max_workers=1) == expected
+    assert SIGNATURE_CACHE.stats.hits == hits + 30
+    assert PublicKey.verify_batch([]) == []
+
+
+def test_intern_public_key():
+    private_key = PrivateKey(0xFEED)
+    compressed = private_key.public_key().serialize()
+    uncompressed = private_key.public_key().serialize(compressed=False)
+
+    PUBLIC_KEY_CACHE.clear()
+    key = PublicKey.intern(compressed)
+    assert PublicKey.intern(compressed.hex()) is key
+    assert PublicKey.intern(uncompressed) is not key
+    assert PublicKey.intern(uncompressed) == key
+    assert not PublicKey.intern(uncompressed).compressed
+    assert (PUBLIC_KEY_CACHE.stats.hits, PUBLIC_KEY_CACHE.stats.misses) == (3, 2)
+
+    with pytest.raises(AttributeError):
+        key.compressed = False
+    with pytest.raises(ValueError):
+        PublicKey.intern(b'\x02' + b'\x00' * 32)
+
+
+def test_public_key_derived_values_cached():
+    key = PrivateKey(0xFEED).public_key()
+    assert key.hash160() is key.hash160()
+    assert key.address() is key.address()
+    assert key.address(network=Network.TESTNET) != key.address()
+    assert key.address(network=Network.TESTNET).startswith(('m', 'n'))
+    assert key.address(compressed=False) == PublicKey(key.serialize(compressed=False)).address()
+    assert key.hash160(compressed=False) != key.hash160()
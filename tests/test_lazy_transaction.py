@@ -0,0 +1,71 @@
+import mmap
+
+import pytest
+
+from rxdpy.transaction.lazy_transaction import LazyTransaction
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.utils import MemoryReader
+
+TX_HEX = "01000000029e8d016a7b0dc49a325922d05da1f916d1e4d4f0cb840c9727f3d22ce8d1363f000000008c493046022100e9318720bee5425378b4763b0427158b1051eec8b08442ce3fbfbf7b30202a44022100d4172239ebd701dae2fbaaccd9f038e7ca166707333427e3fb2a2865b19a7f27014104510c67f46d2cbb29476d1f0b794be4cb549ea59ab9cc1e731969a7bf5be95f7ad5e7f904e5ccf50a9dc1714df00fbeb794aa27aaff33260c1032d931a75c56f2ffffffffa3195e7a1ab665473ff717814f6881485dc8759bebe97e31c301ffe7933a656f020000008b48304502201c282f35f3e02a1f32d2089265ad4b561f07ea3c288169dedcf2f785e6065efa022100e8db18aadacb382eed13ee04708f00ba0a9c40e3b21cf91da8859d0f7d99e0c50141042b409e1ebbb43875be5edde9c452c82c01e3903d38fa4fd89f3887a52cb8aea9dc8aec7e2c9d5b3609c03eb16259a2537135a1bf0f9c5fbbcbdbaf83ba402442ffffffff02206b1000000000001976a91420bb5c3bfaef0231dc05190e7f1c8e22e098991e88acf0ca0100000000001976a9149e3e2d23973a04ec1b02be97c30ab9f2f27c3b2c88ac00000000"
+
+
+def test_memory_reader():
+    data = bytearray(bytes.fromhex("01fd0201fe03020100ff0706050403020100") + b"abc")
+    reader = MemoryReader(data)
+    assert reader.read_uint8() == 1
+    assert reader.read_var_int_num() == 0x0102
+    assert reader.read_var_int_num() == 0x010203
+    assert reader.read_var_int_num() == 0x01020304050607
+    view = reader.read_view(2)
+    assert isinstance(view, memoryview) and view == b"ab"
+    data[-3] = ord("x")
+    assert view == b"xb"
+    assert reader.read(5) == b"c"
+    assert reader.eof()
+    assert reader.read(1) is None
+    assert reader.read_uint32_le() is None
+
+
+def test_lazy_transaction():
+    tx = Transaction.from_hex(TX_HEX)
+    lazy = LazyTransaction(TX_HEX)
+
+    assert lazy.version == tx.version and lazy.locktime == tx.locktime
+    assert lazy.txid() == tx.txid()
+    assert lazy.serialize() == tx.serialize()
+    assert lazy.byte_length() == tx.byte_length()
+    assert not lazy.is_coinbase()
+    assert lazy.script_offsets() == Transaction.parse_script_offsets(TX_HEX)
+
+    assert len(lazy.inputs) == 2 and len(lazy.outputs) == 2
+    assert lazy.source_txid(1) == tx.inputs[1].source_txid
+    assert lazy.source_output_index(1) == tx.inputs[1].source_output_index
+    assert lazy.sequence(0) == tx.inputs[0].sequence
+    assert lazy.unlocking_script_bytes(1) == tx.inputs[1].unlocking_script.serialize()
+    assert lazy.output_satoshis(1) == tx.outputs[1].satoshis
+    assert lazy.locking_script_bytes(0) == tx.outputs[0].locking_script.serialize()
+
+    assert lazy.inputs[0] is lazy.inputs[0]
+    assert lazy.inputs[-1].serialize() == tx.inputs[1].serialize()
+    assert [o.serialize() for o in lazy.outputs] == [o.serialize() for o in tx.outputs]
+    assert lazy.locking_script(1) == tx.outputs[1].locking_script
+    assert lazy.to_transaction().txid() == tx.txid()
+
+
+def test_lazy_transaction_over_mmap(tmp_path):
+    path = tmp_path / "txs.bin"
+    raw = bytes.fromhex(TX_HEX)
+    path.write_bytes(raw * 3)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = MemoryReader(mapped)
+        txs = [LazyTransaction.from_reader(reader) for _ in range(3)]
+        assert reader.eof()
+        assert {tx.txid() for tx in txs} == {Transaction.from_hex(raw).txid()}
+        assert txs[0].inputs[1].serialize() == Transaction.from_hex(raw).inputs[1].serialize()
+        assert Transaction.from_reader(MemoryReader(mapped)).hex() == TX_HEX
+        del txs, reader
+
+
+def test_lazy_transaction_truncated():
+    with pytest.raises(ValueError, match=r"truncated transaction"):
+        LazyTransaction(TX_HEX[:-10])
@@ -0,0 +1,59 @@
+from rxdpy.constants import OpCode
+from rxdpy.script.script import Script, ScriptChunk, tokenize
+
+
+def test_chunks_are_decoded_lazily():
+    script = Script('76a914' + '11' * 20 + '88ac')
+    assert script._chunks is None
+    assert script.byte_length() == 25
+    assert script._chunks is None
+
+    chunks = script.chunks
+    assert script.chunks is chunks
+    assert [chunk.op for chunk in chunks] == [
+        OpCode.OP_DUP,
+        OpCode.OP_HASH160,
+        b'\x14',
+        OpCode.OP_EQUALVERIFY,
+        OpCode.OP_CHECKSIG,
+    ]
+    assert chunks[2].data == b'\x11' * 20
+    assert script.to_asm() == 'OP_DUP OP_HASH160 ' + '11' * 20 + ' OP_EQUALVERIFY OP_CHECKSIG'
+
+
+def test_tokenize_pushdata():
+    data = bytes(range(256)) * 2
+    script = Script.from_asm(f'OP_0 {data[:3].hex()} {data[:100].hex()} {data.hex()} OP_1NEGATE')
+    chunks = Script(script.serialize()).chunks
+    assert [chunk.op for chunk in chunks] == [
+        b'\x00',
+        b'\x03',
+        OpCode.OP_PUSHDATA1,
+        OpCode.OP_PUSHDATA2,
+        OpCode.OP_1NEGATE,
+    ]
+    assert [chunk.data for chunk in chunks] == [None, data[:3], data[:100], data, None]
+
+
+def test_tokenize_truncated():
+    # truncated pushes keep whatever data is left
+    assert [(chunk.op, chunk.data) for chunk in tokenize(bytes.fromhex('05aabb'))] == [(b'\x05', b'\xaa\xbb')]
+    assert [(chunk.op, chunk.data) for chunk in tokenize(bytes.fromhex('4c'))] == [(OpCode.OP_PUSHDATA1, None)]
+    assert [(chunk.op, chunk.data) for chunk in tokenize(bytes.fromhex('4d02'))] == [(OpCode.OP_PUSHDATA2, b'')]
+
+
+def test_from_chunks_keeps_chunks():
+    chunks = [ScriptChunk(OpCode.OP_1), ScriptChunk(OpCode.OP_2)]
+    script = Script.from_chunks(chunks)
+    assert script.chunks is chunks
+    assert script.hex() == '5152'
+
+
+def test_reference_opcodes():
+    ref = bytes(range(36))
+    script = Script.from_asm(f'OP_PUSHINPUTREF {ref.hex()} OP_DROP OP_PUSHINPUTREFSINGLETON {ref.hex()}')
+    assert script.serialize() == b'\xd0' + ref + b'\x75\xd8' + ref
+    chunks = Script(script.serialize()).chunks
+    assert [(chunk.op, chunk.data) for chunk in chunks] == [(b'\xd0', ref), (b'\x75', None), (b'\xd8', ref)]
+    asm = f'OP_PUSHINPUTREF {ref.hex()} OP_DROP OP_PUSHINPUTREFSINGLETON {ref.hex()}'
+    assert Script(script.serialize()).to_asm() == asm
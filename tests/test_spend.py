@@ -0,0 +1,379 @@
+import pytest
+
+from rxdpy.hash import hash256
+from rxdpy.keys import PrivateKey, SIGNATURE_CACHE
+from rxdpy.script.script import Script
+from rxdpy.script.spend import Spend
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_input import TransactionInput
+from rxdpy.transaction.transaction_introspection import TransactionIntrospectionContext
+from rxdpy.transaction.transaction_output import TransactionOutput
+from rxdpy.transaction.transaction_verifier import TransactionVerifier
+
+
+@pytest.mark.parametrize(
+    'locking_asm, stack',
+    [
+        ('OP_1NEGATE OP_16 OP_ADD', ['0f']),
+        ('OP_5 OP_3 OP_SUB OP_7 OP_MUL', ['0e']),
+        ('OP_7 OP_2 OP_DIV OP_7 OP_2 OP_MOD', ['03', '01']),
+        ('OP_2 OP_3 OP_MIN OP_2 OP_3 OP_MAX OP_1 OP_0 OP_BOOLAND', ['02', '03', '']),
+        ('OP_3 OP_2 OP_5 OP_WITHIN OP_3 OP_NEGATE OP_ABS OP_1ADD', ['01', '04']),
+        ('OP_1 OP_2 OP_3 OP_ROT', ['02', '03', '01']),
+        ('OP_1 OP_2 OP_TUCK', ['02', '01', '02']),
+        ('OP_1 OP_2 OP_3 OP_2 OP_PICK', ['01', '02', '03', '01']),
+        ('OP_1 OP_2 OP_3 OP_2 OP_ROLL', ['02', '03', '01']),
+        ('OP_1 OP_2 OP_2DUP OP_2SWAP OP_SWAP OP_NIP', ['01', '02', '01']),
+        ('OP_1 OP_2 OP_3 OP_3DUP OP_DEPTH', ['01', '02', '03', '01', '02', '03', '06']),
+        ('0f0f f0ff OP_AND 0f0f f0ff OP_OR 0f0f f0ff OP_XOR', ['000f', 'ffff', 'fff0']),
+        ('00ff OP_INVERT OP_SIZE', ['ff00', '02']),
+        ('aabbcc OP_1 OP_SPLIT OP_SWAP OP_CAT', ['bbccaa']),
+        ('OP_2 OP_4 OP_NUM2BIN OP_0 OP_0 OP_NUM2BIN 0000 OP_BIN2NUM', ['02000000', '', '']),
+        ('OP_1 OP_1 OP_EQUAL OP_1 OP_2 OP_NUMEQUAL', ['01', '']),
+        ('OP_1 OP_IF OP_2 OP_ELSE OP_3 OP_ENDIF OP_0 OP_NOTIF OP_4 OP_ENDIF', ['02', '04']),
+        ('OP_1 OP_TOALTSTACK OP_2 OP_FROMALTSTACK', ['02', '01']),
+        ('OP_1 OP_RETURN OP_2', ['01']),
+        ('616263 OP_SHA256', ['ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad']),
+    ],
+)
+def test_opcodes(locking_asm, stack, run_script):
+    assert run_script(locking_asm) == [bytes.fromhex(item) for item in stack]
+
+
+@pytest.mark.parametrize(
+    'locking_asm, message',
+    [
+        ('OP_VER', 'This opcode is currently disabled.'),
+        ('OP_1 OP_2MUL', 'This opcode is currently disabled.'),
+        ('OP_RESERVED', 'Invalid opcode!'),
+        ('OP_0 OP_IF OP_VERIF OP_ENDIF', 'Invalid opcode!'),
+        ('OP_1 OP_0 OP_DIV', 'OP_DIV cannot divide by zero!'),
+        ('OP_DUP', 'OP_DUP requires at least one item to be on the stack.'),
+        ('OP_1 OP_2 OP_EQUALVERIFY', 'OP_EQUALVERIFY requires the top two stack items to be equal.'),
+        ('OP_1 OP_2 OP_NUMEQUALVERIFY', 'OP_NUMEQUALVERIFY requires the top stack item to be truthy.'),
+        ('OP_ELSE', 'OP_ELSE requires a preceeding OP_IF.'),
+        ('OP_1 OP_5 OP_PICK', 'OP_PICK requires the top stack element to be 0 or a positive number'),
+    ],
+)
+def test_opcode_errors(locking_asm, message, run_script):
+    with pytest.raises(Exception, match=message.replace('.', r'\.').replace('!', '')):
+        run_script(locking_asm)
+
+
+def test_missing_opcode(script_spend):
+    spend = script_spend('OP_1')
+    spend.locking_script = Script(b'\xf0')
+    spend.context = 'LockingScript'
+    with pytest.raises(Exception, match='An opcode is missing in this chunk of the LockingScript!'):
+        spend.step()
+
+
+def test_non_minimal_push(script_spend):
+    with pytest.raises(Exception, match='This data is not minimally-encoded.'):
+        spend = script_spend('OP_1')
+        spend.unlocking_script = Script('4c0101')
+        spend.step()
+
+
+def test_validate_p2pkh(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    for i, tx_input in enumerate(tx.inputs):
+        other_inputs = tx.inputs[:i] + tx.inputs[i + 1 :]
+        spend = Spend(
+            {
+                'sourceTXID': tx_input.source_txid,
+                'sourceOutputIndex': tx_input.source_output_index,
+                'sourceSatoshis': tx_input.satoshis,
+                'lockingScript': tx_input.locking_script,
+                'transactionVersion': tx.version,
+                'otherInputs': other_inputs,
+                'outputs': tx.outputs,
+                'inputIndex': i,
+                'unlockingScript': tx_input.unlocking_script,
+                'inputSequence': tx_input.sequence,
+                'lockTime': tx.locktime,
+            }
+        )
+        assert spend.validate()
+
+
+def test_validate_p2pkh_signature_cache(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    SIGNATURE_CACHE.clear()
+    assert tx.verify()
+    assert len(SIGNATURE_CACHE) == len(tx.inputs)
+    hits = SIGNATURE_CACHE.stats.hits
+    assert tx.verify()
+    assert SIGNATURE_CACHE.stats.hits == hits + len(tx.inputs)
+
+    # a cached signature does not validate another transaction
+    tx.outputs[0].satoshis -= 1
+    assert not tx.verify()
+
+
+def _p2pkh_spend(tx, i: int) -> Spend:
+    tx_input = tx.inputs[i]
+    return Spend(
+        {
+            'sourceTXID': tx_input.source_txid,
+            'sourceOutputIndex': tx_input.source_output_index,
+            'sourceSatoshis': tx_input.satoshis,
+            'lockingScript': tx_input.locking_script,
+            'transactionVersion': tx.version,
+            'otherInputs': tx.inputs[:i] + tx.inputs[i + 1 :],
+            'outputs': tx.outputs,
+            'inputIndex': i,
+            'unlockingScript': tx_input.unlocking_script,
+            'inputSequence': tx_input.sequence,
+            'lockTime': tx.locktime,
+        }
+    )
+
+
+def test_validate_p2pkh_fast_path(monkeypatch, p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    SIGNATURE_CACHE.clear()
+
+    def step(self):
+        raise AssertionError('the interpreter should not run')
+
+    with monkeypatch.context() as m:
+        m.setattr(Spend, 'step', step)
+        spend = _p2pkh_spend(tx, 0)
+        assert spend.validate()
+        assert spend.stack == [b'\x01'] and spend.context == 'LockingScript'
+
+    # spends the fast path refuses go through the interpreter, which reports why they fail
+    tx.inputs[1].unlocking_script = tx.inputs[0].unlocking_script
+    spend = _p2pkh_spend(tx, 1)
+    assert not spend.validate_p2pkh()
+    with pytest.raises(Exception, match='failed to verify the signature'):
+        spend.validate()
+
+    signature, public_key = [chunk.data for chunk in tx.inputs[2].unlocking_script.chunks]
+    tx.inputs[2].unlocking_script = Script.from_asm(f'{signature.hex()} {PrivateKey(1).public_key().hex()}')
+    with pytest.raises(Exception, match='OP_EQUALVERIFY requires'):
+        _p2pkh_spend(tx, 2).validate()
+
+    tx.inputs[2].unlocking_script = Script.from_asm(f'{signature.hex()} {public_key.hex()} OP_1')
+    assert not _p2pkh_spend(tx, 2).validate_p2pkh()
+
+def _introspect(tx, input_index: int, locking_asm: str, context=None) -> list:
+    tx_input = tx.inputs[input_index]
+    spend = Spend(
+        {
+            'sourceTXID': tx_input.source_txid,
+            'sourceOutputIndex': tx_input.source_output_index,
+            'sourceSatoshis': tx_input.satoshis,
+            'lockingScript': Script.from_asm(locking_asm),
+            'transactionVersion': tx.version,
+            'otherInputs': tx.inputs[:input_index] + tx.inputs[input_index + 1 :],
+            'outputs': tx.outputs,
+            'inputIndex': input_index,
+            'unlockingScript': tx_input.unlocking_script,
+            'inputSequence': tx_input.sequence,
+            'lockTime': tx.locktime,
+            'introspectionContext': context,
+        }
+    )
+    spend.context = 'LockingScript'
+    spend.stack = []
+    while spend.program_counter < len(spend.locking_program):
+        spend.step()
+    return [bytes(item) for item in spend.stack]
+
+
+@pytest.fixture
+def introspection_transaction(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.locktime = 700
+    tx.add_output(TransactionOutput(Script.from_asm('aabb OP_STATESEPARATOR OP_DUP OP_DROP'), 0))
+    tx.fee(10)
+    tx.sign()
+    return tx
+
+
+def test_transaction_introspection(introspection_transaction):
+    tx = introspection_transaction
+    stack = _introspect(tx, 1, 'OP_INPUTINDEX OP_TXVERSION OP_TXINPUTCOUNT OP_TXOUTPUTCOUNT OP_TXLOCKTIME')
+    assert stack == [b'\x01', b'\x01', b'\x03', b'\x03', (700).to_bytes(2, 'little')]
+
+
+def test_input_introspection(introspection_transaction):
+    tx = introspection_transaction
+    other = tx.inputs[2]
+    stack = _introspect(
+        tx,
+        0,
+        'OP_2 OP_UTXOVALUE OP_2 OP_UTXOBYTECODE OP_2 OP_OUTPOINTTXHASH OP_2 OP_OUTPOINTINDEX '
+        'OP_2 OP_INPUTBYTECODE OP_2 OP_INPUTSEQUENCENUMBER OP_0 OP_UTXOVALUE',
+    )
+    assert stack == [
+        (1002).to_bytes(2, 'little'),
+        other.locking_script.serialize(),
+        bytes.fromhex(other.source_txid)[::-1],
+        b'',
+        other.unlocking_script.serialize(),
+        b'\xff\xff\xff\xff\x00',
+        (1000).to_bytes(2, 'little'),
+    ]
+
+
+def test_output_introspection(introspection_transaction):
+    tx = introspection_transaction
+    stack = _introspect(
+        tx,
+        0,
+        'OP_0 OP_OUTPUTVALUE OP_0 OP_OUTPUTBYTECODE OP_2 OP_STATESEPARATORINDEX_OUTPUT '
+        'OP_2 OP_CODESCRIPTBYTECODE_OUTPUT OP_2 OP_STATESCRIPTBYTECODE_OUTPUT OP_0 OP_STATESEPARATORINDEX_OUTPUT '
+        'OP_0 OP_CODESCRIPTBYTECODE_OUTPUT OP_0 OP_STATESCRIPTBYTECODE_OUTPUT',
+    )
+    assert stack == [
+        (1500).to_bytes(2, 'little'),
+        tx.outputs[0].locking_script.serialize(),
+        b'\x03',
+        bytes.fromhex('7675'),
+        bytes.fromhex('02aabb'),
+        b'',
+        tx.outputs[0].locking_script.serialize(),
+        b'',
+    ]
+    assert _introspect(tx, 1, 'OP_1 OP_STATESEPARATORINDEX_UTXO') == [b'']
+
+
+def test_active_bytecode(introspection_transaction):
+    tx = introspection_transaction
+    assert _introspect(tx, 0, 'OP_1 OP_DROP OP_ACTIVEBYTECODE') == [bytes.fromhex('5175c1')]
+    assert _introspect(tx, 0, 'OP_1 OP_CODESEPARATOR OP_DROP OP_ACTIVEBYTECODE') == [bytes.fromhex('75c1')]
+
+
+def test_introspection_errors(introspection_transaction):
+    tx = introspection_transaction
+    with pytest.raises(Exception, match='OP_UTXOVALUE requires the top stack item to be a valid input index.'):
+        _introspect(tx, 0, 'OP_3 OP_UTXOVALUE')
+    with pytest.raises(Exception, match='OP_OUTPUTVALUE requires the top stack item to be a valid output index.'):
+        _introspect(tx, 0, 'OP_1NEGATE OP_OUTPUTVALUE')
+    with pytest.raises(Exception, match='OP_OUTPUTBYTECODE requires at least one item to be on the stack.'):
+        _introspect(tx, 0, 'OP_OUTPUTBYTECODE')
+
+
+def test_shared_introspection_context(introspection_transaction):
+    tx = introspection_transaction
+    context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    for i in range(len(tx.inputs)):
+        assert _introspect(tx, i, 'OP_INPUTINDEX OP_UTXOVALUE', context) == [(1000 + i).to_bytes(2, 'little')]
+
+
+REF = bytes.fromhex('aa' * 36)
+
+
+def _reference_transaction():
+    carrier = Transaction([], [TransactionOutput(Script.from_asm(f'OP_PUSHINPUTREF {REF.hex()} OP_DROP OP_1'), 1000)])
+    plain = Transaction([], [TransactionOutput(Script.from_asm('OP_1'), 500)], locktime=1)
+    minted = bytes.fromhex(plain.txid())[::-1] + b'\x00\x00\x00\x00'
+    inputs = [
+        TransactionInput(source_transaction=carrier, source_output_index=0, unlocking_script=Script()),
+        TransactionInput(source_transaction=plain, source_output_index=0, unlocking_script=Script()),
+    ]
+    outputs = [
+        TransactionOutput(Script.from_asm(f'OP_PUSHINPUTREF {REF.hex()} OP_DROP OP_1'), 600),
+        TransactionOutput(Script.from_asm(f'OP_PUSHINPUTREFSINGLETON {minted.hex()} OP_DROP OP_1'), 0),
+        TransactionOutput(Script.from_asm(f'OP_PUSHINPUTREF {REF.hex()} OP_DROP OP_1'), 300),
+        TransactionOutput(Script.from_asm('0101 OP_STATESEPARATOR OP_1'), 0),
+        TransactionOutput(Script.from_asm('0202 OP_STATESEPARATOR OP_1'), 0),
+    ]
+    return Transaction(inputs, outputs), minted
+
+
+def test_reference_queries():
+    tx, minted = _reference_transaction()
+    stack = _introspect(
+        tx,
+        1,
+        f'{REF.hex()} OP_REFVALUESUM_UTXOS {REF.hex()} OP_REFOUTPUTCOUNT_UTXOS '
+        f'{REF.hex()} OP_REFVALUESUM_OUTPUTS {REF.hex()} OP_REFOUTPUTCOUNT_OUTPUTS '
+        f'{minted.hex()} OP_REFOUTPUTCOUNTZEROVALUED_OUTPUTS {minted.hex()} OP_REFTYPE_OUTPUT '
+        f'{REF.hex()} OP_REFTYPE_UTXO {minted.hex()} OP_REFTYPE_UTXO',
+    )
+    assert stack == [
+        (1000).to_bytes(2, 'little'),
+        b'\x01',
+        (900).to_bytes(2, 'little'),
+        b'\x02',
+        b'\x01',
+        b'\x02',
+        b'\x01',
+        b'',
+    ]
+
+
+def test_code_script_hash_queries():
+    tx, _ = _reference_transaction()
+    code_script_hash = hash256(tx.outputs[0].locking_script.serialize()).hex()
+    stateful_hash = hash256(b'\x51').hex()
+    stack = _introspect(
+        tx,
+        1,
+        f'{code_script_hash} OP_CODESCRIPTHASHVALUESUM_OUTPUTS '
+        f'{code_script_hash} OP_CODESCRIPTHASHOUTPUTCOUNT_OUTPUTS '
+        f'{stateful_hash} OP_CODESCRIPTHASHZEROVALUEDOUTPUTCOUNT_OUTPUTS '
+        f'{code_script_hash} OP_CODESCRIPTHASHVALUESUM_UTXOS',
+    )
+    assert stack == [(900).to_bytes(2, 'little'), b'\x02', b'\x02', (1000).to_bytes(2, 'little')]
+    with pytest.raises(Exception, match='requires the top stack item to be a 32 byte code script hash.'):
+        _introspect(tx, 1, f'{REF.hex()} OP_CODESCRIPTHASHVALUESUM_UTXOS')
+
+
+def test_push_input_reference():
+    tx, minted = _reference_transaction()
+    assert _introspect(tx, 1, f'OP_PUSHINPUTREF {REF.hex()} OP_REQUIREINPUTREF {minted.hex()}') == [REF, minted]
+    # the spent output is the running script, which would carry the reference itself
+    context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    with pytest.raises(Exception, match='OP_PUSHINPUTREF requires the reference to be spent or carried by an input.'):
+        _introspect(tx, 1, f'OP_PUSHINPUTREF {"bb" * 36}', context)
+    assert _introspect(tx, 1, f'OP_DISALLOWPUSHINPUTREF {"bb" * 36}') == [bytes.fromhex('bb' * 36)]
+
+
+def test_shared_reference_index():
+    tx, minted = _reference_transaction()
+    context = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime)
+    for i in range(len(tx.inputs)):
+        _introspect(tx, i, f'{REF.hex()} OP_REFVALUESUM_OUTPUTS', context)
+    index = context.references()
+    assert index is context.references()
+    assert index.outputs.ref(REF).indexes == [0, 2]
+    assert index.unbacked_output_refs() == set()
+    assert index.singleton_violations() == set()
+
+    script = Script.from_asm(f'OP_PUSHINPUTREFSINGLETON {minted.hex()} OP_PUSHINPUTREF {"bb" * 36}')
+    tx.add_output(TransactionOutput(script, 0))
+    index = TransactionIntrospectionContext(tx.inputs, tx.outputs, tx.version, tx.locktime).references()
+    assert index.unbacked_output_refs() == {bytes.fromhex('bb' * 36)}
+    assert index.singleton_violations() == {minted}
+
+
+def test_verify_references():
+    tx, minted = _reference_transaction()
+    report = tx.verify_inputs()
+    assert report.valid and report.reference_errors == []
+
+    script = Script.from_asm(f'OP_PUSHINPUTREFSINGLETON {minted.hex()} OP_PUSHINPUTREF {"bb" * 36}')
+    tx.add_output(TransactionOutput(script, 0))
+    report = tx.verify_inputs()
+    assert not report.valid and not tx.verify()
+    assert report.reference_errors == [
+        f'output reference {"bb" * 36} is neither carried by a spent output nor minted by the transaction.',
+        f'singleton reference {minted.hex()} is carried by more than one output.',
+    ]
+    # the input scripts are still valid, only validated without fail fast
+    assert [result.valid for result in report.inputs] == [None, None]
+    report = tx.verify_inputs(fail_fast=False)
+    assert [result.valid for result in report.inputs] == [True, True] and not report.valid
+    with TransactionVerifier(max_workers=1) as verifier:
+        assert verifier.verify(tx).reference_errors == report.reference_errors
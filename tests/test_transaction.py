@@ -1,8 +1,19 @@
+import copy
+import pickle
+
 import pytest
 
+from rxdpy.constants import SIGHASH
+from rxdpy.keys import PrivateKey, SIGNATURE_CACHE
+from rxdpy.script.script import Script
+from rxdpy.script.spend import Spend
+from rxdpy.script.type import P2PKH
 from rxdpy.transaction.transaction import Transaction
 from rxdpy.transaction.transaction_input import TransactionInput
 from rxdpy.transaction.transaction_output import TransactionOutput
+from rxdpy.transaction.transaction_preimage import TransactionPreimageContext, tx_preimage, tx_preimages
+from rxdpy.transaction.transaction_signer import BatchSigner
+from rxdpy.transaction.transaction_verifier import TransactionVerifier
 
 
 def test_init_transaction():
@@ -68,3 +79,311 @@ def test_malformed_transaction():
     transaction = Transaction.from_hex(tx_hex)
 
     assert transaction is None
+
+
+def test_preimage_context_matches_tx_preimage(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.inputs[1].sighash = SIGHASH.SINGLE_FORKID
+    tx.inputs[2].sighash = SIGHASH.NONE_ANYONECANPAY_FORKID
+    tx.fee(10)
+    for i in range(len(tx.inputs)):
+        assert tx.preimage(i) == tx_preimage(i, tx.inputs, tx.outputs, tx.version, tx.locktime)
+    assert [tx.preimage(i) for i in range(len(tx.inputs))] == tx_preimages(
+        tx.inputs, tx.outputs, tx.version, tx.locktime
+    )
+
+
+def test_preimage_context_invalidation(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    context = tx.preimage_context()
+    preimage = tx.preimage(0)
+    assert tx.preimage_context() is context
+
+    tx.outputs[0].satoshis += 1
+    assert tx.preimage(0) != preimage
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+
+    tx.inputs[2].sequence = 0
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+
+    tx.add_output(TransactionOutput(P2PKH().lock(PrivateKey(1).address()), 1))
+    assert tx.preimage_context() is not context
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+
+    tx.locktime = 100
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+
+
+def test_preimage_context_per_transaction(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    other = p2pkh_transaction()
+    tx.fee(10)
+    other.fee(10)
+    context = tx.preimage_context().precompute()
+    digests = context.hash_prevouts(), context.hash_sequence(), context.hash_outputs()
+
+    # changes of another transaction keep the digests
+    other.inputs[0].sequence = 0
+    other.outputs[0].satoshis += 1
+    other.sign()
+    # the very same digests, not recomputed
+    current = context.hash_prevouts(), context.hash_sequence(), context.hash_outputs()
+    assert all(digest is cached for digest, cached in zip(current, digests))
+
+    # a context over lists of no transaction tracks the fields of their items
+    inputs, outputs = list(tx.inputs), list(tx.outputs)
+    context = TransactionPreimageContext(inputs, outputs, tx.version, tx.locktime)
+    preimage = context.preimage(0)
+    outputs[0].satoshis += 1
+    assert context.preimage(0) != preimage
+    assert context.preimage(0) == tx_preimage(0, inputs, outputs, tx.version, tx.locktime)
+
+
+def test_preimage_context_reordered_outputs(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    preimage = tx.preimage(0)
+
+    tx.outputs.reverse()
+    assert tx.preimage(0) != preimage
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+    tx.inputs[0], tx.inputs[1] = tx.inputs[1], tx.inputs[0]
+    assert tx.preimage(0) == tx_preimage(0, tx.inputs, tx.outputs, tx.version, tx.locktime)
+
+    tx.sign()
+    assert tx.verify()
+    # signed for the reordered transaction, not for the one the stale digests described
+    assert Transaction(list(tx.inputs), list(tx.outputs)).verify()
+
+
+def test_sign_with_shared_preimage_context(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    for i, tx_input in enumerate(tx.inputs):
+        signature, public_key = [chunk.data for chunk in tx_input.unlocking_script.chunks]
+        spend = Spend(
+            {
+                "sourceTXID": tx_input.source_txid,
+                "sourceOutputIndex": tx_input.source_output_index,
+                "sourceSatoshis": tx_input.satoshis,
+                "lockingScript": tx_input.locking_script,
+                "transactionVersion": tx.version,
+                "otherInputs": tx.inputs[:i] + tx.inputs[i + 1 :],
+                "outputs": tx.outputs,
+                "inputIndex": i,
+                "unlockingScript": tx_input.unlocking_script,
+                "inputSequence": tx_input.sequence,
+                "lockTime": tx.locktime,
+                "preimageContext": tx.preimage_context() if i % 2 else None,
+            }
+        )
+        assert spend.verify_signature(signature, public_key, tx_input.locking_script)
+
+
+def test_parallel_sign(p2pkh_transaction):
+    expected = p2pkh_transaction(20)
+    expected.fee(10)
+    expected.sign()
+
+    tx = p2pkh_transaction(20)
+    tx.fee(10)
+    assert tx.sign(parallel=4) is tx
+    assert tx.hex() == expected.hex()
+
+    txs = [p2pkh_transaction(i) for i in range(1, 5)]
+    for t in txs:
+        t.fee(10)
+    with BatchSigner(max_workers=3) as signer:
+        assert signer.sign_many(txs) == txs
+    for t in txs:
+        sequential = p2pkh_transaction(len(t.inputs))
+        sequential.fee(10)
+        assert t.hex() == sequential.sign().hex()
+
+
+def test_parallel_sign_requires_output_amounts(p2pkh_transaction):
+    tx = p2pkh_transaction(4)
+    with pytest.raises(ValueError, match=r"change outputs with uncomputed amounts"):
+        tx.sign(parallel=True)
+    assert all(tx_input.unlocking_script is None for tx_input in tx.inputs)
+
+
+def test_txid_cache(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+
+    def fresh_txid(t: Transaction) -> str:
+        t.invalidate()
+        return t.txid()
+
+    txid = tx.txid()
+    hits = Transaction.cache_stats.hits
+    assert tx.txid() == txid
+    assert tx.hash() == bytes.fromhex(txid)[::-1]
+    assert Transaction.cache_stats.hits == hits + 2
+
+    tx.sign()
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.outputs[0].satoshis -= 1
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.inputs[0].unlocking_script = Script("51")
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.outputs.reverse()
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.inputs[0] = TransactionInput(source_txid="ab" * 32, source_output_index=1, unlocking_script=Script("51"))
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.add_output(TransactionOutput(P2PKH().lock(PrivateKey(1).address()), 1))
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+    txid = tx.txid()
+    tx.version = 2
+    assert tx.txid() != txid
+    assert tx.txid() == fresh_txid(tx)
+
+
+def test_txid_cache_per_transaction(p2pkh_transaction):
+    t1 = p2pkh_transaction()
+    t2 = p2pkh_transaction()
+    t1.fee(10)
+    t2.fee(10)
+    t1.txid()
+    t2.txid()
+
+    # changes of another transaction keep the cache
+    misses = Transaction.cache_stats.misses
+    t2.inputs[0].sequence = 5
+    t2.outputs.reverse()
+    t1.txid()
+    assert Transaction.cache_stats.misses == misses
+
+    # an input shared by both transactions changes both
+    shared = Transaction(t1.inputs, t1.outputs)
+    txids = t1.txid(), shared.txid()
+    t1.inputs[0].sequence = 5
+    assert t1.txid() != txids[0] and shared.txid() != txids[1]
+    assert t1.txid() == shared.txid()
+
+    # the lists passed in are copied, changing them afterwards does not change the transaction
+    inputs = list(t1.inputs)
+    tx = Transaction(inputs, t1.outputs)
+    inputs.pop()
+    assert len(tx.inputs) == len(t1.inputs) and tx.txid() == t1.txid()
+    assert tx.inputs is not inputs
+
+    # copies track changes of their own
+    copied = copy.deepcopy(tx)
+    assert copied.txid() == tx.txid()
+    copied.outputs.pop()
+    assert copied.txid() != tx.txid()
+    assert copied.txid() == Transaction(copied.inputs, copied.outputs).txid()
+    pickled = pickle.loads(pickle.dumps(Transaction.from_hex(tx.hex())))
+    assert pickled.txid() == tx.txid()
+    pickled.inputs[0].sequence = 6
+    assert pickled.txid() != tx.txid()
+
+
+def test_parsed_transaction_keeps_raw_bytes(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    raw = tx.serialize()
+
+    parsed = Transaction.from_hex(raw)
+    misses = Transaction.cache_stats.misses
+    assert parsed.serialize() == raw
+    assert parsed.txid() == tx.txid()
+    assert Transaction.cache_stats.misses == misses
+
+
+def test_verify(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    report = tx.verify_inputs()
+    assert tx.verify()
+    assert report.valid
+    assert [result.index for result in report.inputs] == [0, 1, 2]
+    assert report.value_in == 3003 and report.value_out <= report.value_in
+
+    # signed by the right key, for another input
+    unlocking_script = tx.inputs[1].unlocking_script
+    tx.inputs[1].unlocking_script = tx.inputs[0].unlocking_script
+    report = tx.verify_inputs()
+    assert not tx.verify()
+    assert [result.valid for result in report.inputs] == [True, False, True]
+    assert [result.index for result in report.failures()] == [1]
+
+    # the script fails before any signature is checked
+    tx.inputs[1].unlocking_script = unlocking_script
+    tx.inputs[0].unlocking_script = Script('51')
+    assert [result.valid for result in tx.verify_inputs().inputs] == [False, None, None]
+    assert [result.valid for result in tx.verify_inputs(fail_fast=False).inputs] == [False, True, True]
+
+
+def test_verify_rejects_overspending(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.outputs[1].satoshis += 100
+    tx.sign()
+    report = tx.verify_inputs()
+    assert all(result.valid for result in report.inputs)
+    assert not report.valid
+
+
+def test_verify_requires_source_outputs(p2pkh_transaction):
+    tx = p2pkh_transaction()
+    tx.fee(10)
+    tx.sign()
+    tx.inputs[2].locking_script = None
+    with pytest.raises(ValueError, match="index 2"):
+        tx.verify()
+
+
+def test_parallel_verify(p2pkh_transaction):
+    tx = p2pkh_transaction(6)
+    tx.fee(10)
+    tx.sign()
+    with TransactionVerifier(max_workers=2, chunk_size=2) as verifier:
+        assert tx.verify(parallel=verifier)
+        tx.inputs[4].unlocking_script = tx.inputs[0].unlocking_script
+        report = tx.verify_inputs(parallel=verifier, fail_fast=False)
+        assert [result.valid for result in report.inputs] == [True, True, True, True, False, True]
+        assert "Script evaluation error" in report.failures()[0].error
+
+        tx.inputs[4].unlocking_script = Script('51')
+        report = tx.verify_inputs(parallel=verifier)
+        assert not report.valid
+        assert report.inputs[4].valid is False
+        assert report.inputs[5].valid is None
+
+
+def test_verify_batch_signatures(p2pkh_transaction):
+    tx = p2pkh_transaction(40)
+    tx.fee(10)
+    tx.sign()
+    SIGNATURE_CACHE.clear()
+    assert tx.verify()
+    assert len(SIGNATURE_CACHE) == 40
+
+    SIGNATURE_CACHE.clear()
+    tx.inputs[7].unlocking_script = tx.inputs[8].unlocking_script
+    report = tx.verify_inputs(fail_fast=False)
+    assert [result.index for result in report.failures()] == [7]
@@ -0,0 +1,114 @@
+import asyncio
+
+from rxdpy.keys import PrivateKey
+from rxdpy.network.electrumx import ElectrumXClient, address_scripthash
+from rxdpy.network.electrumx_stub import ElectrumXStub
+from rxdpy.network.utxo_cache import UtxoCache
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.transaction.transaction_output import TransactionOutput
+from rxdpy.utxo import Utxo
+
+private_key = PrivateKey(0xC0FFEE)
+address = private_key.address()
+scripthash = address_scripthash(address)
+other_address = PrivateKey(2).address()
+
+
+def _unspent(txid: str, value: int, height: int = 100, index: int = 0):
+    return {'tx_hash': txid, 'tx_pos': index, 'height': height, 'value': value}
+
+
+def _listunspent_count(stub: ElectrumXStub) -> int:
+    return sum(1 for method, _ in stub.requests if method == 'blockchain.scripthash.listunspent')
+
+
+def test_utxo_cache_watch_and_notifications():
+    async def run():
+        async with ElectrumXStub() as stub:
+            stub.unspent[scripthash] = [_unspent('aa' * 32, 1000), _unspent('bb' * 32, 5000, height=0)]
+            async with ElectrumXClient(stub.url, pool_size=1) as client:
+                cache = UtxoCache(client)
+                await cache.watch_addresses([address, other_address])
+                # the address without history is not listed
+                assert _listunspent_count(stub) == 1
+                assert [utxo.satoshis for utxo in cache.utxos()] == [5000, 1000]
+                assert [utxo.satoshis for utxo in cache.utxos(confirmed_only=True)] == [1000]
+                assert cache.address_utxos(other_address) == []
+                assert cache.balance() == 6000
+                assert len(cache) == 2
+                assert cache.utxos()[0].locking_script == P2PKH().lock(address).serialize()
+
+                # served from memory until the status changes
+                cache.utxos()
+                await cache.watch([scripthash])
+                assert _listunspent_count(stub) == 1
+
+                await stub.update(scripthash, unspent=[_unspent('cc' * 32, 7000)])
+                await stub.update(address_scripthash(other_address), unspent=[_unspent('dd' * 32, 300)])
+                for _ in range(50):
+                    await asyncio.sleep(0.01)
+                    await cache.synced()
+                    if cache.balance() == 7300:
+                        break
+                assert cache.utxos() == [Utxo('cc' * 32, 0, 7000, 100, scripthash), Utxo('dd' * 32, 0, 300, 100, '')]
+                assert cache.error is None
+
+    asyncio.run(run())
+
+
+def test_utxo_cache_broadcast():
+    async def run():
+        async with ElectrumXStub() as stub:
+            stub.unspent[scripthash] = [_unspent('aa' * 32, 1000), _unspent('bb' * 32, 5000)]
+            async with ElectrumXClient(stub.url, pool_size=1) as client:
+                cache = UtxoCache(client)
+                await cache.watch_addresses([address])
+                utxo = cache.utxos()[0]
+                tx_input = utxo.to_input(P2PKH().unlock(private_key))
+                assert tx_input.satoshis == 5000
+                tx = Transaction(
+                    [tx_input],
+                    [
+                        TransactionOutput(P2PKH().lock(other_address), 3000),
+                        TransactionOutput(P2PKH().lock(address), 1900),
+                    ],
+                ).sign()
+
+                txid = await cache.broadcast(tx)
+                assert txid == tx.txid()
+                # the spent output is gone and the change is unconfirmed, before any notification
+                utxos = [(utxo.txid, utxo.satoshis, utxo.height) for utxo in cache.utxos()]
+                assert utxos == [(txid, 1900, 0), ('aa' * 32, 1000, 100)]
+
+                # the server still lists the spent output for a while
+                await cache.refresh([scripthash])
+                assert cache.balance() == 1000
+                await stub.update(scripthash, unspent=[_unspent('aa' * 32, 1000), _unspent(txid, 1900, 0, index=1)])
+                await asyncio.sleep(0.05)
+                await cache.synced()
+                assert cache.balance() == 2900
+                assert not cache._spent
+
+    asyncio.run(run())
+
+
+def test_utxo_cache_resubscribes():
+    async def run():
+        async with ElectrumXStub() as stub:
+            async with ElectrumXClient(stub.url, pool_size=1) as client:
+                cache = UtxoCache(client)
+                await cache.watch_addresses([address])
+                assert cache.utxos() == []
+                # changed while the connection is down, no notification reaches the client
+                await stub.drop_connections()
+                stub.unspent[scripthash] = [_unspent('aa' * 32, 1000)]
+                for _ in range(50):
+                    await asyncio.sleep(0.01)
+                    await cache.synced()
+                    if cache.balance():
+                        break
+                assert cache.balance() == 1000
+                assert cache.watched == [scripthash]
+
+    asyncio.run(run())
@@ -0,0 +1,145 @@
+import threading
+
+from rxdpy.address_index import electrumx_scripthash
+from rxdpy.block import Block, BlockHeader, MerkleRootBuilder
+from rxdpy.keys import PrivateKey
+from rxdpy.utxo import Utxo
+from rxdpy.script.script import Script
+from rxdpy.script.type import P2PKH
+from rxdpy.transaction.transaction import Transaction
+from rxdpy.utils import Writer
+from rxdpy.utxo_store import UtxoStore, script_refs
+
+address = PrivateKey(0xC0FFEE).address()
+other_address = PrivateKey(2).address()
+locking_script = P2PKH().lock(address)
+scripthash = electrumx_scripthash(locking_script)
+other_scripthash = electrumx_scripthash(P2PKH().lock(other_address))
+ref = bytes(range(36))
+# a Glyph token output: OP_PUSHINPUTREF <ref> OP_DROP then P2PKH
+token_script = Script('d0' + ref.hex() + '75' + locking_script.hex())
+
+
+def _coinbase(build, satoshis: int, locktime: int = 0) -> Transaction:
+    return build([('00' * 32, 0xFFFFFFFF)], [(locking_script, satoshis)], locktime)
+
+
+def _block(txs) -> bytes:
+    builder = MerkleRootBuilder()
+    for tx in txs:
+        builder.add(tx.hash())
+    header = BlockHeader(
+        version=0x20000000,
+        prev_block_hash=bytes(32),
+        merkle_root=builder.root(),
+        time=1700000000,
+        bits=0x1D00FFFF,
+        nonce=0,
+    )
+    writer = Writer()
+    writer.write(header.serialize())
+    writer.write_var_int_num(len(txs))
+    for tx in txs:
+        writer.write(tx.serialize())
+    return writer.to_bytes()
+
+
+def test_script_refs():
+    assert script_refs(locking_script.serialize()) == []
+    assert script_refs(token_script.serialize()) == [ref]
+    singleton = Script('d8' + ref.hex() + '75' + 'd0' + ref.hex() + '75' + locking_script.hex())
+    assert script_refs(singleton.serialize()) == [ref]
+
+
+def test_utxo_store_add_and_spend(tmp_path):
+    with UtxoStore(str(tmp_path / 'utxo.sqlite')) as store:
+        store.add(
+            [
+                Utxo('aa' * 32, 0, 1000, 100, scripthash, locking_script.serialize()),
+                Utxo('aa' * 32, 1, 5000, 100, scripthash, locking_script.serialize()),
+                Utxo('bb' * 32, 0, 3000, 0, other_scripthash, P2PKH().lock(other_address).serialize()),
+            ]
+        )
+        assert len(store) == 3
+        assert store.get('aa' * 32, 1) == Utxo('aa' * 32, 1, 5000, 100, scripthash)
+        assert store.get('cc' * 32, 0) is None
+        assert [utxo.satoshis for utxo in store.by_scripthash(scripthash)] == [5000, 1000]
+        assert store.balance(scripthash) == 6000
+        assert store.balance('00' * 32) == 0
+        assert [utxo.satoshis for utxo in store.by_value(2000)] == [3000, 5000]
+        assert [utxo.satoshis for utxo in store.by_value(1000, 3000)] == [1000, 3000]
+        assert [utxo.satoshis for utxo in store.by_value(limit=1)] == [1000]
+
+        store.spend([('aa' * 32, 1), ('cc' * 32, 0)])
+        assert store.balance(scripthash) == 1000
+        assert store.tip() is None
+
+        # stored again with another locking script, the references of the old one are gone
+        store.add([Utxo('dd' * 32, 0, 1, 100, electrumx_scripthash(token_script), token_script.serialize())])
+        assert [utxo.txid for utxo in store.by_ref(ref)] == ['dd' * 32]
+        store.add([Utxo('dd' * 32, 0, 1, 100, scripthash, locking_script.serialize())])
+        assert store.by_ref(ref) == []
+        store.spend([('dd' * 32, 0)])
+
+    # persisted
+    with UtxoStore(str(tmp_path / 'utxo.sqlite')) as store:
+        assert len(store) == 2
+
+
+def test_utxo_store_apply_transactions(tmp_path, unsigned_transaction):
+    with UtxoStore(str(tmp_path / 'utxo.sqlite')) as store:
+        funding = _coinbase(unsigned_transaction, 10000)
+        assert store.apply_transactions([funding], 1) == (1, 0)
+        assert store.get(funding.txid(), 0).height == 1
+
+        mint = unsigned_transaction([(funding.txid(), 0)], [(token_script, 1), (locking_script, 9000)])
+        # created and spent in the same batch, never stored
+        transfer = unsigned_transaction([(mint.txid(), 1)], [(P2PKH().lock(other_address), 8000)])
+        assert store.apply_transactions([mint, transfer], 2) == (2, 1)
+        assert store.get(funding.txid(), 0) is None
+        assert store.get(mint.txid(), 1) is None
+        assert [(utxo.txid, utxo.index) for utxo in store.by_ref(ref)] == [(mint.txid(), 0)]
+        assert store.balance(other_scripthash) == 8000
+
+        burn = unsigned_transaction([(mint.txid(), 0)], [(P2PKH().lock(other_address), 1)])
+        # only outputs to our script hash are kept
+        assert store.apply_transactions([burn], 3, keep=scripthash.__eq__) == (0, 1)
+        assert store.by_ref(ref) == []
+        assert store.balance(other_scripthash) == 8000
+        assert len(store) == 1
+
+
+def test_utxo_store_apply_block(tmp_path, unsigned_transaction):
+    with UtxoStore(str(tmp_path / 'utxo.sqlite')) as store:
+        coinbase = _coinbase(unsigned_transaction, 5000)
+        tx = unsigned_transaction([(coinbase.txid(), 0)], [(token_script, 1), (locking_script, 4000)])
+        block = Block(_block([coinbase, tx]))
+        assert store.apply_block(block, 10) == (2, 0)
+        assert store.tip() == (10, block.block_hash())
+        assert [utxo.txid for utxo in store.by_ref(ref)] == [tx.txid()]
+        assert store.balance(scripthash) == 4000
+        assert store.balance(electrumx_scripthash(token_script)) == 1
+
+
+def test_utxo_store_snapshot(tmp_path, unsigned_transaction):
+    with UtxoStore(str(tmp_path / 'utxo.sqlite')) as store:
+        funding = _coinbase(unsigned_transaction, 10000)
+        store.apply_transactions([funding], 1, tip_hash='11' * 32)
+        with store.snapshot() as snapshot:
+            assert snapshot.balance(scripthash) == 10000
+
+            # a block applied from another thread while the snapshot is open
+            spend = unsigned_transaction([(funding.txid(), 0)], [(P2PKH().lock(other_address), 9000)])
+            writer = threading.Thread(target=store.apply_transactions, args=([spend], 2, None, '22' * 32))
+            writer.start()
+            writer.join()
+
+            assert store.balance(scripthash) == 0
+            assert store.tip() == (2, '22' * 32)
+            # unchanged for the snapshot
+            assert snapshot.balance(scripthash) == 10000
+            assert snapshot.get(funding.txid(), 0).satoshis == 10000
+            assert snapshot.by_scripthash(other_scripthash) == []
+            assert snapshot.tip() == (1, '11' * 32)
+        with store.snapshot() as snapshot:
+            assert len(snapshot) == 1